@@ -0,0 +1,260 @@
+"""
+cases.py — Benchmark cases for the backend hot paths.
+
+Each case is registered with @case(name): the decorated function does any
+setup and returns the zero-argument callable that is actually timed.
+Everything runs offline on the HTML fixtures in benchmarks/fixtures/ and
+on synthetic Gemini responses; the cache cases use a throwaway SQLite store
+(configured by run.py before this module is imported).
+"""
+
+import json
+import os
+import random
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+CASES = {}
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+REQUEST = {
+    "from_location": "Delhi", "to": "Jaipur", "start_date": "2026-12-10", "nights": 4,
+    "budget": "moderate", "purposes": ["culture", "food"], "pace": "moderate",
+    "checkpoints": ["Amber Fort"], "group_size": "couple", "total_budget": None,
+}
+
+WEATHER = {
+    "condition": "Clear sky", "temp_max_c": 24, "temp_min_c": 9, "rain_mm": 0, "tip": "Carry a light jacket.",
+    "days": [
+        {"date": f"2026-12-{10 + i}", "condition": "Clear sky", "temp_max_c": 24, "temp_min_c": 9, "rain_mm": 0}
+        for i in range(5)
+    ],
+}
+
+
+def _merged() -> dict:
+    from services.scraper import parse_wikipedia, parse_wikivoyage, parse_incredible_india, merge_destination_data
+    return merge_destination_data(
+        parse_wikipedia(fixture("wikipedia_jaipur.html")),
+        parse_wikivoyage(fixture("wikivoyage_jaipur.html")),
+        parse_incredible_india(fixture("incredible_india_jaipur.html")),
+    )
+
+
+def _itinerary(days: int, rng: random.Random) -> dict:
+    """A full-format itinerary of realistic size (4 activities/day, 3 alternatives each)."""
+    words = "fort palace bazaar walk sunset temple museum lassi rooftop dinner heritage craft".split()
+
+    def text(n):
+        return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+    return {
+        "destination": "Jaipur",
+        "days": [{
+            "day": d + 1,
+            "theme": text(4),
+            "activities": [{
+                "time": t, "period": "morning", "title": text(4), "description": text(22),
+                "category": "culture", "cost_inr": rng.choice([0, 200, 500, 1500]),
+                "alternatives": [
+                    {"title": text(3), "description": text(14), "category": "food", "cost_inr": 300}
+                    for _ in range(3)
+                ],
+            } for t in ("09:00", "12:30", "15:30", "19:30")],
+        } for d in range(days)],
+        "budget_summary": {"accommodation_inr": 30000, "food_inr": 16000, "transport_inr": 8000,
+                           "activities_inr": 6000, "total_inr": 60000},
+        "seasonal_insight": {"badge_text": "Winter", "badge_color": "#06b6d4",
+                             "description": text(20), "tips": [text(6)] * 3},
+        "transport_intelligence": {"recommended_mode": "Train", "approx_reason": text(12)},
+        "tips": [text(8)] * 3,
+    }
+
+
+# ──────────────────────────────────────────────
+# Scraper parsing
+# ──────────────────────────────────────────────
+
+@case("parse.wikipedia.legacy_headings")
+def _():
+    from services.scraper import parse_wikipedia
+    html = fixture("wikipedia_jaipur.html")
+    return lambda: parse_wikipedia(html)
+
+
+@case("parse.wikipedia.mw_heading")
+def _():
+    from services.scraper import parse_wikipedia
+    html = fixture("wikipedia_kochi.html")
+    return lambda: parse_wikipedia(html)
+
+
+@case("parse.wikivoyage.legacy_headings")
+def _():
+    from services.scraper import parse_wikivoyage
+    html = fixture("wikivoyage_jaipur.html")
+    return lambda: parse_wikivoyage(html)
+
+
+@case("parse.wikivoyage.mw_heading")
+def _():
+    from services.scraper import parse_wikivoyage
+    html = fixture("wikivoyage_kochi.html")
+    return lambda: parse_wikivoyage(html)
+
+
+@case("parse.incredible_india")
+def _():
+    from services.scraper import parse_incredible_india
+    html = fixture("incredible_india_jaipur.html")
+    return lambda: parse_incredible_india(html)
+
+
+# ──────────────────────────────────────────────
+# Merging and context
+# ──────────────────────────────────────────────
+
+@case("merge.destination_data")
+def _():
+    from services.scraper import parse_wikipedia, parse_wikivoyage, parse_incredible_india, merge_destination_data
+    wiki   = parse_wikipedia(fixture("wikipedia_jaipur.html"))
+    voyage = parse_wikivoyage(fixture("wikivoyage_jaipur.html"))
+    india  = parse_incredible_india(fixture("incredible_india_jaipur.html"))
+    return lambda: merge_destination_data(wiki, voyage, india)
+
+
+@case("helpers.dedupe_limit.500")
+def _():
+    from utils.helpers import dedupe_limit
+    rng   = random.Random(1)
+    items = [f"  Place {rng.randint(0, 150)} " if i % 7 else None for i in range(500)]
+    return lambda: dedupe_limit(items, limit=400)
+
+
+@case("logic.build_context")
+def _():
+    from services.logic_service import build_context
+    return lambda: build_context(REQUEST)
+
+
+# ──────────────────────────────────────────────
+# Prompt and response handling
+# ──────────────────────────────────────────────
+
+@case("gemini.build_prompt")
+def _():
+    from services.gemini_service import _build_prompt
+    from services.logic_service import build_context
+    context = build_context(REQUEST)
+    data    = _merged()
+    return lambda: _build_prompt(context, data, REQUEST, WEATHER)
+
+
+@case("gemini.parse.full_14_days")
+def _():
+    from services.gemini_service import _parse
+    raw = "```json\n" + json.dumps(_itinerary(14, random.Random(2)), indent=2) + "\n```"
+    return lambda: _parse(raw)
+
+
+@case("gemini.parse.compact_14_days")
+def _():
+    from services.gemini_service import _parse
+    plan = _itinerary(14, random.Random(3))
+    compact = {
+        "d": plan["destination"],
+        "days": [{"t": d["theme"], "a": [
+            [a["time"], a["title"], a["description"], "c", a["cost_inr"]] for a in d["activities"]
+        ]} for d in plan["days"]],
+        "b": list(plan["budget_summary"].values()),
+        "tips": plan["tips"],
+    }
+    raw = json.dumps(compact, separators=(",", ":"))
+    return lambda: _parse(raw)
+
+
+@case("gemini.parse.truncated_14_days")
+def _():
+    from services.gemini_service import _parse
+    raw = json.dumps(_itinerary(14, random.Random(4)), indent=2)
+    raw = raw[:int(len(raw) * 0.8)].replace('"cost_inr": 300\n', '"cost_inr": 300,\n')
+    return lambda: _parse(raw)
+
+
+@case("alternatives.fill_5_days")
+def _():
+    from services.alternatives import AlternativesIndex, fill_itinerary
+    from services.logic_service import build_context
+    context = build_context(REQUEST)
+    index   = AlternativesIndex("Jaipur", _merged())
+    plan    = _itinerary(5, random.Random(5))
+    return lambda: fill_itinerary(plan, index, context)
+
+
+# ──────────────────────────────────────────────
+# Cache
+# ──────────────────────────────────────────────
+
+CACHE_ENTRIES = 2000
+
+
+def _filled_cache():
+    """Store CACHE_ENTRIES plan-sized entries once; returns (keys, sample plan)."""
+    from utils.cache import get_backend, set_cached
+    if not getattr(_filled_cache, "keys", None):
+        plan = _itinerary(5, random.Random(6))
+        keys = [f"bench_plan_{i}" for i in range(CACHE_ENTRIES)]
+        backend = get_backend()
+        for key in keys:
+            set_cached(key, plan)
+        backend.purge_expired()
+        _filled_cache.keys, _filled_cache.plan = keys, plan
+    return _filled_cache.keys, _filled_cache.plan
+
+
+@case("cache.set")
+def _():
+    from utils.cache import set_cached
+    keys, plan = _filled_cache()
+    counter = iter(range(10 ** 9))
+    return lambda: set_cached(keys[next(counter) % len(keys)], plan)
+
+
+@case("cache.get.memory_hit")
+def _():
+    from utils.cache import get_cached
+    keys, _ = _filled_cache()
+    get_cached(keys[0])
+    return lambda: get_cached(keys[0])
+
+
+@case("cache.get.store_hit")
+def _():
+    from utils.cache import get_cached, _memory
+    keys, _ = _filled_cache()
+    counter = iter(range(10 ** 9))
+
+    def read():
+        key = keys[next(counter) % len(keys)]
+        _memory.pop(key)                # force the read through to the store
+        return get_cached(key)
+    return read
+
+
+@case("cache.get.miss")
+def _():
+    from utils.cache import get_cached
+    _filled_cache()
+    return lambda: get_cached("bench_missing_key")
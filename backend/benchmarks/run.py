@@ -0,0 +1,170 @@
+"""
+run.py — Run the offline microbenchmarks and compare against a baseline.
+
+Run from the backend/ directory:
+    python -m benchmarks.run                                  # all cases, table output
+    python -m benchmarks.run -k parse                         # only cases whose name contains "parse"
+    python -m benchmarks.run --output results.json            # machine-readable results
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --fail-on-regression
+
+Each case is timed for at least --min-time seconds (and --min-runs calls)
+after one warm-up call. Results report median, p95, min and mean per call
+in microseconds; comparison uses the median. A baseline is only meaningful
+on the machine it was recorded on.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _isolate_environment(tmpdir: str) -> None:
+    """Point every store at a throwaway location before the backend is imported."""
+    os.environ["CACHE_BACKEND"] = "sqlite"
+    os.environ["CACHE_DB_PATH"] = os.path.join(tmpdir, "bench-cache.db")
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def measure(func, min_time: float, min_runs: int, max_runs: int = 100_000) -> dict:
+    """Time func() repeatedly; returns per-call stats in microseconds."""
+    func()                                      # warm-up (imports, lazy caches)
+    times   = []
+    started = time.perf_counter()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - t0) * 1e6)
+
+    times.sort()
+    median = statistics.median(times)
+    return {
+        "runs":        len(times),
+        "median_us":   round(median, 2),
+        "p95_us":      round(times[min(len(times) - 1, int(len(times) * 0.95))], 2),
+        "min_us":      round(times[0], 2),
+        "mean_us":     round(statistics.fmean(times), 2),
+        "ops_per_sec": round(1e6 / median, 1) if median else None,
+    }
+
+
+def run(selected: list, min_time: float, min_runs: int) -> dict:
+    from benchmarks.cases import CASES
+
+    results = {}
+    for name in selected:
+        func = CASES[name]()
+        results[name] = measure(func, min_time, min_runs)
+        print(f"  {name:<40} {results[name]['median_us']:>12,.1f} µs", file=sys.stderr)
+    return {"meta": _meta(), "results": results}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Rows of (name, baseline µs, current µs, change) with regressions flagged."""
+    rows = []
+    for name, stats in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            rows.append((name, None, stats["median_us"], None, "new"))
+            continue
+        change = (stats["median_us"] - base["median_us"]) / base["median_us"] if base["median_us"] else 0.0
+        flag   = "REGRESSION" if change > threshold else "faster" if change < -threshold else ""
+        rows.append((name, base["median_us"], stats["median_us"], change, flag))
+    return rows
+
+
+def _print_table(data: dict) -> None:
+    print(f"{'case':<40} {'median µs':>12} {'p95 µs':>12} {'ops/s':>12} {'runs':>7}")
+    for name, s in data["results"].items():
+        print(f"{name:<40} {s['median_us']:>12,.1f} {s['p95_us']:>12,.1f} {s['ops_per_sec'] or 0:>12,.1f} {s['runs']:>7}")
+
+
+def _print_comparison(rows: list) -> None:
+    print(f"{'case':<40} {'baseline µs':>12} {'current µs':>12} {'change':>9}")
+    for name, base, cur, change, flag in rows:
+        base_text   = f"{base:,.1f}" if base is not None else "—"
+        change_text = f"{change:+.1%}" if change is not None else "—"
+        print(f"{name:<40} {base_text:>12} {cur:>12,.1f} {change_text:>9}  {flag}")
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python":    platform.python_version(),
+        "platform":  platform.platform(),
+        "machine":   platform.machine(),
+        "commit":    commit,
+    }
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks for the Navisense backend.")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="only run cases containing this text")
+    parser.add_argument("--list", action="store_true", help="list case names and exit")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend per case (default 0.5)")
+    parser.add_argument("--min-runs", type=int, default=5, help="minimum timed calls per case (default 5)")
+    parser.add_argument("--output", help="write results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--save-baseline", help="write results as a baseline JSON file")
+    parser.add_argument("--baseline", help="compare against this baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown counted as a regression (default 0.15)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any case regressed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    with tempfile.TemporaryDirectory(prefix="navisense-bench-") as tmpdir:
+        _isolate_environment(tmpdir)
+        from benchmarks.cases import CASES
+
+        names = [n for n in CASES if not args.filter or any(f in n for f in args.filter)]
+        if args.list:
+            print("\n".join(names))
+            return 0
+
+        data = run(names, args.min_time, args.min_runs)
+
+        from utils.cache import get_backend
+        get_backend().close()
+
+    for path in (args.output, args.save_baseline):
+        if path == "-":
+            json.dump(data, sys.stdout, indent=2)
+            print()
+        elif path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+
+    if not args.baseline:
+        if args.output != "-":
+            _print_table(data)
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(data, baseline, args.threshold)
+    _print_comparison(rows)
+    regressed = [r[0] for r in rows if r[4] == "REGRESSION"]
+    if regressed:
+        print(f"\n{len(regressed)} regression(s) over {args.threshold:.0%}: {', '.join(regressed)}")
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
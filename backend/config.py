@@ -13,6 +13,119 @@ except ImportError:
 GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
 GEMINI_MODEL:   str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 
+# ── /generate-plan pipeline deadlines ────────────────────────────────────────
+# Total wall-clock budget (seconds) for one plan, split across the stages.
+# Scraping and weather run concurrently, each capped at its share of the total;
+# Gemini gets whatever remains once both have finished or been abandoned.
+PLAN_DEADLINE:         float = float(os.getenv("PLAN_DEADLINE", "45"))
+SCRAPE_DEADLINE_SHARE: float = float(os.getenv("SCRAPE_DEADLINE_SHARE", "0.2"))
+WEATHER_DEADLINE_SHARE: float = float(os.getenv("WEATHER_DEADLINE_SHARE", "0.2"))
+
+# ── Destination scraping ─────────────────────────────────────────────────────
+# All sources are fetched in parallel under one overall deadline (seconds).
+# With hedging on, a source still pending after its recent latency percentile
+# gets a second, identical request; whichever answers first wins.
+SCRAPE_DEADLINE:         float = float(os.getenv("SCRAPE_DEADLINE", "4"))
+SCRAPE_HEDGE:            bool  = os.getenv("SCRAPE_HEDGE", "true").lower() == "true"
+SCRAPE_HEDGE_PERCENTILE: float = float(os.getenv("SCRAPE_HEDGE_PERCENTILE", "0.9"))
+
+# "api" reads Wikipedia/Wikivoyage through the MediaWiki parse API: the section
+# index (redirects resolved) first, then only the lead and the travel sections.
+# "html" downloads the whole article page, which is also the fallback when
+# the API fails.
+WIKI_FETCH_MODE: str = os.getenv("WIKI_FETCH_MODE", "api").lower()
+
+# ── Geocoding ────────────────────────────────────────────────────────────────
+# Resolve well-known destinations from the bundled offline gazetteer
+# (resources/gazetteer.tsv) before trying the cache or the geocoding API.
+GAZETTEER_ENABLED: bool = os.getenv("GAZETTEER_ENABLED", "true").lower() == "true"
+
+# ── Shared outbound HTTP client ──────────────────────────────────────────────
+# Keep-alive pool per upstream host. With HTTP_POOL_BLOCK on, a request waits
+# for a free connection instead of opening an extra, unpooled one.
+# HTTP_HTTP2 switches to httpx with HTTP/2 (requires httpx[http2]).
+HTTP_POOL_HOSTS:   int  = int(os.getenv("HTTP_POOL_HOSTS", "16"))
+HTTP_POOL_MAXSIZE: int  = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+HTTP_POOL_BLOCK:   bool = os.getenv("HTTP_POOL_BLOCK", "true").lower() == "true"
+HTTP_HTTP2:        bool = os.getenv("HTTP_HTTP2", "false").lower() == "true"
+
+# ── Upstream endpoints ───────────────────────────────────────────────────────
+# Base URLs of every external service, overridable so the backend can be
+# pointed at local stand-ins (see loadtest/). GEMINI_API_ENDPOINT, when set,
+# switches the Gemini client to its REST transport against that host.
+WIKIPEDIA_BASE_URL:        str = os.getenv("WIKIPEDIA_BASE_URL", "https://en.wikipedia.org").rstrip("/")
+WIKIVOYAGE_BASE_URL:       str = os.getenv("WIKIVOYAGE_BASE_URL", "https://en.wikivoyage.org").rstrip("/")
+INCREDIBLE_INDIA_BASE_URL: str = os.getenv("INCREDIBLE_INDIA_BASE_URL", "https://www.incredibleindia.gov.in").rstrip("/")
+OPEN_METEO_GEOCODING_URL:  str = os.getenv("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com").rstrip("/")
+OPEN_METEO_FORECAST_URL:   str = os.getenv("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com").rstrip("/")
+GEMINI_API_ENDPOINT:       str = os.getenv("GEMINI_API_ENDPOINT", "").rstrip("/")
+
+# ── Persistent cache store ───────────────────────────────────────────────────
+# "sqlite" (single WAL-mode file shared by all workers) or "file" (one JSON
+# file per key). CACHE_MAX_BYTES caps the SQLite store; entries closest to
+# expiry are evicted first.
+CACHE_BACKEND:   str = os.getenv("CACHE_BACKEND", "sqlite").lower()
+CACHE_DB_PATH:   str = os.getenv("CACHE_DB_PATH", "")       # default: backend/data/cache.db
+CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# ── In-memory cache tier (in front of the file cache) ────────────────────────
+# Bounded by entry count and approximate serialized bytes. Entries are fresh
+# for CACHE_MEMORY_TTL seconds, then served stale for up to CACHE_MEMORY_SWR
+# seconds more while a background refresh re-reads them from disk.
+CACHE_MEMORY_MAX_ENTRIES: int = int(os.getenv("CACHE_MEMORY_MAX_ENTRIES", "512"))
+CACHE_MEMORY_MAX_BYTES:   int = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_MEMORY_TTL:         int = int(os.getenv("CACHE_MEMORY_TTL", "300"))
+CACHE_MEMORY_SWR:         int = int(os.getenv("CACHE_MEMORY_SWR", "600"))
+
+# ── LLM provider ─────────────────────────────────────────────────────────────
+# "gemini", or "local" — a deterministic offline stand-in (no API key needed)
+# that answers after LOCAL_LLM_LATENCY seconds, for load tests.
+# Calls are capped at LLM_MAX_CONCURRENCY in flight and LLM_RATE_PER_MINUTE
+# (size these to the API quota). LLM_TIMEOUT caps each model's deadline,
+# limiter wait included; within a plan request each model gets at most an
+# equal share of the remaining deadline across the models left to try.
+LLM_PROVIDER:        str   = os.getenv("LLM_PROVIDER", "gemini").lower()
+LLM_TIMEOUT:         float = float(os.getenv("LLM_TIMEOUT", "20"))
+LLM_MAX_CONCURRENCY: int   = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RATE_PER_MINUTE: float = float(os.getenv("LLM_RATE_PER_MINUTE", "60"))
+LOCAL_LLM_LATENCY:   float = float(os.getenv("LOCAL_LLM_LATENCY", "1.0"))
+
+# Models tried in order after GEMINI_MODEL errors or misses its deadline
+# (comma-separated, e.g. a faster/smaller model). With LLM_HEDGE_AFTER > 0, a
+# call still running after that many seconds gets an identical second
+# request to the same model; the first answer wins (costs an extra call).
+LLM_FALLBACK_MODELS: list  = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "gemini-1.5-flash-8b").split(",") if m.strip()]
+LLM_HEDGE_AFTER:     float = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# ── Prompt size ──────────────────────────────────────────────────────────────
+# Approximate token budget for the itinerary prompt. Lowest-ranked scraped
+# items (then summary sentences) are dropped until the prompt fits.
+PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))
+
+# Output schema Gemini is asked for: "compact" (positional arrays and category
+# codes, expanded server-side — far fewer output tokens) or "full".
+ITINERARY_WIRE_FORMAT: str = os.getenv("ITINERARY_WIRE_FORMAT", "compact").lower()
+
+# Where activity alternatives come from: "index" (nearest scraped items,
+# filled server-side — Gemini writes only the main activities) or "llm".
+ALTERNATIVES_SOURCE: str = os.getenv("ALTERNATIVES_SOURCE", "index").lower()
+
+# ── Plan cache reuse ─────────────────────────────────────────────────────────
+# With PLAN_NEAR_MATCH on, a request with no exact cached plan may reuse one
+# for the same trip with more nights (trimmed) or a start date in the same
+# season (served with fresh weather).
+PLAN_NEAR_MATCH: bool = os.getenv("PLAN_NEAR_MATCH", "true").lower() == "true"
+
+# ── Request tracing ──────────────────────────────────────────────────────────
+# Share of /generate-plan requests whose per-stage trace is logged as one JSON
+# line (logger "navisense.trace"); requests slower than TRACE_SLOW_SECONDS are
+# always logged (0 = only sampled ones). Server-Timing is sent on every response.
+TRACE_SAMPLE_RATE:  float = float(os.getenv("TRACE_SAMPLE_RATE", "0.05"))
+TRACE_SLOW_SECONDS: float = float(os.getenv("TRACE_SLOW_SECONDS", "20"))
+
+# Worker threads used to run the blocking service calls off the event loop
+PIPELINE_WORKERS: int = int(os.getenv("PIPELINE_WORKERS", "64"))
+
 if not GEMINI_API_KEY:
     import logging
     logging.getLogger(__name__).warning("GEMINI_API_KEY is not set.")
@@ -0,0 +1,366 @@
+"""
+run.py — End-to-end load test of /generate-plan against local upstream stubs.
+
+Run from the backend/ directory:
+    python -m loadtest.run loadtest/scenarios/hot_destination.json
+    python -m loadtest.run cold_cache --duration 20 --concurrency 4
+    python -m loadtest.run mixed --output results.json
+    python -m loadtest.run mixed --target http://127.0.0.1:8000   # existing server; upstreams not stubbed
+
+Unless --target is given, the run starts the stubs (loadtest/stubs.py),
+launches `uvicorn main:app` with every upstream base URL pointed at them and
+a fresh cache store, waits for it to come up, then drives closed-loop
+traffic from `concurrency` client threads for `duration_s` seconds.
+
+Traffic mixes cache hits and misses: with probability hit_ratio a client
+sends one of a small fixed set of "hot" requests (cached after their first
+run, or up front with warmup), otherwise a request no earlier one shares a
+fingerprint with. The report gives throughput, p50/p95/p99 latency overall
+and for hits and misses, error rate and status codes, plus what every stub
+served and the backend's own LLM and cache counters.
+
+Scenario file (JSON; every key optional):
+    {
+      "description": "…",
+      "backend":   {"workers": 1, "env": {"LLM_RATE_PER_MINUTE": "600"}},
+      "upstreams": {"gemini": {"latency_ms": 4000, "jitter_ms": 1000, "failure_rate": 0.05,
+                               "models": {"gemini-1.5-flash": {"failure_rate": 0.3}}}, …},
+      "traffic":   {"concurrency": 16, "duration_s": 30, "hit_ratio": 0.8, "stream_ratio": 0.2,
+                    "warmup": true, "think_time_ms": 0, "timeout_s": 60,
+                    "destinations": [{"to": "Jaipur", "weight": 3}, {"to": "Kochi"}],
+                    "request": {…TravelRequest defaults…}}
+    }
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date as date_cls, timedelta
+
+import requests
+
+from loadtest.stubs import StubCluster
+
+BACKEND_DIR   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIO_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+DEFAULT_REQUEST = {
+    "from": "Delhi", "nights": 3, "budget": "moderate", "purposes": ["culture", "food"],
+    "pace": "moderate", "checkpoints": [], "group_size": "couple",
+}
+PURPOSES = ["culture", "food", "adventure", "relaxation", "nature", "shopping", "nightlife"]
+
+
+# ──────────────────────────────────────────────
+# Scenario and request generation
+# ──────────────────────────────────────────────
+
+def load_scenario(name: str) -> dict:
+    path = name if os.path.exists(name) else os.path.join(SCENARIO_DIR, f"{name}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        scenario = json.load(f)
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+
+class RequestMix:
+    """Draws hot (repeatable, cacheable) and cold (never seen before) plan requests."""
+
+    def __init__(self, traffic: dict, seed: int = 0):
+        self.hit_ratio    = traffic.get("hit_ratio", 0.5)
+        self.stream_ratio = traffic.get("stream_ratio", 0.0)
+        self.template     = {**DEFAULT_REQUEST, **traffic.get("request", {})}
+        self.destinations = traffic.get("destinations") or [{"to": "Jaipur"}]
+        self.weights      = [d.get("weight", 1) for d in self.destinations]
+        self.start        = (date_cls.today() + timedelta(days=7)).isoformat()
+        self._rng         = random.Random(seed)
+        self._lock        = threading.Lock()
+        self._cold        = 0
+        self.hot          = [{**self.template, "to": d["to"], "start_date": self.start} for d in self.destinations]
+
+    def next(self) -> tuple:
+        """(request body, endpoint path)."""
+        with self._lock:
+            rng      = self._rng
+            endpoint = "/generate-plan/stream" if rng.random() < self.stream_ratio else "/generate-plan"
+            if rng.random() < self.hit_ratio:
+                return rng.choices(self.hot, self.weights)[0], endpoint
+            self._cold += 1
+            n = self._cold
+            dest = rng.choices(self.destinations, self.weights)[0]["to"]
+            body = {
+                **self.template,
+                "to":            dest,
+                "start_date":    (date_cls.today() + timedelta(days=rng.randint(3, 14))).isoformat(),
+                "nights":        rng.randint(2, 6),
+                "purposes":      rng.sample(PURPOSES, rng.randint(1, 3)),
+                "special_needs": f"load test request {n}",     # never shares a fingerprint
+            }
+            return body, endpoint
+
+
+# ──────────────────────────────────────────────
+# Backend process
+# ──────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(env: dict, workers: int, log_path: str) -> tuple:
+    """Launch uvicorn on a free port; returns (process, base URL)."""
+    port = _free_port()
+    log  = open(log_path, "w", encoding="utf-8")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"backend exited with code {proc.returncode}; see {log_path}")
+        try:
+            if requests.get(base + "/", timeout=1).ok:
+                return proc, base
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"backend did not come up within 30s; see {log_path}")
+
+
+def stop_backend(proc) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+# ──────────────────────────────────────────────
+# Traffic
+# ──────────────────────────────────────────────
+
+def send(session: requests.Session, base: str, body: dict, endpoint: str, timeout: float) -> dict:
+    """One plan request; returns its outcome record."""
+    started = time.perf_counter()
+    record  = {"endpoint": endpoint, "status": None, "cached": None, "error": None, "ttfb_s": None}
+    try:
+        if endpoint.endswith("/stream"):
+            with session.post(base + endpoint, json=body, timeout=timeout, stream=True) as resp:
+                record["status"] = resp.status_code
+                event, plan = None, None
+                for line in resp.iter_lines(decode_unicode=True):
+                    if record["ttfb_s"] is None:
+                        record["ttfb_s"] = time.perf_counter() - started
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif line.startswith("data: ") and event == "done":
+                        plan = json.loads(line[6:])
+                if plan is None:
+                    record["error"] = "stream ended without a plan"
+                else:
+                    _read_plan(record, plan)
+        else:
+            resp = session.post(base + endpoint, json=body, timeout=timeout)
+            record["status"] = resp.status_code
+            data = resp.json()
+            if resp.ok:
+                _read_plan(record, data)
+            else:
+                record["error"] = data.get("error") or f"HTTP {resp.status_code}"
+    except (requests.RequestException, ValueError) as e:
+        record["error"] = type(e).__name__
+    record["latency_s"] = time.perf_counter() - started
+    return record
+
+
+def _read_plan(record: dict, plan: dict) -> None:
+    """A 200 carrying the fallback itinerary (AI generation failed) counts as an error."""
+    if plan.get("error"):
+        record["error"] = f"fallback plan: {plan['error']}"
+    else:
+        record["cached"] = bool(plan.get("cached"))
+
+
+def drive(base: str, mix: RequestMix, concurrency: int, duration: float, timeout: float, think_time: float) -> tuple:
+    """Closed-loop load from `concurrency` threads; returns (records, elapsed seconds)."""
+    records = []
+    lock    = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            body, endpoint = mix.next()
+            record = send(session, base, body, endpoint, timeout)
+            with lock:
+                records.append(record)
+            if think_time:
+                time.sleep(think_time)
+        session.close()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, name=f"client-{i}", daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return records, time.monotonic() - started
+
+
+# ──────────────────────────────────────────────
+# Report
+# ──────────────────────────────────────────────
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 1)
+    return {"count": len(values), "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+            "mean_ms": round(statistics.fmean(values) * 1000, 1), "max_ms": round(values[-1] * 1000, 1)}
+
+
+def summarize(records: list, elapsed: float) -> dict:
+    ok      = [r for r in records if not r["error"]]
+    errors  = [r for r in records if r["error"]]
+    status  = {}
+    for r in records:
+        key = str(r["status"]) if r["status"] is not None else r["error"]
+        status[key] = status.get(key, 0) + 1
+    streamed = [r["ttfb_s"] for r in ok if r["ttfb_s"] is not None]
+    return {
+        "requests":       len(records),
+        "elapsed_s":      round(elapsed, 2),
+        "throughput_rps": round(len(records) / elapsed, 2) if elapsed else 0.0,
+        "error_rate":     round(len(errors) / len(records), 4) if records else 0.0,
+        "latency":        _percentiles([r["latency_s"] for r in ok]),
+        "latency_hit":    _percentiles([r["latency_s"] for r in ok if r["cached"]]),
+        "latency_miss":   _percentiles([r["latency_s"] for r in ok if r["cached"] is False]),
+        "stream_ttfb":    _percentiles(streamed),
+        "status":         status,
+        "errors":         sorted({str(r["error"])[:120] for r in errors})[:10],
+    }
+
+
+def _print_report(report: dict) -> None:
+    s = report["summary"]
+    print(f"\nScenario {report['scenario']}: {s['requests']} requests in {s['elapsed_s']}s "
+          f"→ {s['throughput_rps']} req/s, error rate {s['error_rate']:.2%}")
+    print(f"{'':<14} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for label, key in (("all", "latency"), ("cache hits", "latency_hit"),
+                       ("cache misses", "latency_miss"), ("stream TTFB", "stream_ttfb")):
+        p = s[key]
+        if p["count"]:
+            print(f"{label:<14} {p['count']:>7} {p['p50_ms']:>10,.1f} {p['p95_ms']:>10,.1f} "
+                  f"{p['p99_ms']:>10,.1f} {p['max_ms']:>10,.1f}")
+    print(f"status: {s['status']}")
+    for error in s["errors"]:
+        print(f"  error: {error}")
+    if report.get("upstreams"):
+        print("upstream stubs: " + ", ".join(
+            f"{name} {u['requests']} ({u['failures']} failed, {u['not_modified']} 304)"
+            for name, u in report["upstreams"].items()))
+    if report.get("backend", {}).get("llm"):
+        print(f"backend llm limiter: {report['backend']['llm']}")
+
+
+def _backend_stats(session: requests.Session, base: str) -> dict:
+    stats = {}
+    for name in ("llm", "cache", "http"):
+        try:
+            stats[name] = session.get(f"{base}/stats/{name}", timeout=5).json()
+        except (requests.RequestException, ValueError):
+            stats[name] = None
+    return stats
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test /generate-plan against local upstream stubs.")
+    parser.add_argument("scenario", help="scenario JSON path, or a name from loadtest/scenarios/")
+    parser.add_argument("--target", help="drive an already-running backend at this URL instead")
+    parser.add_argument("--concurrency", type=int, help="override traffic.concurrency")
+    parser.add_argument("--duration", type=float, help="override traffic.duration_s")
+    parser.add_argument("--workers", type=int, help="override backend.workers")
+    parser.add_argument("--seed", type=int, default=0, help="request mix random seed")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s — %(message)s")
+    scenario = load_scenario(args.scenario)
+    traffic  = scenario.get("traffic", {})
+    backend  = scenario.get("backend", {})
+    concurrency = args.concurrency or traffic.get("concurrency", 8)
+    duration    = args.duration or traffic.get("duration_s", 30)
+    workers     = args.workers or backend.get("workers", 1)
+    timeout     = traffic.get("timeout_s", 60)
+    mix         = RequestMix(traffic, args.seed)
+
+    tmpdir  = tempfile.mkdtemp(prefix="navisense-load-")
+    cluster = proc = None
+    try:
+        if args.target:
+            base = args.target.rstrip("/")
+        else:
+            os.environ.setdefault("GEMINI_API_KEY", "loadtest")   # the Gemini stub imports backend config
+            cluster = StubCluster(scenario.get("upstreams", {})).start()
+            env = {
+                "LLM_PROVIDER":   "gemini",
+                "CACHE_BACKEND":  "sqlite",
+                "CACHE_DB_PATH":  os.path.join(tmpdir, "cache.db"),
+                **cluster.base_urls(),
+                **{k: str(v) for k, v in backend.get("env", {}).items()},
+            }
+            log_path = os.path.join(tmpdir, "backend.log")
+            proc, base = start_backend(env, workers, log_path)
+            print(f"backend {base} ({workers} worker(s)), log: {log_path}", file=sys.stderr)
+
+        session = requests.Session()
+        if traffic.get("warmup"):
+            print(f"warming {len(mix.hot)} hot request(s)…", file=sys.stderr)
+            for body in mix.hot:
+                send(session, base, body, "/generate-plan", timeout)
+
+        print(f"driving {concurrency} clients for {duration:g}s…", file=sys.stderr)
+        records, elapsed = drive(base, mix, concurrency, duration, timeout,
+                                 traffic.get("think_time_ms", 0) / 1000)
+
+        report = {
+            "scenario":  scenario["name"],
+            "settings":  {"concurrency": concurrency, "duration_s": duration, "workers": workers,
+                          "hit_ratio": mix.hit_ratio, "stream_ratio": mix.stream_ratio,
+                          "target": args.target or "local stubs"},
+            "summary":   summarize(records, elapsed),
+            "upstreams": cluster.stats() if cluster else None,
+            "backend":   _backend_stats(session, base),
+        }
+    finally:
+        if proc:
+            stop_backend(proc)
+        if cluster:
+            cluster.stop()
+
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
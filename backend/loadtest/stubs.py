@@ -0,0 +1,405 @@
+"""
+stubs.py — Local stand-ins for every upstream the backend calls.
+
+Each upstream runs as its own threaded HTTP server on 127.0.0.1 with
+configurable latency, jitter and failure rate, and speaks just enough of the
+real API for the backend's clients:
+
+  - wikipedia / wikivoyage / incredible_india — article pages built from the
+    benchmark fixtures (the destination name substituted in), with ETags so
+    conditional revalidation returns 304; wikipedia / wikivoyage also answer
+    MediaWiki action=parse calls (section index, single sections, redirects
+    from a differently-cased title) cut from the same pages
+  - geocoding — Open-Meteo /v1/search, deterministic coordinates per name
+  - forecast  — Open-Meteo /v1/forecast, one synthetic day per requested date
+  - gemini    — generateContent / streamGenerateContent over REST, answered
+    by the deterministic LocalProvider; per-model overrides let a scenario
+    make the primary model slow or flaky to exercise the fallback chain
+
+Run standalone to poke at them by hand:
+    python -m loadtest.stubs --scenario loadtest/scenarios/mixed.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date as date_cls, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+logger = logging.getLogger(__name__)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+# Fixture used per source when there is none for the destination itself
+DEFAULT_FIXTURE = {
+    "wikipedia":        ("wikipedia", "Jaipur"),
+    "wikivoyage":       ("wikivoyage", "Jaipur"),
+    "incredible_india": ("incredible_india", "Jaipur"),
+}
+
+# Backend setting that points at each upstream
+BASE_URL_SETTINGS = {
+    "wikipedia":        "WIKIPEDIA_BASE_URL",
+    "wikivoyage":       "WIKIVOYAGE_BASE_URL",
+    "incredible_india": "INCREDIBLE_INDIA_BASE_URL",
+    "geocoding":        "OPEN_METEO_GEOCODING_URL",
+    "forecast":         "OPEN_METEO_FORECAST_URL",
+    "gemini":           "GEMINI_API_ENDPOINT",
+}
+
+DEFAULT_LATENCY_MS = {
+    "wikipedia": 250, "wikivoyage": 300, "incredible_india": 600,
+    "geocoding": 120, "forecast": 180, "gemini": 4000,
+}
+
+
+class Upstream:
+    """One stubbed service: its behaviour settings and request counters."""
+
+    def __init__(self, name: str, latency_ms: float = None, jitter_ms: float = 0,
+                 failure_rate: float = 0.0, models: dict = None):
+        self.name         = name
+        self.latency_ms   = DEFAULT_LATENCY_MS[name] if latency_ms is None else latency_ms
+        self.jitter_ms    = jitter_ms
+        self.failure_rate = failure_rate
+        self.models       = models or {}       # gemini only: per-model overrides
+        self._lock        = threading.Lock()
+        self._stats       = {"requests": 0, "failures": 0, "not_modified": 0, "api": 0}
+
+    def settings(self, model: str = None) -> tuple:
+        """(latency seconds, failure rate), with any per-model override applied."""
+        override = self.models.get(model, {}) if model else {}
+        latency  = override.get("latency_ms", self.latency_ms)
+        jitter   = override.get("jitter_ms", self.jitter_ms)
+        failure  = override.get("failure_rate", self.failure_rate)
+        return max(0.0, random.uniform(latency - jitter, latency + jitter)) / 1000, failure
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+# ──────────────────────────────────────────────
+# Responses
+# ──────────────────────────────────────────────
+
+_fixture_cache = {}
+
+
+def _fixture_page(source: str, destination: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", destination.lower()).strip("_")
+    path = os.path.join(FIXTURES, f"{source}_{slug}.html")
+    if os.path.exists(path):
+        key, name = path, None
+    else:
+        prefix, name = DEFAULT_FIXTURE[source]
+        key = os.path.join(FIXTURES, f"{prefix}_{name.lower()}.html")
+    if key not in _fixture_cache:
+        with open(key, "r", encoding="utf-8") as f:
+            _fixture_cache[key] = f.read()
+    html = _fixture_cache[key]
+    return html.replace(name, destination) if name else html
+
+
+_HEADING = re.compile(r'(?:<div class="mw-heading[^"]*">)?<h([23])\b[^>]*>(.*?)</h\1>', re.S)
+
+
+def _fixture_sections(source: str, destination: str) -> tuple:
+    """(lead html, [(level, title, html)]) — the fixture page split at its h2/h3 headings."""
+    html  = _fixture_page(source, destination)
+    start = html.index(">", html.index("mw-parser-output")) + 1
+    body  = html[start:html.index("</div></div>", start)] if "</div></div>" in html[start:] else html[start:]
+    found = list(_HEADING.finditer(body))
+    lead  = body[:found[0].start()] if found else body
+    parts = []
+    for i, match in enumerate(found):
+        end   = found[i + 1].start() if i + 1 < len(found) else len(body)
+        title = re.sub(r'<span class="mw-editsection">.*', "", match.group(2), flags=re.S)
+        parts.append((int(match.group(1)), re.sub(r"<[^>]+>", "", title).strip(), body[match.start():end]))
+    return lead, parts
+
+
+def _parse_api(source: str, query: dict) -> dict:
+    """A minimal action=parse answer: prop=sections, or prop=text for one section."""
+    requested   = query["page"][0].replace("_", " ")
+    destination = requested[:1].upper() + requested[1:]
+    lead, parts = _fixture_sections(source, destination)
+    result      = {"title": destination, "pageid": int(hashlib.sha1(destination.encode()).hexdigest()[:6], 16)}
+    if requested != destination and query.get("redirects"):
+        result["redirects"] = [{"from": requested, "to": destination}]
+
+    if "text" in query.get("prop", [""])[0].split("|"):
+        number = int(query.get("section", ["0"])[0])
+        if number == 0:
+            html = lead
+        else:
+            level, _, html = parts[number - 1]
+            for sub_level, _, sub_html in parts[number:]:
+                if sub_level <= level:
+                    break
+                html += sub_html
+        result["text"] = f'<div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">{html}</div>'
+        return {"parse": result}
+
+    sections, counters = [], [0, 0]
+    for i, (level, title, _) in enumerate(parts, 1):
+        if level == 2:
+            counters = [counters[0] + 1, 0]
+        else:
+            counters[1] += 1
+        number = f"{counters[0]}" if level == 2 else f"{counters[0]}.{counters[1]}"
+        sections.append({"toclevel": level - 1, "level": str(level), "line": title, "number": number,
+                         "index": str(i), "anchor": title.replace(" ", "_")})
+    result["sections"] = sections
+    return {"parse": result}
+
+
+def _coordinates(name: str) -> tuple:
+    digest = hashlib.sha1(name.strip().lower().encode("utf-8")).digest()
+    return round(8 + digest[0] / 255 * 25, 4), round(68 + digest[1] / 255 * 25, 4)
+
+
+def _forecast(query: dict) -> dict:
+    start = date_cls.fromisoformat(query["start_date"][0])
+    end   = date_cls.fromisoformat(query.get("end_date", query["start_date"])[0])
+    days  = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    rng   = random.Random(f"{query.get('latitude')}/{query.get('longitude')}/{start}")
+    return {
+        "latitude":  float(query.get("latitude", ["0"])[0]),
+        "longitude": float(query.get("longitude", ["0"])[0]),
+        "daily": {
+            "time":               [d.isoformat() for d in days],
+            "temperature_2m_max": [round(rng.uniform(22, 36), 1) for _ in days],
+            "temperature_2m_min": [round(rng.uniform(10, 22), 1) for _ in days],
+            "precipitation_sum":  [round(max(0.0, rng.gauss(1, 3)), 1) for _ in days],
+            "weathercode":        [rng.choice((0, 1, 2, 3, 61, 80)) for _ in days],
+        },
+    }
+
+
+def _gemini_chunk(text: str, final: bool, prompt_tokens: int = 0) -> dict:
+    chunk = {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}]}
+    if final:
+        chunk["candidates"][0]["finishReason"] = "STOP"
+        chunk["usageMetadata"] = {"promptTokenCount": prompt_tokens,
+                                  "candidatesTokenCount": len(text) // 4,
+                                  "totalTokenCount": prompt_tokens + len(text) // 4}
+    return chunk
+
+
+# ──────────────────────────────────────────────
+# HTTP handler
+# ──────────────────────────────────────────────
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def upstream(self) -> Upstream:
+        return self.server.upstream
+
+    def log_message(self, fmt, *args):
+        logger.debug(f"{self.upstream.name}: " + fmt % args)
+
+    def do_GET(self):
+        self._serve()
+
+    def do_POST(self):
+        self._serve()
+
+    def _serve(self):
+        parts  = urlsplit(self.path)
+        query  = parse_qs(parts.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        body   = self.rfile.read(length) if length else b""
+        model  = None
+        if self.upstream.name == "gemini":
+            found = re.search(r"/models/([^/:]+):", parts.path)
+            model = found.group(1) if found else None
+
+        self.upstream.count("requests")
+        latency, failure_rate = self.upstream.settings(model)
+        if random.random() < failure_rate:
+            time.sleep(latency * random.random())
+            self.upstream.count("failures")
+            return self._send(503, "application/json", json.dumps(
+                {"error": {"code": 503, "message": "stub: injected failure", "status": "UNAVAILABLE"}}))
+
+        try:
+            handler = getattr(self, f"_{self.upstream.name}")
+            handler(parts.path, query, body, latency)
+        except (KeyError, ValueError) as e:
+            self._send(400, "application/json", json.dumps({"error": {"code": 400, "message": str(e)}}))
+
+    # ── Pages ────────────────────────────────────────────────────────────────
+
+    def _page(self, source: str, destination: str, latency: float):
+        html = _fixture_page(source, destination)
+        etag = '"' + hashlib.sha1(html.encode("utf-8")).hexdigest()[:16] + '"'
+        time.sleep(latency)
+        if self.headers.get("If-None-Match") == etag:
+            self.upstream.count("not_modified")
+            return self._send(304, None, b"", {"ETag": etag})
+        self._send(200, "text/html; charset=utf-8", html, {"ETag": etag})
+
+    def _api(self, source: str, query: dict, latency: float):
+        if query.get("action") != ["parse"]:
+            raise ValueError("stub: only action=parse is implemented")
+        data = _parse_api(source, query)
+        time.sleep(latency)
+        self.upstream.count("api")
+        self._send(200, "application/json; charset=utf-8", json.dumps(data))
+
+    def _wikipedia(self, path, query, body, latency):
+        if path.endswith("/api.php"):
+            return self._api("wikipedia", query, latency)
+        self._page("wikipedia", unquote(path.rsplit("/", 1)[-1]).replace("_", " "), latency)
+
+    def _wikivoyage(self, path, query, body, latency):
+        if path.endswith("/api.php"):
+            return self._api("wikivoyage", query, latency)
+        self._page("wikivoyage", unquote(path.rsplit("/", 1)[-1]).replace("_", " "), latency)
+
+    def _incredible_india(self, path, query, body, latency):
+        slug = path.rsplit("/", 1)[-1].removesuffix(".html")
+        self._page("incredible_india", slug.replace("-", " ").title(), latency)
+
+    # ── Open-Meteo ───────────────────────────────────────────────────────────
+
+    def _geocoding(self, path, query, body, latency):
+        name     = query["name"][0]
+        lat, lon = _coordinates(name)
+        time.sleep(latency)
+        self._send(200, "application/json", json.dumps(
+            {"results": [{"name": name, "latitude": lat, "longitude": lon, "country": "India"}]}))
+
+    def _forecast(self, path, query, body, latency):
+        data = _forecast(query)
+        time.sleep(latency)
+        self._send(200, "application/json", json.dumps(data))
+
+    # ── Gemini ───────────────────────────────────────────────────────────────
+
+    def _gemini(self, path, query, body, latency):
+        from services.llm_provider import LocalProvider
+
+        request = json.loads(body or b"{}")
+        prompt  = "".join(p.get("text", "") for c in request.get("contents", []) for p in c.get("parts", []))
+        text    = LocalProvider(latency=0).respond(prompt)
+        tokens  = len(prompt) // 4
+
+        if ":streamGenerateContent" not in path:
+            time.sleep(latency)
+            return self._send(200, "application/json", json.dumps(_gemini_chunk(text, True, tokens)))
+
+        # REST streaming: one JSON array, its elements sent as they are "generated"
+        pieces = [text[i:i + 200] for i in range(0, len(text), 200)] or [""]
+        delay  = latency / len(pieces)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, piece in enumerate(pieces):
+            time.sleep(delay)
+            chunk = ("[" if i == 0 else ",") + json.dumps(_gemini_chunk(piece, i == len(pieces) - 1, tokens))
+            self._write_chunk(chunk.encode("utf-8"))
+        self._write_chunk(b"]")
+        self._write_chunk(b"")
+
+    # ── Plumbing ─────────────────────────────────────────────────────────────
+
+    def _send(self, status: int, content_type: str, body, headers: dict = None):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads      = True
+    request_queue_size  = 256
+
+    def __init__(self, upstream: Upstream, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.upstream = upstream
+
+    def handle_error(self, request, client_address):
+        # Clients hang up on slow responses (deadlines, hedging) — expected here
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubCluster:
+    """All upstream stubs for one scenario, each on its own port."""
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        self.upstreams = {name: Upstream(name, **config.get(name, {})) for name in BASE_URL_SETTINGS}
+        self._servers  = {}
+
+    def start(self) -> "StubCluster":
+        for name, upstream in self.upstreams.items():
+            server = _Server(upstream)
+            threading.Thread(target=server.serve_forever, name=f"stub-{name}", daemon=True).start()
+            self._servers[name] = server
+        return self
+
+    def stop(self) -> None:
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def base_urls(self) -> dict:
+        """Backend environment variables pointing every upstream at its stub."""
+        return {BASE_URL_SETTINGS[name]: f"http://127.0.0.1:{server.server_address[1]}"
+                for name, server in self._servers.items()}
+
+    def stats(self) -> dict:
+        return {name: upstream.stats() for name, upstream in self.upstreams.items()}
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the upstream stubs until interrupted.")
+    parser.add_argument("--scenario", help="scenario JSON whose 'upstreams' settings to use")
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.scenario:
+        with open(args.scenario, "r", encoding="utf-8") as f:
+            config = json.load(f).get("upstreams", {})
+
+    cluster = StubCluster(config).start()
+    for key, url in cluster.base_urls().items():
+        print(f"{key}={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        cluster.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
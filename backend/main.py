@@ -5,23 +5,52 @@ Run from the backend/ directory:
     uvicorn main:app --reload
 """
 
+import copy
+import json
 import logging
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 
-from models.request_models import TravelRequest
+from config import PLAN_DEADLINE
+from models.request_models import TravelRequest, RegenerateRequest, PlanPatch
+from services.gemini_service import regenerate_slot
+from services.llm_provider import limiter_stats
 from services.logic_service import build_context
-from services.scraper import get_destination_data
-from services.gemini_service import generate_itinerary
-from services.weather_service import get_weather
-from utils.cache import get_cached, set_cached
-from utils.helpers import build_cache_key
+from services.plan_cache import plan_cache_key, get_cached_plan, cache_plan
+from services.plan_service import save_plan, shared_plan, get_plan, update_plan, apply_operations, PlanConflict
+from services.pipeline import run_plan_pipeline, stream_plan_pipeline, fetch_inputs, fetch_weather, run_stage
+from utils import http_client
+from utils.cache import cache_stats, purge_expired
+from utils.metrics import REGISTRY, CONTENT_TYPE, PLAN_CACHE, MetricsMiddleware
+from utils.singleflight import AsyncSingleFlight
+from utils import tracing
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s — %(message)s")
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Navisense API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: open the shared outbound HTTP pool before the first request and
+    drop cache entries that expired while the server was down.
+    Shutdown: close pooled upstream connections.
+    """
+    http_client.startup()
+    purge_expired()
+    try:
+        yield
+    finally:
+        http_client.shutdown()
+
+
+app = FastAPI(title="Navisense API", version="1.0.0", lifespan=lifespan)
+
+# Identical cache-miss requests that arrive together share one generation
+_plan_flights = AsyncSingleFlight("generate-plan")
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +62,9 @@ app.add_middleware(
     allow_origin_regex=r"https://.*\.vercel\.app", # Production frontend
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/", tags=["Health"])
@@ -42,46 +73,326 @@ def health():
     return {"status": "ok", "service": "Navisense API"}
 
 
+@app.get("/stats/http", tags=["Health"])
+def http_stats():
+    """Outbound connection pool stats (reuse rate, waits) per upstream host."""
+    return http_client.pool_stats()
+
+
+@app.get("/stats/cache", tags=["Health"])
+def cache_tier_stats():
+    """Hit/miss/eviction counters for the memory and persistent cache tiers."""
+    return cache_stats()
+
+
+@app.get("/stats/llm", tags=["Health"])
+def llm_stats():
+    """LLM call limiter: calls, in flight, average queueing time, rejections."""
+    return limiter_stats()
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    """Prometheus metrics: stage latency histograms, cache and failure counters, in-flight gauges."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.post("/generate-plan", tags=["Itinerary"])
-def generate_plan(request: TravelRequest):
+async def generate_plan(request: TravelRequest, http_request: Request, response: Response,
+                        debug: Optional[str] = None):
     """
     Generate a personalized travel itinerary.
 
     Flow:
-    1. Build travel context (season, budget, duration)
-    2. Check cache — return if hit
-    3. Scrape destination data from Wikipedia
-    4. Generate itinerary via Gemini API
-    5. Cache result and return
+    1. Check cache — return if hit (exact or near match, see plan_cache),
+       or join an identical in-flight request
+    2. Scrape destination data and fetch weather concurrently
+    3. Build travel context and generate itinerary via Gemini API
+    4. Cache result and return
+
+    Each stage runs under its share of PLAN_DEADLINE; a stage that overruns
+    is dropped so the plan still comes back in bounded time.
+
+    Every successful plan comes with a plan_id (see /plans/{plan_id}); hits
+    on the same cache key share one stored plan until it is edited.
+
+    Per-stage timings come back in the Server-Timing header, and in a
+    "timing" field with ?debug=timing.
     """
-    destination = request.to.strip()
-    cache_key   = build_cache_key(destination, request.budget, str(request.nights))
+    trace        = tracing.start("generate-plan", http_request.headers.get("X-Request-ID"))
+    request_data = request.dict(by_alias=False)
+    cache_key    = plan_cache_key(request_data)
+    trace.set(destination=request.to.strip(), cache_key=cache_key)
 
-    cached = get_cached(cache_key)
+    cached, reused = get_cached_plan(request_data)
+    _count_lookup(cached, reused)
     if cached:
-        logger.info(f"Cache hit: {cache_key}")
-        return {**cached, "cached": True}
+        weather = await _reused_weather(request, reused)
+        return _traced({**cached, "cached": True, **_reuse_info(reused), "weather": weather,
+                        **_store_plan(cached, request, weather, cache_key)}, trace, response, debug)
+
+    itinerary, weather = await _plan_flights.do(cache_key, _generate_and_cache, request_data)
+    return _traced({**itinerary, "cached": False, "weather": weather,
+                    **_store_plan(itinerary, request, weather, cache_key)}, trace, response, debug)
+
+
+async def _generate_and_cache(request_data: dict) -> tuple:
+    """Run the pipeline for a cache miss and store the result."""
+    itinerary, weather = await run_plan_pipeline(request_data)
+
+    if _cacheable(itinerary):
+        cache_plan(request_data, itinerary)
+
+    return itinerary, weather
+
+
+@app.post("/generate-plan/stream", tags=["Itinerary"])
+async def generate_plan_stream(request: TravelRequest, http_request: Request, debug: Optional[str] = None):
+    """
+    Generate an itinerary and stream it as Server-Sent Events.
+
+    Events, in order:
+      meta  — weather and budget context (sent before generation starts)
+      day   — one itinerary day, as soon as Gemini has completed it
+      done  — the full itinerary, same shape as /generate-plan
+
+    A cache hit sends meta, every day and done straight away.
+
+    Headers go out before any stage has run, so there is no Server-Timing
+    here; with ?debug=timing the done event carries a "timing" field.
+    """
+    trace = tracing.start("generate-plan/stream", http_request.headers.get("X-Request-ID"))
+    return StreamingResponse(
+        _plan_events(request, trace, debug),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Request-ID": trace.request_id},
+    )
+
+
+async def _plan_events(request: TravelRequest, trace: tracing.Trace, debug: Optional[str]):
+    """The SSE body; a failure part-way still finishes the trace (as a 500) before it propagates."""
+    try:
+        async for event in _plan_event_stream(request, trace, debug):
+            yield event
+    except Exception as e:
+        trace.set(error=type(e).__name__)
+        tracing.finish(trace, status=500)
+        raise
+
+
+async def _plan_event_stream(request: TravelRequest, trace: tracing.Trace, debug: Optional[str]):
+    request_data   = request.dict(by_alias=False)
+    cache_key      = plan_cache_key(request_data)
+    trace.set(destination=request.to.strip(), cache_key=cache_key)
+    cached, reused = get_cached_plan(request_data)
+    _count_lookup(cached, reused)
+    if cached:
+        weather = await _reused_weather(request, reused)
+        yield _sse("meta", {"destination": cached.get("destination"), "cached": True,
+                            **_reuse_info(reused), "weather": weather})
+        for day in cached.get("days", []):
+            yield _sse("day", day)
+        yield _sse("done", _traced({**cached, "cached": True, **_reuse_info(reused), "weather": weather,
+                                    **_store_plan(cached, request, weather, cache_key)}, trace, None, debug))
+        return
+
+    weather = {}
+    async for event, payload in stream_plan_pipeline(request_data):
+        if event == "meta":
+            weather = payload["weather"]
+            yield _sse("meta", {**payload, "cached": False})
+        elif event == "day":
+            yield _sse("day", payload)
+        elif event == "itinerary":
+            if _cacheable(payload):
+                cache_plan(request_data, payload)
+            yield _sse("done", _traced({**payload, "cached": False, "weather": weather,
+                                        **_store_plan(payload, request, weather, cache_key)}, trace, None, debug))
+
+
+@app.post("/generate-plan/regenerate", tags=["Itinerary"])
+async def regenerate_plan_slot(request: RegenerateRequest):
+    """
+    Regenerate one day, or one activity, of a plan.
+
+    The plan is the stored one named by plan_id, or else whatever
+    /generate-plan would serve for this request from the plan cache (exact
+    or near match). Gemini is asked for just the target slice (with the
+    neighbouring days as context), the result is spliced in and saved under
+    the same plan_id — a new one for cache lookups or a shared plan (see
+    plan_service.shared_plan) — which is returned.
+    Returns 409 if the stored plan is edited while the slice is generated.
+    """
+    destination  = request.to.strip()
+    request_data = request.dict(by_alias=False, exclude={"plan_id"})
+    record       = get_plan(request.plan_id) if request.plan_id else None
+    if request.plan_id and not record:
+        return JSONResponse(status_code=404, content={"error": "Plan not found or expired."})
+    cached = record["itinerary"] if record else get_cached_plan(request_data)[0]
+    if not cached:
+        return JSONResponse(status_code=404, content={"error": "No plan for this request. Generate it first."})
+
+    days = cached.get("days", [])
+    if request.day > len(days):
+        return JSONResponse(status_code=422, content={"error": f"Plan has {len(days)} days."})
+    activities = days[request.day - 1].get("activities", [])
+    if request.activity_index is not None and request.activity_index >= len(activities):
+        return JSONResponse(status_code=422, content={"error": f"Day {request.day} has {len(activities)} activities."})
+
+    context      = build_context(request_data)
+    destination_data, weather = await fetch_inputs(destination, request.start_date, request.nights)
+
+    replacement = await run_stage(
+        "Gemini (slot)", PLAN_DEADLINE, None,
+        regenerate_slot, context, destination_data, request_data, cached,
+        request.day, request.activity_index, request.constraint, weather, PLAN_DEADLINE,
+    )
+    if replacement is None:
+        return JSONResponse(status_code=502, content={"error": "Could not regenerate this part of the plan. Please try again."})
+
+    itinerary = copy.deepcopy(cached)
+    if request.activity_index is None:
+        itinerary["days"][request.day - 1] = replacement
+    else:
+        itinerary["days"][request.day - 1]["activities"][request.activity_index] = replacement
+
+    if record is None:
+        if _cacheable(itinerary):
+            cache_plan(request_data, itinerary)
+        return {**itinerary, "cached": False, "weather": weather,
+                **_store_plan(itinerary, TravelRequest(**request_data), weather, plan_cache_key(request_data))}
+    try:
+        record = update_plan(record, itinerary, weather)
+    except PlanConflict:
+        return _plan_conflict(record["plan_id"])
+    return {**_plan_response(record), "cached": False}
+
+
+@app.get("/plans/{plan_id}", tags=["Plans"])
+def read_plan(plan_id: str):
+    """Return a stored plan in the same shape as /generate-plan, plus its request."""
+    record = get_plan(plan_id)
+    if not record:
+        return JSONResponse(status_code=404, content={"error": "Plan not found or expired."})
+    return _plan_response(record)
+
+
+@app.patch("/plans/{plan_id}", tags=["Plans"])
+def edit_plan(plan_id: str, patch: PlanPatch):
+    """
+    Apply swaps, moves and deletions to a stored plan — no AI call.
+
+    budget_summary is recomputed from the edited activities' cost_inr.
+    A shared plan is copied, not changed: the edit comes back under a new
+    plan_id, which later edits must use. Returns 409 if the plan is no longer at patch.version (when given) or
+    another edit landed while this one was being applied; reload and retry.
+    """
+    record = get_plan(plan_id)
+    if not record:
+        return JSONResponse(status_code=404, content={"error": "Plan not found or expired."})
+    if patch.version is not None and patch.version != record.get("version"):
+        return _plan_conflict(plan_id)
+    try:
+        itinerary = apply_operations(record["itinerary"], [op.dict() for op in patch.operations])
+    except ValueError as e:
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+    try:
+        record = update_plan(record, itinerary)
+    except PlanConflict:
+        return _plan_conflict(plan_id)
+    return _plan_response(record)
+
+
+def _plan_conflict(plan_id: str) -> JSONResponse:
+    current = get_plan(plan_id) or {}
+    return JSONResponse(status_code=409, content={
+        "error":   "This plan was changed elsewhere. Reload it and try again.",
+        "version": current.get("version"),
+    })
+
+
+def _store_plan(itinerary: dict, request: TravelRequest, weather: dict, cache_key: str) -> dict:
+    """
+    Give a successful plan its plan_id; returns {"plan_id": …} to merge into
+    the response. Cacheable plans use the cache key's shared plan, so hits
+    read it instead of saving a copy each time.
+    """
+    if not itinerary.get("days") or itinerary.get("error"):
+        return {}
+    try:
+        if not _cacheable(itinerary):
+            return {"plan_id": save_plan(itinerary, request.dict(by_alias=True), weather), "version": 1}
+        record = shared_plan(cache_key, itinerary, request.dict(by_alias=True), weather)
+        return {"plan_id": record["plan_id"], "version": record["version"]}
+    except Exception as e:
+        logger.warning(f"Plan not stored: {e}")
+        return {}
+
+
+async def _reused_weather(request: TravelRequest, reused: dict) -> dict:
+    """Fresh weather for a near-match plan; exact hits skip the fetch as before."""
+    if not reused:
+        return {}
+    return await fetch_weather(request.to.strip(), request.start_date, request.nights)
+
+
+def _count_lookup(cached: dict, reused: dict) -> None:
+    result = "miss" if not cached else "near_hit" if reused else "hit"
+    PLAN_CACHE.inc(result=result)
+    tracing.annotate(plan_cache=result)
+
+
+def _traced(body: dict, trace: tracing.Trace, response: Optional[Response], debug: Optional[str]) -> dict:
+    """Close the request's trace: timing headers (if not streamed), the debug payload, the log line."""
+    if response is not None:
+        _timing_headers(response, trace)
+    tracing.finish(trace)
+    return {**body, "timing": trace.summary()} if debug == "timing" else body
+
+
+def _timing_headers(response: Response, trace: tracing.Trace) -> None:
+    response.headers["Server-Timing"]       = trace.server_timing()
+    response.headers["X-Request-ID"]        = trace.request_id
+    response.headers["Timing-Allow-Origin"] = "*"
+
+
+def _reuse_info(reused: dict) -> dict:
+    """{"reused_from": {...}} for near-match hits, to merge into the response."""
+    return {"reused_from": reused} if reused else {}
+
 
-    context          = build_context(request.dict(by_alias=False))
-    destination_data = get_destination_data(destination)
-    weather          = get_weather(destination, request.start_date)
+def _plan_response(record: dict) -> dict:
+    return {
+        **record["itinerary"],
+        "plan_id": record["plan_id"],
+        "version": record.get("version"),
+        "weather": record.get("weather", {}),
+        "request": record.get("request", {}),
+        "cached":  True,
+    }
 
-    if weather:
-        logger.info(f"Weather: {weather.get('condition')} {weather.get('temp_max_c')}C")
 
-    itinerary = generate_itinerary(context, destination_data, request.dict(by_alias=False), weather)
+def _cacheable(itinerary: dict) -> bool:
+    """Only cache complete, successful plans — never fallback, error or salvaged partial results."""
+    return bool(itinerary.get("days")) and not itinerary.get("error") and not itinerary.get("partial")
 
-    # Only cache successful responses — never cache fallback/error results
-    if itinerary.get("days") and not itinerary.get("error"):
-        set_cached(cache_key, itinerary)
 
-    return {**itinerary, "cached": False, "weather": weather}
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 @app.exception_handler(Exception)
 def global_error_handler(request: Request, exc: Exception):
     logger.error(f"Error on {request.url}: {exc}")
-    return JSONResponse(status_code=500, content={"error": str(exc)})
+    response = JSONResponse(status_code=500, content={"error": str(exc)})
+    trace    = tracing.current()
+    if trace is not None and not trace.finished:
+        trace.set(error=type(exc).__name__)
+        _timing_headers(response, trace)
+        tracing.finish(trace, status=500)
+    return response
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ request_models.py — Pydantic request models for the API.
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 
 class TravelRequest(BaseModel):
@@ -23,3 +23,26 @@ class TravelRequest(BaseModel):
 
     class Config:
         populate_by_name = True
+
+
+class RegenerateRequest(TravelRequest):
+    """A plan's original request, plus the slice to regenerate."""
+    plan_id: Optional[str]        = Field(default=None)           # stored plan to edit; omit to use the plan cache
+    day: int                      = Field(..., ge=1)              # 1-based day number
+    activity_index: Optional[int] = Field(default=None, ge=0)     # 0-based; omit to regenerate the whole day
+    constraint: Optional[str]     = Field(default=None, max_length=200)  # e.g. "more relaxed", "indoor"
+
+
+class PlanOperation(BaseModel):
+    """One deterministic edit to a stored plan (day 1-based, activity 0-based)."""
+    op: Literal["swap", "move", "delete"]
+    day: int                   = Field(..., ge=1)
+    activity: int              = Field(..., ge=0)
+    alternative: Optional[int] = Field(default=None, ge=0)   # swap: which alternative to promote
+    to_index: Optional[int]    = Field(default=None, ge=0)   # move: new position
+    to_day: Optional[int]      = Field(default=None, ge=1)   # move: target day (default: same day)
+
+
+class PlanPatch(BaseModel):
+    operations: List[PlanOperation] = Field(..., min_length=1, max_length=50)
+    version: Optional[int]          = Field(default=None, ge=1)   # the version the edits were made against
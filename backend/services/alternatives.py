@@ -0,0 +1,240 @@
+"""
+alternatives.py — Activity alternatives from a local retrieval index.
+
+Rather than having Gemini write three alternatives for every activity (most
+of the output tokens), each destination's scraped items (attractions,
+activities, food) are indexed as TF-IDF vectors tagged with a category and
+a rough cost. Each main activity then gets its nearest neighbours that differ
+in category or cost tier, are not already in the plan, and are not the
+activity itself.
+
+Indexes are kept in memory per destination (rebuilt when the scraped items
+change); building one takes well under a millisecond.
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ALTERNATIVES_PER_ACTIVITY = 3
+INDEX_CACHE_SIZE = 128
+DUPLICATE_SIMILARITY = 0.8     # closer than this to the main activity = same thing
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "the", "and", "for", "with", "from", "into", "this", "that", "are", "its", "has", "was",
+    "you", "your", "can", "also", "visit", "tour", "one", "most", "very", "near", "around",
+}
+_SPLIT = re.compile(r"\s+[–—-]\s+|:\s+|\s+\(")
+
+CATEGORY_KEYWORDS = {
+    "food":       {"restaurant", "cafe", "food", "cuisine", "dhaba", "thali", "biryani", "seafood", "bakery",
+                   "street", "dining", "eat", "tea", "coffee", "bar", "brewery", "dosa", "curry", "sweets"},
+    "culture":    {"temple", "museum", "church", "mosque", "fort", "palace", "heritage", "gallery", "festival",
+                   "dance", "art", "cathedral", "monastery", "synagogue", "tomb", "mahal", "haveli", "shrine",
+                   "kathakali", "theatre", "history", "historic"},
+    "adventure":  {"trek", "trekking", "hike", "hiking", "rafting", "paragliding", "diving", "snorkelling",
+                   "safari", "climb", "climbing", "kayak", "kayaking", "surf", "surfing", "zipline", "camel",
+                   "jeep", "cycling", "skiing", "scuba", "parasailing", "wildlife"},
+    "relaxation": {"beach", "spa", "ayurveda", "ayurvedic", "lake", "garden", "gardens", "park", "cruise",
+                   "backwater", "backwaters", "houseboat", "sunset", "yoga", "hot", "springs", "promenade"},
+}
+
+# Share of the per-person daily rate an item of each category costs
+COST_SHARE = {"sightseeing": 0.2, "culture": 0.25, "adventure": 0.8, "relaxation": 0.4}
+FOOD_SHARE = 0.3
+FREE_KEYWORDS = {"beach", "walk", "park", "promenade", "viewpoint", "market", "bazaar", "ghat", "street"}
+
+DESCRIPTIONS = {
+    "food":        "A local favourite to eat in {dest}.",
+    "culture":     "A cultural highlight of {dest}.",
+    "adventure":   "An outdoor activity around {dest}.",
+    "relaxation":  "A slower-paced option in {dest}.",
+    "sightseeing": "A popular sight in {dest}.",
+}
+
+_indexes = OrderedDict()
+_lock    = threading.Lock()
+
+
+class AlternativesIndex:
+    """TF-IDF index over one destination's scraped items."""
+
+    def __init__(self, destination: str, data: dict):
+        self.destination = destination
+        self.items = []                  # (title, description, category, free, text)
+        for source in ("attractions", "activities", "food"):
+            for text in data.get(source, []) or []:
+                title, description = _split_item(text)
+                category = "food" if source == "food" else _categorize(text)
+                free     = category != "food" and bool(_words(text) & FREE_KEYWORDS)
+                self.items.append((title, description, category, free, text))
+
+        docs     = [Counter(_tokens(item[4])) for item in self.items]
+        df       = Counter(word for doc in docs for word in doc)
+        n        = len(docs)
+        self.idf = {word: math.log((n + 1) / (count + 1)) + 1 for word, count in df.items()}
+        self.vectors = [self._vector(doc) for doc in docs]
+
+    def _vector(self, counts: Counter) -> dict:
+        vec  = {w: c * self.idf[w] for w, c in counts.items() if w in self.idf}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {w: v / norm for w, v in vec.items()}
+
+    def nearest(self, activity: dict, context: dict, exclude: set, k: int = ALTERNATIVES_PER_ACTIVITY) -> list:
+        """
+        Up to k alternatives for an activity, best match first.
+
+        Candidates must differ from the activity in category or cost tier;
+        when there are too few, same-category/tier items fill the rest.
+        """
+        query    = self._vector(Counter(_tokens(f"{activity.get('title', '')} {activity.get('description', '')}")))
+        category = activity.get("category", "")
+        tier     = _cost_tier(int(activity.get("cost_inr") or 0), context)
+        title    = _normalize(activity.get("title", ""))
+
+        scored = []
+        for i, vec in enumerate(self.vectors):
+            item_title = _normalize(self.items[i][0])
+            if not item_title or item_title == title or _is_used(item_title, exclude):
+                continue
+            score = sum(v * vec.get(w, 0.0) for w, v in query.items())
+            if score >= DUPLICATE_SIMILARITY:
+                continue
+            scored.append((score, i))
+        scored.sort(key=lambda s: -s[0])
+
+        diverse, similar = [], []
+        for _, i in scored:
+            alt = self._alternative(i, context)
+            if alt["category"] != category or _cost_tier(alt["cost_inr"], context) != tier:
+                diverse.append(alt)
+            else:
+                similar.append(alt)
+        return (diverse + similar)[:k]
+
+    def _alternative(self, i: int, context: dict) -> dict:
+        title, description, category, free, _ = self.items[i]
+        return {
+            "title":       title,
+            "description": description or DESCRIPTIONS[category].format(dest=self.destination),
+            "category":    category,
+            "cost_inr":    0 if free else _estimate_cost(category, context),
+        }
+
+
+def get_index(destination: str, data: dict) -> AlternativesIndex:
+    """Return the in-memory index for a destination's current scraped items."""
+    key = (destination.strip().lower(), _items_signature(data))
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = AlternativesIndex(destination, data)
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def fill_day(day: dict, index: AlternativesIndex, context: dict, used: set) -> dict:
+    """
+    Set "alternatives" on every activity of a day from the index.
+
+    `used` holds the normalized titles of main activities seen so far
+    (including this day's); it is updated in place so later days don't
+    offer earlier main activities as alternatives. Activities keep their
+    existing alternatives when the index has nothing to offer.
+    """
+    activities = day.get("activities") or []
+    used.update(_normalize(a.get("title", "")) for a in activities)
+    for activity in activities:
+        alternatives = index.nearest(activity, context, used)
+        if alternatives:
+            activity["alternatives"] = alternatives
+        else:
+            activity.setdefault("alternatives", [])
+    return day
+
+
+def fill_itinerary(itinerary: dict, index: AlternativesIndex, context: dict) -> dict:
+    """
+    Fill alternatives for every day of a plan (see fill_day).
+
+    Days are filled in order exactly as when streaming, so a streamed day
+    and the same day in the final plan get the same alternatives.
+    """
+    used = set()
+    for day in itinerary.get("days", []):
+        fill_day(day, index, context, used)
+    return itinerary
+
+
+# ──────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────
+
+def _split_item(text: str) -> tuple:
+    """'Mattancherry Palace – Dutch-era murals' → ('Mattancherry Palace', 'Dutch-era murals')."""
+    parts = _SPLIT.split(text.strip(), maxsplit=1)
+    title = parts[0].strip(" .,;")[:80]
+    description = parts[1].strip(" )") if len(parts) > 1 else ""
+    if description and not description.endswith("."):
+        description += "."
+    return title, description[:1].upper() + description[1:]
+
+
+def _categorize(text: str) -> str:
+    words = _words(text)
+    best, hits = "sightseeing", 0
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        count = len(words & keywords)
+        if count > hits:
+            best, hits = category, count
+    return best
+
+
+def _estimate_cost(category: str, context: dict) -> int:
+    rates = context.get("daily_rates") or {}
+    if category == "food":
+        cost = rates.get("food", 0) * FOOD_SHARE
+    else:
+        cost = rates.get("activities", 0) * COST_SHARE.get(category, 0.2)
+    return int(round(cost / 50) * 50)
+
+
+def _cost_tier(cost: int, context: dict) -> int:
+    """0 free, 1 below a third of the daily activities rate, 2 below it, 3 above."""
+    if cost <= 0:
+        return 0
+    rate = (context.get("daily_rates") or {}).get("activities") or 2500
+    if cost < rate / 3:
+        return 1
+    return 2 if cost <= rate else 3
+
+
+def _is_used(title: str, used: set) -> bool:
+    """True if a main activity's title names this item ("Explore Fort Kochi beach" ~ "Fort Kochi beach")."""
+    return any(u and (title in u or u in title) for u in used)
+
+
+def _items_signature(data: dict) -> int:
+    return hash(tuple(tuple(data.get(k) or ()) for k in ("attractions", "activities", "food")))
+
+
+def _tokens(text: str) -> list:
+    return [w for w in _WORD.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall(text.lower()))
+
+
+def _normalize(title: str) -> str:
+    return " ".join(_WORD.findall(title.lower()))
@@ -0,0 +1,102 @@
+"""
+gazetteer.py — Offline name → coordinates lookup for common destinations.
+
+Backed by resources/gazetteer.tsv, which covers every scraper.INDIAN_STATES
+entry plus popular global destinations. The file is parsed once, on first
+lookup, into a flat dict keyed by normalized name and alias, so a lookup is
+a single dict access. canonical_name() maps any alias to the entry's primary
+name, so "Cochin" and "Kochi" share cache keys.
+
+lookup() and canonical_name() resolve a "Name, Region" query ("Jaipur,
+Rajasthan") to the entry for Name only if every part after the first comma
+is one of that entry's regions, so "Paris, Texas" is never taken for Paris,
+France — neither its coordinates nor its cache keys.
+"""
+
+import logging
+import os
+import re
+import unicodedata
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "..", "resources", "gazetteer.tsv")
+
+_index = None
+
+
+def normalize_place(name: str) -> str:
+    """
+    Normalize a place name for matching.
+
+    Example: "  Kochi (Cochin), Kerala " → "kochi cochin kerala"
+    """
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+def lookup(name: str) -> Optional[dict]:
+    """
+    Resolve a destination name locally.
+
+    Tries the full name, then the part before the first comma when the rest
+    names the entry's state or country ("Jaipur, Rajasthan" → "jaipur").
+
+    Returns:
+        {"lat": float, "lon": float} or None if the place is not bundled.
+    """
+    hit = _match(name)
+    if hit is None:
+        return None
+    return {"lat": hit[0], "lon": hit[1]}
+
+
+def canonical_name(name: str) -> str:
+    """
+    Normalized primary name for a place, resolving gazetteer aliases.
+
+    Example: "Cochin" → "kochi", "Jaipur, Rajasthan" → "jaipur"; unknown
+    places ("Paris, Texas") are just normalized as a whole.
+    """
+    hit = _match(name)
+    return hit[2] if hit is not None else normalize_place(name)
+
+
+def _match(name: str) -> Optional[tuple]:
+    """The gazetteer entry for name, or None (see the module docstring)."""
+    index = _load()
+    hit   = index.get(normalize_place(name))
+    if hit is not None or "," not in name:
+        return hit
+    head, *rest = name.split(",")
+    hit = index.get(normalize_place(head))
+    if hit is None:
+        return None
+    regions = [normalize_place(part) for part in rest if normalize_place(part)]
+    return hit if all(region in hit[3] for region in regions) else None
+
+
+def _load() -> dict:
+    global _index
+    if _index is not None:
+        return _index
+
+    index = {}
+    try:
+        with open(GAZETTEER_PATH, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                regions = frozenset(normalize_place(r) for r in fields[4].split(",")) if len(fields) > 4 else frozenset()
+                entry   = (float(fields[1]), float(fields[2]), normalize_place(fields[0]), regions)
+                names   = [fields[0]] + (fields[3].split(",") if len(fields) > 3 and fields[3] else [])
+                for n in names:
+                    index.setdefault(normalize_place(n), entry)
+    except (OSError, ValueError, IndexError) as e:
+        logger.warning(f"Gazetteer unavailable: {e}")
+
+    _index = index
+    return _index
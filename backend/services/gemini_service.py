@@ -1,24 +1,31 @@
 """
-gemini_service.py — Gemini API integration using the new google-genai SDK.
+gemini_service.py — Itinerary generation via the configured LLM provider.
 
-Builds a structured prompt from user context and destination data,
-calls Gemini, and returns a parsed itinerary dict.
+Builds a structured prompt from user context and destination data, calls
+Gemini (or the local stand-in — see llm_provider), and returns a parsed
+itinerary dict. stream_itinerary() does the same over Gemini's streaming
+API, yielding each day as soon as it parses.
 """
 
-import json
 import logging
-from typing import Optional
+import time
+from typing import Iterator, Optional
 
-import google.generativeai as genai
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from config import ALTERNATIVES_SOURCE
+from services.alternatives import AlternativesIndex, get_index, fill_day, fill_itinerary
+from services.llm_provider import generate_text, stream_text
+from services.prompt_builder import build_itinerary_prompt, estimate_tokens
+from services.wire_format import expand_day, expand_itinerary
+from utils.helpers import dedupe_limit
+from utils.llm_json import IncrementalJSONParser, parse_llm_json
+from utils import tracing
+from utils.metrics import LLM_PARSES, FALLBACK_ITINERARIES
 
 logger = logging.getLogger(__name__)
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
 
-
-def generate_itinerary(context: dict, destination_data: dict, request: dict, weather: dict = None) -> dict:
+def generate_itinerary(context: dict, destination_data: dict, request: dict, weather: dict = None,
+                       budget: float = None) -> dict:
     """
     Generate a day-by-day travel itinerary using the Gemini API.
 
@@ -27,169 +34,270 @@ def generate_itinerary(context: dict, destination_data: dict, request: dict, wea
         destination_data: Output of scraper.scrape_destination()
         request:          Raw request dict
         weather:          Output of weather_service.get_weather() (optional)
+        budget:           Seconds left for the model chain (see llm_provider.generate_text)
 
     Returns:
-        Parsed itinerary dict, or a fallback dict on failure.
+        Parsed itinerary dict with "model" set to the model that served it,
+        or a fallback dict on failure.
     """
 
-    prompt   = _build_prompt(context, destination_data, request, weather or {})
-    response = _call_gemini(prompt)
+    index           = _alternatives_index(request, destination_data)
+    prompt          = _build_prompt(context, destination_data, request, weather or {}, index is None)
+    response, model = _call_gemini(prompt, budget)
 
     if response is None:
-        return _fallback(request, context)
-
-    return _parse(response)
-
-
-def _build_prompt(context: dict, data: dict, request: dict, weather: dict = None) -> str:
-    """Assemble the Gemini prompt from context, destination data, and weather."""
-    weather = weather or {}
-    rates       = context["daily_rates"]
-    attractions = "\n".join(f"- {a}" for a in data.get("attractions", [])[:8]) or "Not available"
-    activities  = "\n".join(f"- {a}" for a in data.get("activities",  [])[:6]) or ""
-    food        = "\n".join(f"- {f}" for f in data.get("food",        [])[:6]) or "Not available"
-
-    weather_section = ""
-    if weather:
-        weather_section = f"""
-WEATHER FORECAST (for Day 1 — {request.get('start_date', '')})
-- Condition:   {weather.get('condition', 'Unknown')}
-- Max Temp:    {weather.get('temp_max_c', '?')}°C
-- Min Temp:    {weather.get('temp_min_c', '?')}°C
-- Rain:        {weather.get('rain_mm', 0)} mm
-- Packing tip: {weather.get('tip', '')}
-Use this to suggest weather-appropriate activities and clothing notes."""
+        return fallback_itinerary(request, context)
+
+    tracing.annotate(model=model, response_tokens=estimate_tokens(response))
+    result = _parse(response)
+    result["model"] = model
+    if index is not None and result.get("days"):
+        fill_itinerary(result, index, context)
+    return result
+
+
+def stream_itinerary(context: dict, destination_data: dict, request: dict, weather: dict = None,
+                     budget: float = None) -> Iterator[tuple]:
+    """
+    Stream an itinerary from Gemini, within budget seconds if given.
+
+    Yields:
+        ("day", dict) for each day object as soon as it is complete, then
+        ("itinerary", dict) once — the full parsed itinerary, or a fallback
+        dict on failure.
+    """
+    index   = _alternatives_index(request, destination_data)
+    prompt  = _build_prompt(context, destination_data, request, weather or {}, index is None)
+    parser  = IncrementalJSONParser("days")
+    chunks  = []
+    days    = []
+    used    = set()
+    model   = None
+    started = time.perf_counter()
+
+    try:
+        for text, model in stream_text(prompt, budget):
+            chunks.append(text)
+            for day in parser.feed(text):
+                day = expand_day(day, len(days) + 1)
+                if index is not None:
+                    fill_day(day, index, context, used)
+                days.append(day)
+                yield "day", day
+    except Exception as e:
+        logger.error(f"Gemini stream failed: {e}")
+        yield "itinerary", fallback_itinerary(request, context)
+        return
+
+    if not chunks:
+        yield "itinerary", fallback_itinerary(request, context)
+        return
+
+    logger.info("Gemini stream completed.")
+    tracing.observe("llm_call", time.perf_counter() - started)
+    tracing.annotate(model=model, response_tokens=estimate_tokens("".join(chunks)))
+    with tracing.stage("parse"):
+        result = _finish(parser, "".join(chunks))
+    result["model"] = model
+    if index is not None and result.get("days"):
+        fill_itinerary(result, index, context)
+    yield "itinerary", result
+
+
+def regenerate_slot(context: dict, destination_data: dict, request: dict, itinerary: dict,
+                    day: int, activity_index: int = None, constraint: str = None,
+                    weather: dict = None, budget: float = None) -> Optional[dict]:
+    """
+    Regenerate one day, or one activity within a day, of an existing itinerary.
+
+    Only the target slice is generated; the neighbouring days are sent as
+    context so the replacement fits the rest of the plan.
+
+    Args:
+        day:            1-based day number
+        activity_index: 0-based activity within that day, or None for the whole day
+        constraint:     Free-text change request, e.g. "more relaxed", "indoor"
+        budget:         Seconds left for the model chain
+
+    Returns:
+        The new day dict (activity_index None) or activity dict, or None on failure.
+    """
+    prompt   = _build_slot_prompt(context, destination_data, request, itinerary,
+                                  day, activity_index, constraint, weather or {})
+    response, _ = _call_gemini(prompt, budget)
+    if response is None:
+        return None
+
+    result, _ = parse_llm_json(response, "activities" if activity_index is None else "alternatives")
+    if not result:
+        logger.error("Failed to parse regenerated slot.")
+        return None
+    if activity_index is None:
+        if not result.get("activities"):
+            return None
+        result["day"] = day
+        return result
+    return result if result.get("title") else None
+
+
+def _build_slot_prompt(context: dict, data: dict, request: dict, itinerary: dict,
+                       day: int, activity_index: int, constraint: str, weather: dict) -> str:
+    """Narrow prompt for one day or activity, with adjacent days as context."""
+    days    = itinerary.get("days", [])
+    current = days[day - 1]
+
+    def outline(d: dict) -> str:
+        titles = "; ".join(f"{a.get('time', '')} {a.get('title', '')}" for a in d.get("activities", []))
+        return f"Day {d.get('day')}: {d.get('theme', '')} — {titles}"
+
+    neighbours = "\n".join(outline(d) for d in days[max(0, day - 2):day + 1] if d is not current)
+
+    forecast    = weather.get("days") or []
+    day_weather = forecast[day - 1] if day <= len(forecast) else None
+    weather_line = (
+        f"Weather that day: {day_weather.get('condition')}, {day_weather.get('temp_min_c')}–"
+        f"{day_weather.get('temp_max_c')}°C, rain {day_weather.get('rain_mm', 0)} mm"
+        if day_weather else ""
+    )
+
+    pool = dedupe_limit(data.get("attractions", [])[:8] + data.get("activities", [])[:6] + data.get("food", [])[:6], limit=20)
+    grounding = "\n".join(f"- {item}" for item in pool) or "Not available"
+
+    activity_schema = """{
+  "time": "09:00",
+  "period": "morning",
+  "title": "string",
+  "description": "string",
+  "category": "sightseeing | food | adventure | culture | relaxation",
+  "cost_inr": 0,
+  "alternatives": [
+    {"title": "string", "description": "string", "category": "sightseeing | food | adventure | culture | relaxation", "cost_inr": 0}
+  ]
+}"""
+
+    if activity_index is None:
+        target = f"Replace the whole of Day {day} (currently: {outline(current)})."
+        schema = f'{{\n  "day": {day},\n  "theme": "string",\n  "activities": [{activity_schema}]\n}}'
+        rules  = "- Keep a similar number of activities and time slots unless the change request says otherwise"
+    else:
+        act    = current["activities"][activity_index]
+        target = (f"Replace only this activity on Day {day}: {act.get('time', '')} — {act.get('title', '')} "
+                  f"({act.get('category', '')}, ₹{act.get('cost_inr', 0)}).")
+        schema = activity_schema
+        rules  = f"- Keep the {act.get('time', '')} time slot and {act.get('period', '')} period"
 
     return f"""
-You are an expert travel planner. Generate a {context['days']}-day itinerary for {request['to']}.
+You are an expert travel planner revising part of an existing {context['days']}-day itinerary for {request['to']}.
 
 TRIP DETAILS
-- From:     {request.get('from_location', request.get('from', ''))}
-- To:       {request['to']}
-- Duration: {context['days']} days / {context['nights']} nights
-- Season:   {context['season']}
-- Budget:   {context['budget_tier']} tier — ₹{context['per_person_per_day']:,}/person/day · ₹{context['total_budget_inr']:,} total for {context['group_count']} {context['group_label']}(s) over {context['days']} days
+- Budget:   {context['budget_tier']} tier — ₹{context['per_person_per_day']:,}/person/day
 - Purposes: {', '.join(context['purposes']) or 'general sightseeing'}
 - Pace:     {context['pace']}
 - Group:    {request.get('group_size', 'couple')}
-{f"- Checkpoints: {', '.join(context['checkpoints'])}" if context['checkpoints'] else ""}
-{f"- Special needs: {request['special_needs']}" if request.get('special_needs') else ""}
-{weather_section}
-DESTINATION INTELLIGENCE
-Summary: {data.get('summary', '')}
 
-Attractions:
-{attractions}
-{f"Activities:{chr(10)}{activities}" if activities else ""}
-Local Food:
-{food}
+TARGET
+{target}
+CHANGE REQUEST: {constraint or 'Offer a fresh option that fits the rest of the trip.'}
+{weather_line}
+
+ADJACENT DAYS (context only — do not repeat their activities)
+{neighbours or 'None'}
+
+DESTINATION INTELLIGENCE
+{grounding}
 
 INSTRUCTIONS
-- Match activities to the stated purposes and pace
-- Stay within the budget tier
-- Include one local food experience per day
-- Use the destination data above as factual grounding
-- If weather data is provided, suggest weather-appropriate activities
-- For EACH activity provide exactly 3 alternatives drawn from the destination data (different category or cost tier)
-
-Return ONLY valid JSON. No markdown. No code fences. No commentary. Just the raw JSON object:
-{{
-  "destination": "{request['to']}",
-  "days": [
-    {{
-      "day": 1,
-      "theme": "string",
-      "activities": [
-        {{
-          "time": "09:00",
-          "period": "morning",
-          "title": "string",
-          "description": "string",
-          "category": "sightseeing | food | adventure | culture | relaxation",
-          "cost_inr": 0,
-          "alternatives": [
-            {{
-              "title": "string",
-              "description": "string",
-              "category": "sightseeing | food | adventure | culture | relaxation",
-              "cost_inr": 0
-            }},
-            {{
-              "title": "string",
-              "description": "string",
-              "category": "sightseeing | food | adventure | culture | relaxation",
-              "cost_inr": 0
-            }},
-            {{
-              "title": "string",
-              "description": "string",
-              "category": "sightseeing | food | adventure | culture | relaxation",
-              "cost_inr": 0
-            }}
-          ]
-        }}
-      ]
-    }}
-  ],
-  "budget_summary": {{
-    "accommodation_inr": 0,
-    "food_inr": 0,
-    "transport_inr": 0,
-    "activities_inr": 0,
-    "total_inr": 0
-  }},
-  "seasonal_insight": {{
-    "badge_text": "❄️ Winter — Peak Snow Season",
-    "badge_color": "#06b6d4 | #ef4444 | #f59e0b | #f97316",
-    "description": "Short explanation of why this season is good/bad for this specific destination.",
-    "tips": ["tip1", "tip2", "tip3"]
-  }},
-  "transport_intelligence": {{
-    "recommended_mode": "Flight | Train | Bus | Car",
-    "approx_reason": "Flight is best for the 1500km distance from {request.get('from', '')} to {request['to']}",
-    "nearest_airport": "Name of nearest airport and distance",
-    "major_railway_station": "Name of major railway station and distance",
-    "road_connectivity": "Notes on highway access or bus routes"
-  }},
-  "tips": ["tip1", "tip2", "tip3"]
-}}
+- Honour the change request
+{rules}
+- Stay within the budget tier and use the destination data as factual grounding
+- Provide exactly 3 alternatives for each activity
+
+Return ONLY valid JSON for the replacement. No markdown. No commentary:
+{schema}
 """.strip()
 
 
-def _call_gemini(prompt: str) -> Optional[str]:
-    """Send prompt to Gemini using the google-generativeai SDK."""
+def _alternatives_index(request: dict, data: dict) -> Optional[AlternativesIndex]:
+    """
+    The local alternatives index for this trip, or None when Gemini should
+    write the alternatives itself: ALTERNATIVES_SOURCE is "llm", or nothing
+    was scraped for the destination to index.
+    """
+    if ALTERNATIVES_SOURCE != "index":
+        return None
+    index = get_index(request["to"], data)
+    return index if index.items else None
+
+
+def _build_prompt(context: dict, data: dict, request: dict, weather: dict = None,
+                  alternatives: bool = None) -> str:
+    """Assemble the token-budgeted Gemini prompt (see services/prompt_builder)."""
+    with tracing.stage("prompt_build"):
+        prompt, stats = build_itinerary_prompt(context, data, request, weather or {},
+                                               alternatives=alternatives)
+    tracing.annotate(prompt_tokens=stats["total"])
+    return prompt
+
+
+def _call_gemini(prompt: str, budget: float = None) -> tuple:
+    """
+    Send prompt through the model chain within budget seconds (see llm_provider.generate_text).
+
+    Returns:
+        (text, model) — or (None, None) if every model failed.
+    """
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(prompt)
-        logger.info("Gemini responded successfully.")
-        return response.text.strip()
+        with tracing.stage("llm_call"):
+            text, model = generate_text(prompt, budget)
+        logger.info(f"Gemini responded successfully ({model}).")
+        return text, model
     except Exception as e:
         logger.error(f"Gemini call failed: {e}")
-        return None
+        return None, None
 
 
 def _parse(raw: str) -> dict:
     """
     Parse Gemini's text response to a dict.
-    Strips markdown code fences if present.
+
+    Tolerates code fences, surrounding commentary and trailing commas, and
+    recovers the complete days of a truncated response (see utils/llm_json).
     """
-    text = raw
-    if text.startswith("```"):
-        lines = text.splitlines()
-        text  = "\n".join(lines[1:-1]).strip()
+    with tracing.stage("parse"):
+        _, parser = parse_llm_json(raw, "days")
+        return _finish(parser, raw)
 
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
+
+def _finish(parser: IncrementalJSONParser, raw: str) -> dict:
+    """Close a parser fed with the whole response and shape the result."""
+    result = expand_itinerary(parser.close())
+    if not result:
         logger.error("Failed to parse Gemini response as JSON.")
+        LLM_PARSES.inc(outcome="invalid")
         return {"error": "Invalid AI response", "raw": raw[:300]}
 
+    if parser.truncated:
+        logger.warning(f"Gemini response was incomplete — salvaged {len(result.get('days', []))} day(s).")
+        result["partial"] = True
+        LLM_PARSES.inc(outcome="truncated")
+    elif parser.repaired:
+        logger.info("Gemini response needed repair before parsing.")
+        LLM_PARSES.inc(outcome="repaired")
+    else:
+        LLM_PARSES.inc(outcome="ok")
+    return result
+
 
-def _fallback(request: dict, context: dict) -> dict:
-    """Return a minimal valid response when Gemini is unavailable."""
+def fallback_itinerary(request: dict, context: dict, error: str = None, reason: str = "llm_unavailable") -> dict:
+    """
+    Return a minimal valid response when Gemini is unavailable.
+
+    reason labels the fallback in /metrics ("llm_unavailable", "deadline").
+    """
+    FALLBACK_ITINERARIES.inc(reason=reason)
     return {
         "destination": request.get("to", ""),
-        "error":       "AI generation unavailable. Check GEMINI_API_KEY.",
+        "error":       error or "AI generation unavailable. Check GEMINI_API_KEY.",
         "days": [
             {
                 "day": i + 1,
@@ -0,0 +1,435 @@
+"""
+llm_provider.py — Pluggable LLM backends behind one interface.
+
+gemini_service builds prompts and parses responses; the provider only turns
+a prompt into text. LLM_PROVIDER picks the implementation:
+
+  - "gemini" (default): google-generativeai, with one reusable
+    GenerativeModel per model name, a per-call timeout, and a shared
+    CallLimiter (LLM_MAX_CONCURRENCY in flight, LLM_RATE_PER_MINUTE)
+    sized to the API quota.
+  - "local": a deterministic stand-in that reads the prompt and returns a
+    schema-valid response after LOCAL_LLM_LATENCY seconds, so the whole
+    backend can be load-tested offline without an API key.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator
+
+from config import (
+    GEMINI_API_KEY, GEMINI_MODEL, LLM_PROVIDER, LLM_TIMEOUT,
+    LLM_MAX_CONCURRENCY, LLM_RATE_PER_MINUTE, LOCAL_LLM_LATENCY,
+    LLM_HEDGE_AFTER, LLM_FALLBACK_MODELS, GEMINI_API_ENDPOINT,
+)
+from utils.metrics import REGISTRY, LLM_CALLS, Family
+from utils.rate_limit import CallLimiter, RateLimited
+
+logger = logging.getLogger(__name__)
+
+try:
+    import google.generativeai as genai
+except ImportError:       # only needed for LLM_PROVIDER=gemini
+    genai = None
+
+_limiter = CallLimiter("llm", LLM_MAX_CONCURRENCY, LLM_RATE_PER_MINUTE)
+_pool    = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY * 2, thread_name_prefix="llm")
+
+
+class LLMUnavailable(Exception):
+    """Every model in the chain failed or ran out of time."""
+
+
+class LLMProvider:
+    """Interface: prompt in, response text out."""
+
+    name = "base"
+
+    def generate(self, prompt: str, model: str = None, timeout: float = None) -> str:
+        """
+        Return the full response text. Raises on failure or timeout.
+
+        timeout covers the whole call, including the wait for a limiter slot.
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt: str, model: str = None, timeout: float = None) -> Iterator[str]:
+        """Yield response text chunks as they arrive. Raises on failure."""
+        raise NotImplementedError
+
+
+# ──────────────────────────────────────────────
+# Gemini
+# ──────────────────────────────────────────────
+
+class GeminiProvider(LLMProvider):
+    """google-generativeai client with reusable model objects and call limits."""
+
+    name = "gemini"
+
+    def __init__(self):
+        if genai is None:
+            raise RuntimeError("google-generativeai is not installed")
+        if GEMINI_API_ENDPOINT:
+            # e.g. a local stand-in for load tests; only the REST transport takes a plain URL
+            genai.configure(api_key=GEMINI_API_KEY or "unused", transport="rest",
+                            client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        elif GEMINI_API_KEY:
+            genai.configure(api_key=GEMINI_API_KEY)
+        self._models = {}
+        self._lock   = threading.Lock()
+
+    def _model(self, name: str):
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = genai.GenerativeModel(name)
+            return model
+
+    def generate(self, prompt: str, model: str = None, timeout: float = None) -> str:
+        timeout = timeout or LLM_TIMEOUT
+        started = time.monotonic()
+        with _limiter.slot(timeout):
+            response = self._model(model or GEMINI_MODEL).generate_content(
+                prompt, request_options={"timeout": _time_left(started, timeout)},
+            )
+        return response.text.strip()
+
+    def stream(self, prompt: str, model: str = None, timeout: float = None) -> Iterator[str]:
+        timeout = timeout or LLM_TIMEOUT
+        started = time.monotonic()
+        with _limiter.slot(timeout):
+            response = self._model(model or GEMINI_MODEL).generate_content(
+                prompt, stream=True, request_options={"timeout": _time_left(started, timeout)},
+            )
+            for chunk in response:
+                if chunk.parts:
+                    yield chunk.text
+
+
+# ──────────────────────────────────────────────
+# Local stand-in
+# ──────────────────────────────────────────────
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline provider for load tests and development.
+
+    The response is derived from the prompt alone (same prompt, same text):
+    day count, destination, budget and grounding items are read from the
+    prompt, and the output follows whichever schema it asks for — full or
+    compact, with or without alternatives, whole plan or a single
+    day/activity for slot regeneration.
+    """
+
+    name = "local"
+    CHUNK_CHARS = 64
+
+    def __init__(self, latency: float = None):
+        self.latency = LOCAL_LLM_LATENCY if latency is None else latency
+
+    def generate(self, prompt: str, model: str = None, timeout: float = None) -> str:
+        with _limiter.slot(timeout or LLM_TIMEOUT):
+            time.sleep(self.latency)
+            return self.respond(prompt)
+
+    def stream(self, prompt: str, model: str = None, timeout: float = None) -> Iterator[str]:
+        with _limiter.slot(timeout or LLM_TIMEOUT):
+            text   = self.respond(prompt)
+            chunks = [text[i:i + self.CHUNK_CHARS] for i in range(0, len(text), self.CHUNK_CHARS)]
+            delay  = self.latency / max(len(chunks), 1)
+            for chunk in chunks:
+                time.sleep(delay)
+                yield chunk
+
+    def respond(self, prompt: str) -> str:
+        """Response text for a prompt, without latency or call limits (also used by the load-test stub)."""
+        rng   = random.Random(hashlib.sha1(prompt.encode("utf-8")).hexdigest())
+        items = _grounding(prompt) or ["Old town walk", "City museum", "Central market", "Local thali"]
+        alts  = '"alternatives"' in prompt or ',[["title"' in prompt
+
+        slot_day = re.search(r"Replace the whole of Day (\d+)", prompt)
+        if slot_day:
+            return json.dumps(_day(int(slot_day.group(1)), items, rng, alternatives=True))
+        if "Replace only this activity" in prompt:
+            time_slot = re.search(r"Keep the (\d{2}:\d{2}) time slot", prompt)
+            return json.dumps(_activity(time_slot.group(1) if time_slot else "10:00", items, rng, True))
+
+        days = int(_match(r"Duration:\s*(\d+) days", prompt) or 3)
+        dest = _match(r"- To:\s*(.+)", prompt) or "Destination"
+        total = int((_match(r"₹([\d,]+) total", prompt) or "0").replace(",", "")) or 40000
+        budget = [int(total * s) for s in (0.4, 0.25, 0.15, 0.2)]
+        budget.append(sum(budget))
+
+        if '"days":[{"t"' in prompt:
+            return json.dumps({
+                "d":    dest,
+                "days": [{"t": f"Day {n} in {dest}", "a": [
+                    _compact(_activity(t, items, rng, alts), alts)
+                    for t in ("09:00", "13:00", "16:00", "19:30")
+                ]} for n in range(1, days + 1)],
+                "b":    budget,
+                "s":    ["🌤️ Good time to visit", "#f59e0b", f"Pleasant conditions in {dest}.", ["Carry water"]],
+                "tr":   ["Train", "Well connected by rail", "Nearest airport", "Main station", "Good highways"],
+                "tips": ["Start early", "Carry cash", "Book ahead"],
+            }, ensure_ascii=False, separators=(",", ":"))
+
+        return json.dumps({
+            "destination": dest,
+            "days": [_day(n, items, rng, alts, dest) for n in range(1, days + 1)],
+            "budget_summary": dict(zip(
+                ("accommodation_inr", "food_inr", "transport_inr", "activities_inr", "total_inr"), budget,
+            )),
+            "seasonal_insight": {"badge_text": "🌤️ Good time to visit", "badge_color": "#f59e0b",
+                                 "description": f"Pleasant conditions in {dest}.", "tips": ["Carry water"]},
+            "transport_intelligence": {"recommended_mode": "Train", "approx_reason": "Well connected by rail",
+                                       "nearest_airport": "Nearest airport", "major_railway_station": "Main station",
+                                       "road_connectivity": "Good highways"},
+            "tips": ["Start early", "Carry cash", "Book ahead"],
+        }, ensure_ascii=False, indent=2)
+
+
+_CATEGORIES = ("sightseeing", "food", "adventure", "culture", "relaxation")
+
+
+def _day(n: int, items: list, rng: random.Random, alternatives: bool, dest: str = "") -> dict:
+    return {
+        "day":        n,
+        "theme":      f"Day {n}" + (f" in {dest}" if dest else ""),
+        "activities": [_activity(t, items, rng, alternatives) for t in ("09:00", "13:00", "16:00", "19:30")],
+    }
+
+
+def _activity(time_slot: str, items: list, rng: random.Random, alternatives: bool) -> dict:
+    title = rng.choice(items)
+    act = {
+        "time":        time_slot,
+        "period":      "morning" if time_slot < "11" else "afternoon" if time_slot < "18" else "evening",
+        "title":       title,
+        "description": f"Spend time at {title}.",
+        "category":    rng.choice(_CATEGORIES),
+        "cost_inr":    rng.choice((0, 200, 500, 1200)),
+    }
+    if alternatives:
+        act["alternatives"] = [
+            {"title": alt, "description": f"Or visit {alt}.", "category": rng.choice(_CATEGORIES),
+             "cost_inr": rng.choice((0, 300, 800))}
+            for alt in rng.sample(items, min(3, len(items)))
+        ]
+    return act
+
+
+def _compact(act: dict, alternatives: bool) -> list:
+    row = [act["time"], act["title"], act["description"], act["category"][0], act["cost_inr"]]
+    if alternatives:
+        row.append([[a["title"], a["description"], a["category"][0], a["cost_inr"]] for a in act["alternatives"]])
+    return row
+
+
+def _grounding(prompt: str) -> list:
+    """Bullet items from the DESTINATION INTELLIGENCE part of the prompt."""
+    _, _, section = prompt.partition("DESTINATION INTELLIGENCE")
+    section, _, _ = section.partition("INSTRUCTIONS")
+    return [line[2:].strip() for line in section.splitlines() if line.startswith("- ")][:30]
+
+
+def _match(pattern: str, text: str):
+    found = re.search(pattern, text)
+    return found.group(1).strip() if found else None
+
+
+# ──────────────────────────────────────────────
+# Call policy: deadlines, hedging, fallback chain
+# ──────────────────────────────────────────────
+
+def model_chain() -> list:
+    """Models to try in order: the primary, then the configured fallbacks."""
+    chain = [GEMINI_MODEL]
+    chain += [m for m in LLM_FALLBACK_MODELS if m and m not in chain]
+    return chain
+
+
+def model_rank(model: str) -> int:
+    """Quality rank of the model that served a plan: 0 = primary, higher = further down the chain."""
+    if not model:
+        return 0            # recorded before models were tracked — primary only back then
+    chain = model_chain()
+    return chain.index(model) if model in chain else len(chain)
+
+
+def generate_text(prompt: str, budget: float = None) -> tuple:
+    """
+    Get a full response, falling back along the model chain.
+
+    budget is the time left for the whole chain, in seconds: each model gets
+    an equal share of what remains when its turn comes (see _model_timeout).
+
+    Returns:
+        (text, model that served it)
+
+    Raises:
+        LLMUnavailable: if every model failed or timed out.
+    """
+    provider = get_provider()
+    chain    = model_chain()
+    end_at   = time.monotonic() + budget if budget else None
+    errors   = []
+    for n, model in enumerate(chain):
+        timeout = _model_timeout(end_at, len(chain) - n)
+        if timeout <= 0:
+            errors.append(f"{model}: no time left")
+            break
+        try:
+            text = _hedged(provider, prompt, model, timeout)
+        except Exception as e:
+            LLM_CALLS.inc(model=model, outcome=_outcome(e))
+            logger.warning(f"LLM {model} failed: {e or type(e).__name__}")
+            errors.append(f"{model}: {e or type(e).__name__}")
+            continue
+        LLM_CALLS.inc(model=model, outcome="ok")
+        return text, model
+    raise LLMUnavailable("; ".join(errors))
+
+
+def stream_text(prompt: str, budget: float = None) -> Iterator[tuple]:
+    """
+    Stream a response as (chunk, model) pairs, falling back along the chain.
+
+    A model is abandoned for the next one only if it fails before sending
+    anything; once text has been streamed, a failure is raised to the caller.
+    budget splits across the chain as in generate_text().
+    """
+    provider = get_provider()
+    chain    = model_chain()
+    end_at   = time.monotonic() + budget if budget else None
+    errors   = []
+    for n, model in enumerate(chain):
+        timeout  = _model_timeout(end_at, len(chain) - n)
+        if timeout <= 0:
+            errors.append(f"{model}: no time left")
+            break
+        streamed = False
+        try:
+            for chunk in provider.stream(prompt, model, timeout):
+                streamed = True
+                yield chunk, model
+            LLM_CALLS.inc(model=model, outcome="ok")
+            return
+        except Exception as e:
+            LLM_CALLS.inc(model=model, outcome=_outcome(e))
+            if streamed:
+                raise
+            logger.warning(f"LLM {model} stream failed: {e or type(e).__name__}")
+            errors.append(f"{model}: {e or type(e).__name__}")
+    raise LLMUnavailable("; ".join(errors))
+
+
+def _model_timeout(end_at: float, models_left: int) -> float:
+    """
+    One model's deadline: its equal share of the time left before end_at
+    across the models still to try, capped at LLM_TIMEOUT (LLM_TIMEOUT
+    alone without a budget). A model that fails early leaves its unused
+    time to the ones after it.
+    """
+    if end_at is None:
+        return LLM_TIMEOUT
+    return min(LLM_TIMEOUT, (end_at - time.monotonic()) / models_left)
+
+
+def _time_left(started: float, timeout: float) -> float:
+    """What remains of a call's timeout after queueing for a limiter slot."""
+    return max(0.1, timeout - (time.monotonic() - started))
+
+
+def _hedged(provider: LLMProvider, prompt: str, model: str, timeout: float) -> str:
+    """
+    One model's attempt: a call bounded by timeout, plus — if
+    LLM_HEDGE_AFTER is set and the first call is still running by then — an
+    identical second call. The first success wins.
+    """
+    started  = time.monotonic()
+    end_at   = started + timeout
+    hedge_at = started + LLM_HEDGE_AFTER if 0 < LLM_HEDGE_AFTER < timeout else None
+    pending  = {_pool.submit(provider.generate, prompt, model, timeout)}
+    error    = None
+
+    while pending:
+        wake_at = min(end_at, hedge_at) if hedge_at else end_at
+        done, pending = wait(pending, timeout=max(0.0, wake_at - time.monotonic()), return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                text = future.result()
+            except Exception as e:
+                error = e
+                continue
+            for other in pending:
+                other.cancel()
+            return text
+
+        now = time.monotonic()
+        if now >= end_at:
+            break
+        if hedge_at and now >= hedge_at:
+            hedge_at = None
+            if pending:
+                logger.info(f"LLM {model}: no response after {LLM_HEDGE_AFTER:.1f}s, sending hedged request")
+                pending.add(_pool.submit(provider.generate, prompt, model, max(0.1, end_at - now)))
+
+    for future in pending:
+        future.cancel()
+    if pending or error is None:
+        raise TimeoutError(f"no response within {timeout:.1f}s")
+    raise error
+
+
+# ──────────────────────────────────────────────
+# Selection
+# ──────────────────────────────────────────────
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> LLMProvider:
+    """Return the configured provider, created on first use."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = LocalProvider() if LLM_PROVIDER == "local" else GeminiProvider()
+                logger.info(f"LLM provider: {_provider.name}")
+    return _provider
+
+
+def limiter_stats() -> dict:
+    """Call-limiter counters (calls, in flight, average queueing, rejections)."""
+    return _limiter.stats()
+
+
+def _outcome(error: Exception) -> str:
+    """Metric label for a failed call."""
+    if isinstance(error, RateLimited):
+        return "rate_limited"
+    name = type(error).__name__.lower()
+    if isinstance(error, TimeoutError) or "timeout" in name or "deadline" in name:
+        return "timeout"
+    return "error"
+
+
+def _metric_families() -> list:
+    stats = _limiter.stats()
+    return [
+        Family("navisense_llm_calls_in_flight", "gauge", "LLM calls holding a limiter slot.",
+               [({}, stats["in_flight"])]),
+        Family("navisense_llm_rejected_total", "counter", "LLM calls that got no limiter slot in time.",
+               [({}, stats["rejected"])]),
+    ]
+
+
+REGISTRY.add_collector(_metric_families)
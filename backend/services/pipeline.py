@@ -0,0 +1,163 @@
+"""
+pipeline.py — Async, deadline-bounded /generate-plan pipeline.
+
+The scraper, weather and Gemini services are blocking, so each stage runs on a
+shared worker pool while the event loop only awaits them. Scraping and weather
+run concurrently; Gemini starts as soon as both have finished (or been given
+up on). Every stage gets a share of PLAN_DEADLINE — a stage that overruns its
+share is abandoned and the plan goes ahead without its data.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
+from starlette.concurrency import iterate_in_threadpool
+
+from config import PLAN_DEADLINE, SCRAPE_DEADLINE_SHARE, WEATHER_DEADLINE_SHARE, PIPELINE_WORKERS
+from services.logic_service import build_context
+from services.scraper import get_destination_data
+from services.gemini_service import generate_itinerary, stream_itinerary, fallback_itinerary
+from services.weather_service import get_weather
+from utils import tracing
+
+logger    = logging.getLogger(__name__)
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+EMPTY_DESTINATION = {"summary": "", "attractions": [], "activities": [], "food": [], "sources": []}
+
+
+async def run_in_worker(func, *args, **kwargs):
+    """Run a blocking call on the pipeline pool, preserving contextvars."""
+    ctx  = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+async def run_stage(name: str, timeout: float, default, func, *args, **kwargs):
+    """
+    Run one blocking stage with a deadline.
+
+    Returns the stage result, or `default` if it raised or ran past `timeout`.
+    An abandoned stage keeps its worker thread until its own HTTP timeout
+    fires, but the request no longer waits for it.
+    """
+    if timeout <= 0:
+        logger.warning(f"{name}: no time left in the plan deadline — skipped")
+        return default
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(run_in_worker(func, *args, **kwargs), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{name}: exceeded its {timeout:.1f}s share — continuing without it")
+    except Exception as e:
+        logger.warning(f"{name} failed: {e}")
+    finally:
+        tracing.observe(re.sub(r"\W+", "_", name.lower()).strip("_"), time.perf_counter() - started)
+    return default
+
+
+async def fetch_inputs(destination: str, start_date: str, nights: int) -> tuple:
+    """Scrape destination data and fetch weather concurrently."""
+    scrape_budget = PLAN_DEADLINE * SCRAPE_DEADLINE_SHARE
+    return await asyncio.gather(
+        run_stage("Scrape", scrape_budget, dict(EMPTY_DESTINATION), get_destination_data, destination),
+        fetch_weather(destination, start_date, nights),
+    )
+
+
+async def fetch_weather(destination: str, start_date: str, nights: int) -> dict:
+    """Fetch the trip's weather under its share of PLAN_DEADLINE ({} if it fails)."""
+    weather_budget = PLAN_DEADLINE * WEATHER_DEADLINE_SHARE
+    return await run_stage("Weather", weather_budget, {}, get_weather, destination, start_date, nights)
+
+
+async def run_plan_pipeline(request_data: dict) -> tuple:
+    """
+    Build a fresh itinerary for a validated request dict.
+
+    Args:
+        request_data: TravelRequest.dict(by_alias=False)
+
+    Returns:
+        (itinerary, weather) — the itinerary is a fallback plan if Gemini
+        fails or runs out of time.
+    """
+    started     = time.monotonic()
+    destination = request_data["to"].strip()
+    context     = build_context(request_data)
+
+    destination_data, weather = await fetch_inputs(
+        destination, request_data.get("start_date", ""), request_data.get("nights", 0),
+    )
+
+    if weather:
+        logger.info(f"Weather: {weather.get('condition')} {weather.get('temp_max_c')}C")
+
+    remaining = PLAN_DEADLINE - (time.monotonic() - started)
+    itinerary = await run_stage(
+        "Gemini", remaining, None,
+        generate_itinerary, context, destination_data, request_data, weather, remaining,
+    )
+    if itinerary is None:
+        itinerary = fallback_itinerary(request_data, context, "AI generation timed out. Please try again.",
+                                       reason="deadline")
+
+    logger.info(f"Plan pipeline for {destination} finished in {time.monotonic() - started:.2f}s")
+    return itinerary, weather
+
+
+async def stream_plan_pipeline(request_data: dict) -> AsyncIterator[tuple]:
+    """
+    Streaming variant of run_plan_pipeline.
+
+    Yields:
+        ("meta", dict)      — weather and budget context, before generation
+        ("day", dict)       — each itinerary day as soon as Gemini completes it
+        ("itinerary", dict) — the full itinerary (or a fallback), last
+    """
+    started     = time.monotonic()
+    destination = request_data["to"].strip()
+    context     = build_context(request_data)
+
+    destination_data, weather = await fetch_inputs(
+        destination, request_data.get("start_date", ""), request_data.get("nights", 0),
+    )
+
+    yield "meta", {
+        "destination": destination,
+        "weather":     weather,
+        "context":     {k: context[k] for k in (
+            "season", "budget_tier", "per_person_per_day", "total_budget_inr",
+            "group_count", "group_label", "budget_source", "nights", "days",
+        )},
+        "sources":     destination_data.get("sources", []),
+    }
+
+    events = iterate_in_threadpool(stream_itinerary(
+        context, destination_data, request_data, weather, PLAN_DEADLINE - (time.monotonic() - started),
+    )).__aiter__()
+    while True:
+        remaining = PLAN_DEADLINE - (time.monotonic() - started)
+        try:
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            event, payload = await asyncio.wait_for(events.__anext__(), remaining)
+        except StopAsyncIteration:
+            break
+        except asyncio.TimeoutError:
+            logger.warning("Gemini stream: exceeded the plan deadline — sending fallback")
+            yield "itinerary", fallback_itinerary(
+                request_data, context, "AI generation timed out. Please try again.", reason="deadline",
+            )
+            break
+        yield event, payload
+        if event == "itinerary":
+            break
+
+    logger.info(f"Streamed plan for {destination} finished in {time.monotonic() - started:.2f}s")
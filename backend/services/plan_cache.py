@@ -0,0 +1,216 @@
+"""
+plan_cache.py — Canonical request fingerprints and near-match plan reuse.
+
+The plan cache key covers every TravelRequest field that changes what Gemini
+writes, normalized so equivalent requests collide and different ones don't:
+
+  - destination and origin → gazetteer canonical name ("Cochin" = "Kochi")
+  - purposes and checkpoints → lower-cased, de-duplicated, sorted
+  - start_date → ISO week (weather is refetched per request anyway)
+  - total_budget → per-person-per-day figure in ~10% buckets
+
+Everything except nights and start_date forms the plan's "family". Each
+family keeps a small index of its cached plans, so a request with no exact
+entry can still be served (PLAN_NEAR_MATCH) by:
+
+  - a longer plan for the same season, trimmed to the requested days with
+    the budget scaled down to match
+  - a plan for another start date in the same season, with fresh weather
+
+Plans record the model that served them. One from a fallback model is kept
+for FALLBACK_PLAN_TTL only, never replaces a plan from a better model under
+the same key, and is the last choice for a near match.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import math
+from datetime import datetime
+from typing import Optional
+
+from config import PLAN_NEAR_MATCH
+from services.gazetteer import canonical_name
+from services.llm_provider import model_rank
+from services.logic_service import build_context, detect_season
+from services.plan_service import recompute_budget
+from utils.cache import get_cached, set_cached
+from utils.helpers import build_cache_key
+
+logger = logging.getLogger(__name__)
+
+FAMILY_INDEX_SIZE = 16      # most recent plans remembered per family
+BUDGET_BUCKET     = 1.1     # geometric bucket width for explicit budgets
+FALLBACK_PLAN_TTL = 60 * 60 * 6   # 6 hours for plans served by a fallback model
+
+
+def plan_cache_key(request: dict) -> str:
+    """Cache key for the plan an exact request would produce."""
+    return _plan_key(request, _family(request))
+
+
+def get_cached_plan(request: dict) -> tuple:
+    """
+    Look up a cached plan for a request, exactly or by near match.
+
+    Args:
+        request: TravelRequest.dict(by_alias=False)
+
+    Returns:
+        (itinerary, reused) — itinerary is None on a miss; reused is None for
+        an exact hit, otherwise {"nights", "start_date"} of the plan that was
+        adapted. Near-match plans need fresh weather for the new dates.
+    """
+    family = _family(request)
+    key    = _plan_key(request, family)
+    cached = get_cached(key)
+    if cached:
+        logger.info(f"Cache hit: {key}")
+        return {**cached, "destination": request["to"].strip()}, None
+
+    if not PLAN_NEAR_MATCH:
+        return None, None
+
+    nights  = request.get("nights", 0)
+    season  = detect_season(request.get("start_date", ""))
+    entries = get_cached(_index_key(family)) or []
+    live    = []
+    best    = None
+    for entry in entries:
+        plan = get_cached(entry["key"])
+        if plan is None:
+            continue
+        live.append(entry)
+        if entry["season"] != season or entry["nights"] < nights:
+            continue
+        # Prefer the best model, then the closest length, then the most recent
+        rank = (entry.get("rank", 0), entry["nights"])
+        if best is None or rank < (best[0].get("rank", 0), best[0]["nights"]):
+            best = (entry, plan)
+
+    if len(live) != len(entries):
+        set_cached(_index_key(family), live)
+
+    if best is None:
+        return None, None
+
+    entry, plan = best
+    logger.info(f"Near-match cache hit: {entry['key']} ({entry['nights']} nights, {entry['start_date']}) "
+                f"for {nights} nights from {request.get('start_date')}")
+    plan = trim_plan(plan, nights + 1)
+    return {**plan, "destination": request["to"].strip()}, {
+        "nights": entry["nights"], "start_date": entry["start_date"],
+    }
+
+
+def cache_plan(request: dict, itinerary: dict) -> None:
+    """
+    Store a plan under its exact key and record it in its family index.
+
+    A plan from a fallback model gets FALLBACK_PLAN_TTL and is dropped if the
+    key already holds one from a better model.
+    """
+    family = _family(request)
+    key    = _plan_key(request, family)
+    rank   = model_rank(itinerary.get("model"))
+
+    existing = get_cached(key)
+    if existing and model_rank(existing.get("model")) < rank:
+        logger.info(f"Not caching {itinerary.get('model')} plan over a better one: {key}")
+        return
+    set_cached(key, itinerary, ttl=FALLBACK_PLAN_TTL if rank else None)
+
+    entries = [e for e in (get_cached(_index_key(family)) or []) if e["key"] != key]
+    entries.insert(0, {
+        "key":        key,
+        "nights":     request.get("nights", 0),
+        "start_date": request.get("start_date", ""),
+        "season":     detect_season(request.get("start_date", "")),
+        "rank":       rank,
+    })
+    set_cached(_index_key(family), entries[:FAMILY_INDEX_SIZE])
+
+
+def trim_plan(itinerary: dict, days: int) -> dict:
+    """
+    Cut a plan down to its first `days` days.
+
+    Accommodation is scaled by nights, food and transport by days, and
+    activities_inr follows the cost_inr of the activities that were dropped.
+    """
+    if len(itinerary.get("days", [])) <= days:
+        return itinerary
+
+    plan     = copy.deepcopy(itinerary)
+    old_days = len(plan["days"])
+    plan["days"] = plan["days"][:days]
+
+    summary = plan.get("budget_summary")
+    if summary:
+        night_ratio = (days - 1) / max(old_days - 1, 1)
+        day_ratio   = days / old_days
+        summary["accommodation_inr"] = int(int(summary.get("accommodation_inr") or 0) * night_ratio)
+        for k in ("food_inr", "transport_inr"):
+            summary[k] = int(int(summary.get(k) or 0) * day_ratio)
+        plan["budget_summary"] = recompute_budget(plan, itinerary)
+    return plan
+
+
+# ──────────────────────────────────────────────
+# Fingerprint
+# ──────────────────────────────────────────────
+
+def _family(request: dict) -> str:
+    """Hash of every output-affecting field except nights and start_date."""
+    canonical = {
+        "to":            canonical_name(request.get("to", "")),
+        "from":          canonical_name(request.get("from_location") or request.get("from") or ""),
+        "budget":        (request.get("budget") or "").strip().lower(),
+        "purposes":      _normalized_set(request.get("purposes")),
+        "pace":          (request.get("pace") or "moderate").strip().lower(),
+        "checkpoints":   _normalized_set(request.get("checkpoints")),
+        "accommodation": (request.get("accommodation") or "").strip().lower(),
+        "group_size":    (request.get("group_size") or "couple").strip().lower(),
+        "special_needs": " ".join((request.get("special_needs") or "").lower().split()),
+        "budget_bucket": _budget_bucket(request),
+    }
+    return _digest(canonical)
+
+
+def _plan_key(request: dict, family: str) -> str:
+    exact = _digest({
+        "family": family,
+        "nights": request.get("nights", 0),
+        "week":   _week(request.get("start_date", "")),
+    })
+    return build_cache_key("itin", canonical_name(request.get("to", "")), exact)
+
+
+def _index_key(family: str) -> str:
+    return build_cache_key("itinfam", family)
+
+
+def _budget_bucket(request: dict) -> Optional[int]:
+    """~10% bucket of the per-person daily budget when the user gave a total."""
+    if not request.get("total_budget") or request["total_budget"] <= 0:
+        return None
+    per_day = build_context(request)["per_person_per_day"]
+    return round(math.log(max(per_day, 1)) / math.log(BUDGET_BUCKET))
+
+
+def _week(date_str: str) -> str:
+    try:
+        year, week, _ = datetime.strptime(date_str, "%Y-%m-%d").isocalendar()
+    except (TypeError, ValueError):
+        return ""
+    return f"{year}-W{week:02d}"
+
+
+def _normalized_set(items) -> list:
+    return sorted({" ".join(str(i).lower().split()) for i in (items or []) if i and str(i).strip()})
+
+
+def _digest(data: dict) -> str:
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,212 @@
+"""
+plan_service.py — Server-side plan storage and LLM-free edits.
+
+Every plan returned by /generate-plan has a plan ID, so it can be reloaded
+or shared without regenerating. Edits (swap an activity for one of its
+alternatives, reorder, delete) are applied deterministically here — no
+Gemini call — and budget_summary is recomputed from the new cost_inr values.
+
+Plans live in their own persistent store (utils.cache.get_plan_store), never
+the per-process memory tier or the size-evicted cache table, so every worker
+sees the latest edit. Each record carries a version; update_plan() only
+writes over the version it read and raises PlanConflict if another request
+got there first.
+
+Requests served from the plan cache share one plan per cache key
+(shared_plan) instead of saving a copy on every hit. A shared plan is never
+edited in place: the first edit forks it into a plan of its own.
+"""
+
+import copy
+import logging
+import secrets
+import time
+from typing import Optional
+
+from utils.cache import get_plan_store
+
+logger = logging.getLogger(__name__)
+
+PLAN_TTL = 60 * 60 * 24 * 90   # 90 days
+
+
+class PlanConflict(Exception):
+    """The stored plan changed (or expired) since the caller read it."""
+
+
+def save_plan(itinerary: dict, request: dict, weather: dict = None) -> str:
+    """
+    Store a new plan (version 1) and return its ID.
+
+    Args:
+        itinerary: Itinerary dict as produced by gemini_service
+        request:   The originating request (by alias, i.e. with "from")
+        weather:   Weather dict sent alongside the plan
+    """
+    return _save(itinerary, request, weather)["plan_id"]
+
+
+def shared_plan(cache_key: str, itinerary: dict, request: dict, weather: dict = None) -> dict:
+    """
+    Return the plan record shared by every request for a plan-cache key.
+
+    Hits only read: a new plan is saved (and the key pointed at it) only
+    when the key has none yet or its plan holds a different itinerary, i.e.
+    once per generation. Arguments as for save_plan().
+    """
+    store  = get_plan_store()
+    ref    = store.get(_ref_key(cache_key))
+    record = get_plan(ref[0]["plan_id"]) if ref is not None else None
+    if record is None or record["itinerary"] != itinerary:
+        record = _save(itinerary, request, weather, shared=True)
+        store.set(_ref_key(cache_key), {"plan_id": record["plan_id"]}, time.time() + PLAN_TTL)
+    return record
+
+
+def get_plan(plan_id: str) -> Optional[dict]:
+    """Return the stored plan record, or None if unknown/expired."""
+    hit = get_plan_store().get(_key(plan_id))
+    return hit[0] if hit is not None else None
+
+
+def update_plan(record: dict, itinerary: dict, weather: dict = None) -> dict:
+    """
+    Replace the itinerary of a plan previously read with get_plan().
+
+    The write only lands if the stored version is still record's version;
+    returns the new record (version + 1). A shared plan is left as it is and
+    the edit saved as a new plan — callers must hand back the returned plan_id.
+
+    Raises:
+        PlanConflict: if the plan was updated or expired in the meantime.
+    """
+    weather = record.get("weather") if weather is None else weather
+    if record.get("shared"):
+        return _save(itinerary, record.get("request", {}), weather)
+
+    version = record.get("version")
+    updated = _record(record["plan_id"], (version or 0) + 1, itinerary, record.get("request", {}), weather)
+    stored  = get_plan_store().compare_and_set(
+        _key(record["plan_id"]), updated, time.time() + PLAN_TTL, "version", version,
+    )
+    if not stored:
+        raise PlanConflict(f"Plan {record['plan_id']} changed since version {version}.")
+    return updated
+
+
+def apply_operations(itinerary: dict, operations: list) -> dict:
+    """
+    Apply edit operations to a copy of an itinerary.
+
+    Operations (day is 1-based, activity indexes 0-based):
+      {"op": "swap",   "day", "activity", "alternative"} — promote an alternative;
+                        the replaced activity joins the end of the alternatives
+      {"op": "move",   "day", "activity", "to_index", "to_day"?} — reorder,
+                        optionally into another day
+      {"op": "delete", "day", "activity"}
+
+    Raises:
+        ValueError: if an operation refers to a day/activity/alternative
+                    that does not exist.
+    """
+    plan = copy.deepcopy(itinerary)
+    days = plan.get("days", [])
+
+    for n, op in enumerate(operations, start=1):
+        kind       = op["op"]
+        activities = _activities(days, op["day"], n)
+        idx        = op["activity"]
+        if not 0 <= idx < len(activities):
+            raise ValueError(f"Operation {n}: day {op['day']} has no activity {idx}.")
+
+        if kind == "swap":
+            current = activities[idx]
+            alts    = current.get("alternatives") or []
+            alt_idx = op.get("alternative")
+            if alt_idx is None or not 0 <= alt_idx < len(alts):
+                raise ValueError(f"Operation {n}: activity {idx} has no alternative {alt_idx}.")
+            chosen   = alts[alt_idx]
+            demoted  = {k: current[k] for k in ("title", "description", "category", "cost_inr") if k in current}
+            remaining = alts[:alt_idx] + alts[alt_idx + 1:] + [demoted]
+            activities[idx] = {**current, **chosen, "alternatives": remaining}
+
+        elif kind == "move":
+            target_day = op.get("to_day") or op["day"]
+            target     = _activities(days, target_day, n)
+            to_idx     = op.get("to_index")
+            moved      = activities.pop(idx)
+            if to_idx is None or not 0 <= to_idx <= len(target):
+                activities.insert(idx, moved)
+                raise ValueError(f"Operation {n}: invalid to_index {to_idx}.")
+            target.insert(to_idx, moved)
+
+        elif kind == "delete":
+            activities.pop(idx)
+
+        else:
+            raise ValueError(f"Operation {n}: unknown op '{kind}'.")
+
+    plan["budget_summary"] = recompute_budget(plan, itinerary)
+    return plan
+
+
+def recompute_budget(plan: dict, original: dict) -> dict:
+    """
+    Rebuild budget_summary after edits.
+
+    activities_inr moves by the change in the summed cost_inr of all
+    activities (so Gemini's own scaling of the original figure is kept), and
+    total_inr is re-added from its components.
+    """
+    summary = dict(plan.get("budget_summary") or {})
+    if not summary:
+        return summary
+
+    delta = _activity_cost(plan) - _activity_cost(original)
+    summary["activities_inr"] = max(0, int(summary.get("activities_inr", 0) + delta))
+    summary["total_inr"] = sum(
+        int(summary.get(k) or 0)
+        for k in ("accommodation_inr", "food_inr", "transport_inr", "activities_inr")
+    )
+    return summary
+
+
+def _activity_cost(itinerary: dict) -> int:
+    return sum(
+        int(a.get("cost_inr") or 0)
+        for d in itinerary.get("days", [])
+        for a in d.get("activities", [])
+    )
+
+
+def _activities(days: list, day: int, n: int) -> list:
+    if not 1 <= day <= len(days):
+        raise ValueError(f"Operation {n}: plan has no day {day}.")
+    return days[day - 1].setdefault("activities", [])
+
+
+def _save(itinerary: dict, request: dict, weather: Optional[dict], shared: bool = False) -> dict:
+    record = _record(secrets.token_urlsafe(9), 1, itinerary, request, weather)
+    if shared:
+        record["shared"] = True
+    get_plan_store().set(_key(record["plan_id"]), record, time.time() + PLAN_TTL)
+    return record
+
+
+def _record(plan_id: str, version: int, itinerary: dict, request: dict, weather: Optional[dict]) -> dict:
+    return {
+        "plan_id":    plan_id,
+        "version":    version,
+        "updated_at": time.time(),
+        "request":    request,
+        "weather":    weather or {},
+        "itinerary":  itinerary,
+    }
+
+
+def _key(plan_id: str) -> str:
+    return f"plan_{plan_id}"
+
+
+def _ref_key(cache_key: str) -> str:
+    return f"shared_{cache_key}"
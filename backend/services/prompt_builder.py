@@ -0,0 +1,289 @@
+"""
+prompt_builder.py — Token-budgeted itinerary prompt with per-section accounting.
+
+The prompt is laid out as a static prefix followed by the per-request part:
+
+  prefix:   role, instructions and the JSON output schema (full, or the
+            compact wire format — see wire_format.py) — byte-identical for
+            every request, so provider-side context caching can reuse it
+  request:  trip details, weather and destination intelligence
+
+Token counts are estimated locally (no API call) at ~4 characters per token,
+which is close enough for budgeting. When the whole prompt would exceed
+PROMPT_TOKEN_BUDGET, the summary is first cut back to whole sentences
+(down to MIN_SUMMARY_CHARS), then scraped items are ranked (matches for the
+trip's purposes and checkpoints first, then scraper order) and the
+lowest-ranked are dropped.
+"""
+
+import logging
+import math
+import re
+
+from config import PROMPT_TOKEN_BUDGET, ITINERARY_WIRE_FORMAT, ALTERNATIVES_SOURCE
+from services.wire_format import compact_schema
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MIN_SUMMARY_CHARS = 400        # summary is never trimmed below this
+
+# Destination lists in the order they are shown, with their per-list caps
+SECTIONS = (("attractions", "Attractions", 8), ("activities", "Activities", 6), ("food", "Local Food", 6))
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"the", "and", "of", "a", "an", "in", "to", "for", "on", "at", "with", "tour", "visit"}
+
+
+INSTRUCTIONS = """You are an expert travel planner. Generate a day-by-day itinerary for the trip described under TRIP DETAILS below.
+
+INSTRUCTIONS
+- Plan exactly the number of days stated in TRIP DETAILS
+- Match activities to the stated purposes and pace
+- Stay within the budget tier
+- Include one local food experience per day
+- Use the destination data below as factual grounding
+- If weather data is provided, suggest weather-appropriate activities
+"""
+
+ALTERNATIVES_INSTRUCTION = (
+    "- For EACH activity provide exactly 3 alternatives drawn from the destination data "
+    "(different category or cost tier)\n"
+)
+
+_FULL_ALTERNATIVES = """,
+          "alternatives": [
+            {"title": "string", "description": "string", "category": "sightseeing | food | adventure | culture | relaxation", "cost_inr": 0},
+            {"title": "string", "description": "string", "category": "sightseeing | food | adventure | culture | relaxation", "cost_inr": 0},
+            {"title": "string", "description": "string", "category": "sightseeing | food | adventure | culture | relaxation", "cost_inr": 0}
+          ]"""
+
+SCHEMA = """
+Return ONLY valid JSON. No markdown. No code fences. No commentary. Just the raw JSON object:
+{
+  "destination": "destination name as given in TRIP DETAILS",
+  "days": [
+    {
+      "day": 1,
+      "theme": "string",
+      "activities": [
+        {
+          "time": "09:00",
+          "period": "morning",
+          "title": "string",
+          "description": "string",
+          "category": "sightseeing | food | adventure | culture | relaxation",
+          "cost_inr": 0<<ALTERNATIVES>>
+        }
+      ]
+    }
+  ],
+  "budget_summary": {
+    "accommodation_inr": 0,
+    "food_inr": 0,
+    "transport_inr": 0,
+    "activities_inr": 0,
+    "total_inr": 0
+  },
+  "seasonal_insight": {
+    "badge_text": "❄️ Winter — Peak Snow Season",
+    "badge_color": "#06b6d4 | #ef4444 | #f59e0b | #f97316",
+    "description": "Short explanation of why this season is good/bad for this specific destination.",
+    "tips": ["tip1", "tip2", "tip3"]
+  },
+  "transport_intelligence": {
+    "recommended_mode": "Flight | Train | Bus | Car",
+    "approx_reason": "Why this mode suits the distance from the origin to the destination",
+    "nearest_airport": "Name of nearest airport and distance",
+    "major_railway_station": "Name of major railway station and distance",
+    "road_connectivity": "Notes on highway access or bus routes"
+  },
+  "tips": ["tip1", "tip2", "tip3"]
+}
+"""
+
+
+def _prefix(wire_format: str, alternatives: bool) -> str:
+    instructions = INSTRUCTIONS + (ALTERNATIVES_INSTRUCTION if alternatives else "")
+    if wire_format == "compact":
+        return instructions + compact_schema(alternatives)
+    return instructions + SCHEMA.replace("<<ALTERNATIVES>>", _FULL_ALTERNATIVES if alternatives else "")
+
+
+# Static, request-independent prefixes (keep free of any per-request values),
+# keyed by (wire format, whether Gemini writes the alternatives)
+PREFIXES = {(fmt, alts): _prefix(fmt, alts) for fmt in ("full", "compact") for alts in (True, False)}
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count for a piece of prompt text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def build_itinerary_prompt(context: dict, data: dict, request: dict, weather: dict = None,
+                           budget: int = None, wire_format: str = None, alternatives: bool = None) -> tuple:
+    """
+    Build the itinerary prompt within a token budget.
+
+    Args:
+        context: Output of logic_service.build_context()
+        data:    Merged destination data from the scraper
+        request: Raw request dict
+        weather: Output of weather_service.get_weather() (optional)
+        budget:  Token budget for the whole prompt (default PROMPT_TOKEN_BUDGET)
+        wire_format: "full" or "compact" output schema (default ITINERARY_WIRE_FORMAT)
+        alternatives: Whether the model writes each activity's alternatives
+                 (default: ALTERNATIVES_SOURCE is "llm"); pass True when the
+                 local index has nothing to offer for this destination
+
+    Returns:
+        (prompt, stats) — stats maps each section to its estimated tokens,
+        plus "total", "budget" and "dropped_items".
+    """
+    budget  = budget or PROMPT_TOKEN_BUDGET
+    wire_format = wire_format if wire_format in ("full", "compact") else ITINERARY_WIRE_FORMAT
+    alternatives = ALTERNATIVES_SOURCE == "llm" if alternatives is None else alternatives
+    prefix  = PREFIXES[(wire_format, alternatives)]
+    trip    = _trip_section(context, request)
+    weather_text = _weather_section(weather or {}, request)
+
+    fixed     = estimate_tokens(prefix) + estimate_tokens(trip) + estimate_tokens(weather_text)
+    available = budget - fixed
+    destination, dropped = _destination_section(data, context, available)
+
+    prompt = prefix + trip + weather_text + destination
+    stats  = {
+        "prefix":        estimate_tokens(prefix),
+        "trip":          estimate_tokens(trip),
+        "weather":       estimate_tokens(weather_text),
+        "destination":   estimate_tokens(destination),
+        "total":         estimate_tokens(prompt),
+        "budget":        budget,
+        "dropped_items": dropped,
+    }
+    logger.info(
+        f"Prompt ≈{stats['total']} tokens (budget {budget}): "
+        f"instructions+schema {stats['prefix']}, trip {stats['trip']}, "
+        f"weather {stats['weather']}, destination {stats['destination']}"
+        + (f" — dropped {dropped} scraped item(s)" if dropped else "")
+    )
+    return prompt, stats
+
+
+# ──────────────────────────────────────────────
+# Sections
+# ──────────────────────────────────────────────
+
+def _trip_section(context: dict, request: dict) -> str:
+    lines = [
+        "",
+        "TRIP DETAILS",
+        f"- From:     {request.get('from_location', request.get('from', ''))}",
+        f"- To:       {request['to']}",
+        f"- Duration: {context['days']} days / {context['nights']} nights",
+        f"- Season:   {context['season']}",
+        f"- Budget:   {context['budget_tier']} tier — ₹{context['per_person_per_day']:,}/person/day · "
+        f"₹{context['total_budget_inr']:,} total for {context['group_count']} {context['group_label']}(s) "
+        f"over {context['days']} days",
+        f"- Purposes: {', '.join(context['purposes']) or 'general sightseeing'}",
+        f"- Pace:     {context['pace']}",
+        f"- Group:    {request.get('group_size', 'couple')}",
+    ]
+    if context["checkpoints"]:
+        lines.append(f"- Checkpoints: {', '.join(context['checkpoints'])}")
+    if request.get("special_needs"):
+        lines.append(f"- Special needs: {request['special_needs']}")
+    return "\n".join(lines) + "\n"
+
+
+def _weather_section(weather: dict, request: dict) -> str:
+    if weather.get("days") and len(weather["days"]) > 1:
+        day_lines = "\n".join(
+            f"- Day {i + 1} ({d['date']}): {d.get('condition', 'Unknown')}, "
+            f"{d.get('temp_min_c', '?')}–{d.get('temp_max_c', '?')}°C, rain {d.get('rain_mm', 0)} mm"
+            for i, d in enumerate(weather["days"])
+        )
+        return f"""
+WEATHER FORECAST (per day)
+{day_lines}
+- Packing tip: {weather.get('tip', '')}
+Use this to plan outdoor activities on the better days and suggest clothing notes.
+"""
+    if weather:
+        return f"""
+WEATHER FORECAST (for Day 1 — {request.get('start_date', '')})
+- Condition:   {weather.get('condition', 'Unknown')}
+- Max Temp:    {weather.get('temp_max_c', '?')}°C
+- Min Temp:    {weather.get('temp_min_c', '?')}°C
+- Rain:        {weather.get('rain_mm', 0)} mm
+- Packing tip: {weather.get('tip', '')}
+Use this to suggest weather-appropriate activities and clothing notes.
+"""
+    return ""
+
+
+def _destination_section(data: dict, context: dict, available: int) -> tuple:
+    """
+    Render destination intelligence into at most `available` tokens.
+
+    Returns:
+        (text, number of scraped items dropped to fit)
+    """
+    lists   = {key: list(data.get(key, []))[:cap] for key, _, cap in SECTIONS}
+    summary = data.get("summary", "") or ""
+    total   = sum(len(items) for items in lists.values())
+
+    text = _render_destination(summary, lists)
+    if estimate_tokens(text) <= available:
+        return text, 0
+
+    # Cut the summary back to whole sentences
+    while estimate_tokens(text) > available and len(summary) > MIN_SUMMARY_CHARS:
+        cut     = summary.rfind(". ", MIN_SUMMARY_CHARS, len(summary) - 1)
+        summary = summary[:cut + 1] if cut > 0 else summary[:MIN_SUMMARY_CHARS]
+        text    = _render_destination(summary, lists)
+
+    # Still over: drop the lowest-ranked items, one at a time, until it fits
+    ranked = _rank_items(lists, context)
+    while ranked and estimate_tokens(text) > available:
+        key, item = ranked.pop()
+        lists[key].remove(item)
+        text = _render_destination(summary, lists)
+
+    return text, total - sum(len(items) for items in lists.values())
+
+
+def _render_destination(summary: str, lists: dict) -> str:
+    parts = ["", "DESTINATION INTELLIGENCE", f"Summary: {summary}", ""]
+    for key, title, _ in SECTIONS:
+        items = lists[key]
+        if items:
+            parts.append(f"{title}:")
+            parts.extend(f"- {item}" for item in items)
+        elif key != "activities":
+            parts.extend([f"{title}:", "Not available"])
+    return "\n".join(parts) + "\n"
+
+
+def _rank_items(lists: dict, context: dict) -> list:
+    """
+    Order every scraped item best-first.
+
+    Items mentioning a checkpoint or a purpose word rank highest; otherwise
+    lists are interleaved in scraper order, so each keeps its top entries.
+    """
+    wanted = _words(" ".join(context.get("checkpoints") or []))
+    topics = _words(" ".join(context.get("purposes") or []))
+
+    scored = []
+    for key, items in lists.items():
+        for position, item in enumerate(items):
+            words = _words(item)
+            score = 2 * len(words & wanted) + len(words & topics)
+            scored.append((-score, position, key, item))
+    scored.sort(key=lambda s: (s[0], s[1]))
+    return [(key, item) for _, _, key, item in scored]
+
+
+def _words(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS and len(w) > 2}
@@ -6,17 +6,42 @@ Sources:
   2. Wikivoyage  — travel-focused See/Do/Eat content (global)
   3. Incredible India — experiential enrichment (Indian destinations only)
 
-All scrapers are timeout-controlled and fail silently.
+All scrapers are timeout-controlled and fail silently. Sources are fetched
+in parallel under SCRAPE_DEADLINE, with optional hedged retries for slow ones.
 The only function the backend should call is get_destination_data().
+
+Caching (independent of the itinerary cache):
+  - merged destination data, for DESTINATION_TTL
+  - each source page's parsed result plus its ETag/Last-Modified, fresh for
+    PAGE_FRESH_TTL; after that the page is revalidated with a conditional
+    GET, and a 304 reuses the stored result without downloading or parsing.
+  - with WIKI_FETCH_MODE "api", each Wikipedia/Wikivoyage article's parsed
+    sections, for PAGE_FRESH_TTL (the parse API offers no revalidation).
 """
 
+import contextvars
+import html as html_lib
 import logging
 import re
-import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
 from bs4 import BeautifulSoup
 from urllib.parse import quote
 
-from utils.helpers import dedupe_limit
+from config import (
+    SCRAPE_DEADLINE, SCRAPE_HEDGE, SCRAPE_HEDGE_PERCENTILE, WIKI_FETCH_MODE,
+    WIKIPEDIA_BASE_URL, WIKIVOYAGE_BASE_URL, INCREDIBLE_INDIA_BASE_URL,
+)
+from utils import http_client
+from utils.cache import get_cached, set_cached
+from utils.helpers import dedupe_limit, build_cache_key
+from utils.mw_sections import Page, extract_sections
+from utils import tracing
+from utils.metrics import SCRAPE_SECONDS, SOURCE_FAILURES
+from utils.singleflight import SingleFlight
 
 logger  = logging.getLogger(__name__)
 HEADERS = {"User-Agent": "NavisenseBot/1.0 (travel planner research tool)"}
@@ -26,6 +51,14 @@ WIKI_TIMEOUT    = 3
 VOYAGE_TIMEOUT  = 3
 INDIA_TIMEOUT   = 2
 
+# Cache lifetimes (seconds). Pages are kept for PAGE_STORE_TTL so a stale one
+# can still be revalidated; PARSER_VERSION invalidates them when parsing changes.
+DESTINATION_TTL         = 60 * 60 * 24
+DESTINATION_PARTIAL_TTL = 60 * 15       # some sources missing — retry them sooner
+PAGE_FRESH_TTL          = 60 * 60 * 24 * 3
+PAGE_STORE_TTL          = 60 * 60 * 24 * 30
+PARSER_VERSION          = 2
+
 # Indian destinations that trigger Incredible India scraping
 INDIAN_STATES = {
     "goa", "kerala", "karnataka", "rajasthan", "tamil nadu",
@@ -38,6 +71,17 @@ INDIAN_STATES = {
     "rishikesh", "haridwar", "ooty", "coorg", "munnar",
 }
 
+# Hedging: until a source has HEDGE_MIN_SAMPLES latencies recorded, the hedge
+# fires after HEDGE_DEFAULT_FRACTION of that source's timeout.
+HEDGE_MIN_SAMPLES      = 20
+HEDGE_DEFAULT_FRACTION = 0.5
+
+_pool      = ThreadPoolExecutor(max_workers=32, thread_name_prefix="scraper")
+_sections  = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sections")   # parse API section fetches
+_latencies = {}                     # source name → deque of recent successful latencies
+_lat_lock  = threading.Lock()
+_flights   = SingleFlight("scraper")
+
 
 # ──────────────────────────────────────────────
 # Public entry point
@@ -47,38 +91,299 @@ def get_destination_data(destination: str) -> dict:
     """
     Aggregate destination data from all available sources.
 
-    This is the only function main.py should call.
+    This is the only function main.py should call. Sources are fetched in
+    parallel; whatever has arrived when SCRAPE_DEADLINE expires is merged
+    and the rest is dropped. Concurrent calls for the same destination share
+    one set of fetches.
 
     Args:
         destination: City or region name (e.g. "Goa", "Paris")
 
     Returns:
-        Merged dict with keys: summary, attractions, activities, food
+        Merged dict with keys: summary, attractions, activities, food, sources
     """
-    wiki_data   = {}
-    voyage_data = {}
-    india_data  = {}
+    cache_key = build_cache_key("dest", destination.strip())
+    cached    = get_cached(cache_key)
+    tracing.annotate(destination_cache="hit" if cached else "miss")
+    if cached:
+        logger.info(f"Destination cache hit: {destination}")
+        return cached
 
-    try:
-        wiki_data = scrape_wikipedia(destination)
-        logger.info(f"Wikipedia: {len(wiki_data.get('attractions', []))} attractions")
-    except Exception as e:
-        logger.warning(f"Wikipedia failed for {destination}: {e}")
+    return _flights.do(cache_key, _scrape_destination, destination, cache_key)
 
-    try:
-        voyage_data = scrape_wikivoyage(destination)
-        logger.info(f"Wikivoyage: {len(voyage_data.get('attractions', []))} attractions")
-    except Exception as e:
-        logger.warning(f"Wikivoyage failed for {destination}: {e}")
 
+def _scrape_destination(destination: str, cache_key: str) -> dict:
+    scrapers = {
+        "wikipedia":  (scrape_wikipedia,  WIKI_TIMEOUT),
+        "wikivoyage": (scrape_wikivoyage, VOYAGE_TIMEOUT),
+    }
     if is_indian_destination(destination):
+        scrapers["incredible_india"] = (scrape_incredible_india, INDIA_TIMEOUT)
+
+    results = _fetch_all(destination, scrapers, SCRAPE_DEADLINE)
+
+    for name, data in results.items():
+        logger.info(f"{name}: {len(data.get('attractions', []))} attractions")
+
+    merged = merge_destination_data(
+        results.get("wikipedia",  {}),
+        results.get("wikivoyage", {}),
+        results.get("incredible_india", {}),
+    )
+    # A source that missed the deadline this time may answer next time, so
+    # partial results are only kept briefly.
+    if merged["sources"]:
+        complete = set(merged["sources"]) == set(scrapers)
+        set_cached(cache_key, merged, ttl=DESTINATION_TTL if complete else DESTINATION_PARTIAL_TTL)
+    return merged
+
+
+def _fetch_all(destination: str, scrapers: dict, deadline: float) -> dict:
+    """
+    Run every scraper in parallel and collect results until the deadline.
+
+    With SCRAPE_HEDGE on, a source that is still pending after its hedge
+    delay gets one duplicate request; the first successful answer wins and
+    the loser is ignored.
+
+    Returns:
+        {source name: scraped dict} for the sources that succeeded in time.
+    """
+    started  = time.monotonic()
+    end_at   = started + deadline
+    pending  = {}                   # future → source name
+    hedge_at = {}                   # source name → monotonic time to fire a hedge
+    results  = {}
+
+    for name, (func, timeout) in scrapers.items():
+        pending[_submit(name, func, destination)] = name
+        if SCRAPE_HEDGE:
+            hedge_at[name] = started + _hedge_delay(name, timeout)
+
+    while pending:
+        now     = time.monotonic()
+        wake_at = min([end_at] + list(hedge_at.values()))
+        done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = pending.pop(future)
+            if name in results:
+                continue
+            try:
+                results[name] = future.result()
+                hedge_at.pop(name, None)
+            except Exception as e:
+                if name not in pending.values():
+                    logger.warning(f"{name} failed for {destination}: {e}")
+                    SOURCE_FAILURES.inc(source=name, reason="error")
+                    tracing.annotate_source(name, status="error", error=str(e)[:120])
+
+        # Drop the losing twin of any source that has already answered
+        for future, name in list(pending.items()):
+            if name in results:
+                del pending[future]
+                future.cancel()
+
+        now = time.monotonic()
+        if now >= end_at:
+            break
+
+        for name, fire_at in list(hedge_at.items()):
+            if now >= fire_at:
+                del hedge_at[name]
+                if name not in results and name in pending.values():
+                    logger.info(f"{name}: slow response, sending hedged request")
+                    pending[_submit(name, scrapers[name][0], destination)] = name
+
+    for future in pending:
+        future.cancel()
+    for name in set(pending.values()) - set(results):
+        logger.warning(f"{name} missed the {deadline:.1f}s scrape deadline for {destination}")
+        SOURCE_FAILURES.inc(source=name, reason="deadline")
+        tracing.annotate_source(name, status="deadline")
+
+    return results
+
+
+def _submit(name: str, func, destination: str):
+    """Start one source fetch on the scraper pool, in the caller's context (for tracing)."""
+    return _pool.submit(contextvars.copy_context().run, _timed, name, func, destination)
+
+
+def _timed(name: str, func, destination: str) -> dict:
+    """Call a scraper and record its latency (kept for hedging only when it succeeds)."""
+    start = time.monotonic()
+    try:
+        result = func(destination)
+    except Exception:
+        SCRAPE_SECONDS.observe(time.monotonic() - start, source=name, outcome="error")
+        raise
+    elapsed = time.monotonic() - start
+    SCRAPE_SECONDS.observe(elapsed, source=name, outcome="ok")
+    tracing.annotate_source(name, status="ok", ms=round(elapsed * 1000, 1))
+    with _lat_lock:
+        _latencies.setdefault(name, deque(maxlen=200)).append(elapsed)
+    return result
+
+
+def _hedge_delay(name: str, timeout: float) -> float:
+    """Seconds to wait before hedging a source: its recent latency percentile."""
+    with _lat_lock:
+        samples = sorted(_latencies.get(name, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return timeout * HEDGE_DEFAULT_FRACTION
+    idx = min(len(samples) - 1, int(len(samples) * SCRAPE_HEDGE_PERCENTILE))
+    return samples[idx]
+
+
+def fetch_page(url: str, timeout: float, parse, source: str = None) -> dict:
+    """
+    Fetch a source page and return parse(html), using the page cache.
+
+    A fresh cached result is returned as-is. A stale one is revalidated with
+    If-None-Match / If-Modified-Since; on 304 the stored result is reused
+    and its freshness renewed. `source` names the page in the request trace.
+    """
+    cache_key = build_cache_key("page", url)
+    entry     = get_cached(cache_key)
+    if entry and entry.get("parser") != PARSER_VERSION:
+        entry = None
+
+    now = time.time()
+    if entry and now - entry["fetched_at"] < PAGE_FRESH_TTL:
+        tracing.annotate_source(source or url, page="cached", bytes=0)
+        return entry["parsed"]
+
+    headers = dict(HEADERS)
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = http_client.get(url, headers=headers, timeout=timeout)
+
+    if resp.status_code == 304 and entry:
+        logger.info(f"Page not modified: {url}")
+        tracing.annotate_source(source or url, page="not_modified", bytes=0)
+        set_cached(cache_key, {**entry, "fetched_at": now}, ttl=PAGE_STORE_TTL)
+        return entry["parsed"]
+
+    resp.raise_for_status()
+    tracing.annotate_source(source or url, page="fetched", bytes=len(resp.content))
+    parsed = parse(resp.text)
+    set_cached(cache_key, {
+        "url":           url,
+        "parser":        PARSER_VERSION,
+        "etag":          resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "fetched_at":    now,
+        "parsed":        parsed,
+    }, ttl=PAGE_STORE_TTL)
+    return parsed
+
+
+def fetch_article(base_url: str, destination: str, timeout: float, wanted, build, parse, source: str) -> dict:
+    """
+    Fetch a Wikipedia/Wikivoyage article for `destination`.
+
+    In "api" mode only the sections for which wanted(title) is true are read
+    (see fetch_sections) and build(Page) makes the result; if the API fails,
+    or in "html" mode, the full page goes through fetch_page and parse(html).
+    timeout bounds the whole call: the fallback only gets what is left of it.
+    """
+    title    = destination.strip().replace(" ", "_")
+    deadline = time.monotonic() + timeout
+    if WIKI_FETCH_MODE == "api":
         try:
-            india_data = scrape_incredible_india(destination)
-            logger.info(f"Incredible India: {len(india_data.get('attractions', []))} items")
+            return fetch_sections(base_url, title, timeout, wanted, build, source)
         except Exception as e:
-            logger.warning(f"Incredible India failed for {destination}: {e}")
+            logger.info(f"{source}: parse API failed ({e}) — fetching the full page")
+        timeout = _remaining(deadline)
+    return fetch_page(f"{base_url}/wiki/{quote(title)}", timeout, parse, source)
 
-    return merge_destination_data(wiki_data, voyage_data, india_data)
+
+def fetch_sections(base_url: str, title: str, timeout: float, wanted, build, source: str = None) -> dict:
+    """
+    Read only the lead and the wanted sections of an article via the MediaWiki
+    parse API, and return build(Page).
+
+    The first request resolves redirects and returns the section index; the
+    lead and every wanted top-level section (subsections come with it) are
+    then fetched in parallel. All of it shares one timeout-second budget, so
+    the section requests only get what the index left. The result is cached
+    for PAGE_FRESH_TTL.
+
+    Raises:
+        TimeoutError: if the budget runs out before every section arrives.
+    """
+    api       = f"{base_url}/w/api.php"
+    cache_key = build_cache_key("sections", f"{api}|{title}")
+    entry     = get_cached(cache_key)
+    if entry and entry.get("parser") == PARSER_VERSION:
+        tracing.annotate_source(source or title, page="cached", bytes=0)
+        return entry["parsed"]
+
+    deadline    = time.monotonic() + timeout
+    index, size = _parse_api(api, timeout, page=title, prop="sections", redirects=1)
+    numbers     = _wanted_sections(index.get("sections", []), wanted)
+    left        = _remaining(deadline)
+    futures     = [
+        _sections.submit(contextvars.copy_context().run, _parse_api, api, left,
+                         page=index["title"], prop="text", section=number,
+                         disableeditsection=1, disabletoc=1, disablelimitreport=1)
+        for number in ["0", *numbers]
+    ]
+    page = Page()
+    try:
+        for future in futures:
+            part, part_size = future.result(timeout=_remaining(deadline))
+            page.extend(extract_sections(part.get("text", "")))
+            size += part_size
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    tracing.annotate_source(source or title, page="api", bytes=size, sections=len(numbers))
+
+    parsed = build(page)
+    set_cached(cache_key, {"parsed": parsed, "parser": PARSER_VERSION}, ttl=PAGE_FRESH_TTL)
+    return parsed
+
+
+def _parse_api(api: str, timeout: float, **params) -> tuple:
+    """One action=parse call; returns (the "parse" object, response bytes)."""
+    resp = http_client.get(api, params={"action": "parse", "format": "json", "formatversion": 2, **params},
+                           headers=HEADERS, timeout=timeout)
+    resp.raise_for_status()
+    data = resp.json()
+    if "error" in data:
+        raise ValueError(f"parse API error: {data['error'].get('code')}")
+    return data["parse"], len(resp.content)
+
+
+def _remaining(deadline: float) -> float:
+    """Seconds left before a time.monotonic() deadline; raises TimeoutError once it has passed."""
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("scrape budget spent")
+    return left
+
+
+def _wanted_sections(sections: list, wanted) -> list:
+    """Index numbers of the sections to fetch, skipping those inside one already chosen."""
+    chosen, numbers = [], []
+    for section in sections:
+        index = str(section.get("index", ""))
+        if not index.isdigit():                     # transcluded from another page
+            continue
+        number = section.get("number", "")
+        if any(number.startswith(parent + ".") for parent in numbers):
+            continue
+        title = html_lib.unescape(re.sub(r"<[^>]+>", "", section.get("line", "")))
+        if wanted(" ".join(title.split()).lower()):
+            chosen.append(index)
+            numbers.append(number)
+    return chosen
 
 
 # ──────────────────────────────────────────────
@@ -97,50 +402,49 @@ WIKI_SKIP_SECTIONS = {
     "references", "see also", "external links", "notes", "further reading",
 }
 
+WIKI_FOOD_SECTIONS = {"food", "cuisine", "restaurants", "eat"}
+
+_CITATION = re.compile(r"\[\d+\]")
+
 
 def scrape_wikipedia(destination: str) -> dict:
     """Scrape Wikipedia for destination attractions and food."""
-    url  = f"https://en.wikipedia.org/wiki/{quote(destination.replace(' ', '_'))}"
-    resp = requests.get(url, headers=HEADERS, timeout=WIKI_TIMEOUT)
-    resp.raise_for_status()
+    return fetch_article(WIKIPEDIA_BASE_URL, destination, WIKI_TIMEOUT,
+                         _wiki_wanted, _wiki_result, parse_wikipedia, "wikipedia")
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+def parse_wikipedia(html: str) -> dict:
+    """Extract summary, attractions and food from a Wikipedia article page."""
+    return _wiki_result(extract_sections(html))
+
+
+def _wiki_result(page: Page) -> dict:
     return {
-        "summary":     _wiki_summary(soup),
-        "attractions": _wiki_list_items(soup, WIKI_TRAVEL_SECTIONS - {"food", "cuisine", "restaurants"}),
+        "summary":     _CITATION.sub("", page.first_paragraph(80))[:400],
+        "attractions": _wiki_list_items(page, WIKI_TRAVEL_SECTIONS - {"food", "cuisine", "restaurants"}),
         "activities":  [],
-        "food":        _wiki_list_items(soup, {"food", "cuisine", "restaurants", "eat"}),
+        "food":        _wiki_list_items(page, WIKI_FOOD_SECTIONS),
     }
 
 
-def _wiki_summary(soup: BeautifulSoup) -> str:
-    content = soup.find("div", {"id": "mw-content-text"})
-    if not content:
-        return ""
-    for p in content.find_all("p", recursive=False):
-        text = p.get_text(" ", strip=True)
-        if len(text) > 80:
-            return re.sub(r"\[\d+\]", "", text)[:400]
-    return ""
+def _wiki_wanted(title: str) -> bool:
+    """Sections worth fetching: any _wiki_list_items would read."""
+    return (any(kw in title for kw in WIKI_TRAVEL_SECTIONS | WIKI_FOOD_SECTIONS)
+            and not any(kw in title for kw in WIKI_SKIP_SECTIONS))
 
 
-def _wiki_list_items(soup: BeautifulSoup, target_sections: set) -> list:
-    """Extract list items from headings whose text matches target_sections."""
+def _wiki_list_items(page: Page, target_sections: set) -> list:
+    """List items from sections whose title matches target_sections (and no skipped topic)."""
     items = []
-    for heading in soup.find_all(["h2", "h3"]):
-        heading_text = heading.get_text(" ", strip=True).lower()
-        if any(kw in heading_text for kw in target_sections):
-            if any(kw in heading_text for kw in WIKI_SKIP_SECTIONS):
-                continue
-            for sib in heading.find_next_siblings():
-                if sib.name in ["h2", "h3"]:
-                    break
-                if sib.name in ["ul", "ol"]:
-                    for li in sib.find_all("li"):
-                        text = li.get_text(" ", strip=True)
-                        text = re.sub(r"\[\d+\]", "", text)
-                        if 5 < len(text) < 120:
-                            items.append(text)
+    for section in page.sections:
+        if not any(kw in section.title for kw in target_sections):
+            continue
+        if any(kw in section.title for kw in WIKI_SKIP_SECTIONS):
+            continue
+        for text in section.list_items:
+            text = _CITATION.sub("", text)
+            if 5 < len(text) < 120:
+                items.append(text)
     return items
 
 
@@ -155,56 +459,47 @@ VOYAGE_SUMMARY   = {"understand", "overview"}
 
 def scrape_wikivoyage(destination: str) -> dict:
     """Scrape Wikivoyage for the See/Do/Eat sections."""
-    url  = f"https://en.wikivoyage.org/wiki/{quote(destination.replace(' ', '_'))}"
-    resp = requests.get(url, headers=HEADERS, timeout=VOYAGE_TIMEOUT)
-    resp.raise_for_status()
+    return fetch_article(WIKIVOYAGE_BASE_URL, destination, VOYAGE_TIMEOUT,
+                         _voyage_wanted, _voyage_result, parse_wikivoyage, "wikivoyage")
 
-    soup = BeautifulSoup(resp.text, "html.parser")
 
+def parse_wikivoyage(html: str) -> dict:
+    """Extract summary and See/Do/Eat listings from a Wikivoyage page."""
+    return _voyage_result(extract_sections(html))
+
+
+def _voyage_wanted(title: str) -> bool:
+    return title in VOYAGE_SEE_DO | VOYAGE_EAT | VOYAGE_SUMMARY
+
+
+def _voyage_result(page: Page) -> dict:
     return {
-        "summary":     _voyage_summary(soup),
-        "attractions": _voyage_items(soup, VOYAGE_SEE_DO - {"activities"}),
-        "activities":  _voyage_items(soup, {"do", "activities"}),
-        "food":        _voyage_items(soup, VOYAGE_EAT),
+        "summary":     _voyage_summary(page),
+        "attractions": _voyage_items(page, VOYAGE_SEE_DO - {"activities"}),
+        "activities":  _voyage_items(page, {"do", "activities"}),
+        "food":        _voyage_items(page, VOYAGE_EAT),
     }
 
 
-def _voyage_summary(soup: BeautifulSoup) -> str:
-    for heading in soup.find_all(["h2", "h3"]):
-        if heading.get_text(strip=True).lower() in VOYAGE_SUMMARY:
-            for sib in heading.find_next_siblings():
-                if sib.name in ["h2", "h3"]:
-                    break
-                if sib.name == "p":
-                    text = sib.get_text(" ", strip=True)
-                    if len(text) > 60:
-                        return text[:400]
+def _voyage_summary(page: Page) -> str:
+    for section in page.sections:
+        if section.title in VOYAGE_SUMMARY:
+            for text in section.paragraphs:
+                if len(text) > 60:
+                    return text[:400]
     # fallback: first paragraph in content
-    for p in soup.select("#mw-content-text p"):
-        t = p.get_text(" ", strip=True)
-        if len(t) > 80:
-            return t[:400]
-    return ""
+    return page.first_paragraph(80)[:400]
 
 
-def _voyage_items(soup: BeautifulSoup, target_sections: set) -> list:
+def _voyage_items(page: Page, target_sections: set) -> list:
     """Extract listing names and descriptions from Wikivoyage sections."""
     items = []
-    for heading in soup.find_all(["h2", "h3"]):
-        if heading.get_text(strip=True).lower() in target_sections:
-            for sib in heading.find_next_siblings():
-                if sib.name in ["h2", "h3"]:
-                    break
-                # Wikivoyage uses dt for listing names
-                for dt in sib.find_all("dt"):
-                    name = dt.get_text(" ", strip=True)
-                    if 2 < len(name) < 80:
-                        items.append(name)
-                # Also grab plain list items
-                for li in sib.find_all("li"):
-                    text = li.get_text(" ", strip=True)
-                    if 5 < len(text) < 120:
-                        items.append(text)
+    for section in page.sections:
+        if section.title in target_sections or section.parent in target_sections:
+            # Listing names: dt, or the name part of a listing template
+            items.extend(name for name in section.names if 2 < len(name) < 80)
+            # Also grab plain list items
+            items.extend(text for text in section.items if 5 < len(text) < 120)
     return items
 
 
@@ -219,12 +514,13 @@ def scrape_incredible_india(destination: str) -> dict:
     Timeout hard-capped at INDIA_TIMEOUT seconds.
     """
     slug = destination.lower().replace(" ", "-")
-    url  = f"https://www.incredibleindia.gov.in/content/incredible-india/en/{slug}.html"
+    url  = f"{INCREDIBLE_INDIA_BASE_URL}/content/incredible-india/en/{slug}.html"
+    return fetch_page(url, INDIA_TIMEOUT, parse_incredible_india, "incredible_india")
 
-    resp = requests.get(url, headers=HEADERS, timeout=INDIA_TIMEOUT)
-    resp.raise_for_status()
 
-    soup  = BeautifulSoup(resp.text, "html.parser")
+def parse_incredible_india(html: str) -> dict:
+    """Extract headline items from an Incredible India destination page."""
+    soup  = BeautifulSoup(html, "html.parser")
     items = []
 
     # Extract headings and list items from the main content area
@@ -258,6 +554,9 @@ def merge_destination_data(wiki: dict, voyage: dict, india: dict) -> dict:
     """
     Merge data from all three sources with deduplication and token limits.
 
+    Any source may be an empty dict (failed, skipped or missed the deadline);
+    `sources` lists the ones that actually contributed.
+
     Priority:
       summary    → Wikivoyage > Wikipedia
       attractions → Wikipedia + Wikivoyage + Incredible India (limit 12)
@@ -287,4 +586,9 @@ def merge_destination_data(wiki: dict, voyage: dict, india: dict) -> dict:
             + india.get("food",  []),
             limit=8,
         ),
+        "sources": [
+            name for name, data in
+            (("wikipedia", wiki), ("wikivoyage", voyage), ("incredible_india", india))
+            if data
+        ],
     }
@@ -3,89 +3,185 @@ weather_service.py — Real weather integration using Open-Meteo.
 
 Free, no API key required.
 Uses Open-Meteo geocoding + forecast APIs.
+
+Geocoding resolves locally first (bundled gazetteer, then the persistent
+geocode cache) and only calls the geocoding API for unknown places.
+
+The whole trip's forecast is fetched in one request and cached per day on a
+GRID_DEGREES lat/lon grid, so nearby destinations and overlapping trips
+reuse each other's days.
 """
 
 import logging
-import requests
+from datetime import date as date_cls, timedelta
 from typing import Optional
 
+from config import GAZETTEER_ENABLED, OPEN_METEO_GEOCODING_URL, OPEN_METEO_FORECAST_URL
+from services import gazetteer
+from utils import http_client
+from utils.cache import get_cached, set_cached
+from utils.helpers import build_cache_key
+from utils import tracing
+from utils.metrics import SOURCE_FAILURES
+from utils.singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 TIMEOUT = 8
 
+# Coordinates never change; unknown names are remembered for a day in case
+# the geocoder learns them later.
+GEOCODE_TTL           = 60 * 60 * 24 * 180
+GEOCODE_NOT_FOUND_TTL = 60 * 60 * 24
+
+# Forecasts are cached per day on a grid of GRID_DEGREES cells (~25 km) and
+# kept only briefly since they are revised several times a day.
+GRID_DEGREES          = 0.25
+FORECAST_TTL          = 60 * 60 * 3
+FORECAST_HORIZON_DAYS = 16      # Open-Meteo forecasts at most this far ahead
+
+_flights = SingleFlight("weather")
+
 
-def get_weather(destination: str, date: str) -> dict:
+def get_weather(destination: str, date: str, nights: int = 0) -> dict:
     """
-    Fetch weather forecast for a destination and date.
+    Fetch the weather forecast for a whole trip.
 
     Args:
         destination: City name (e.g. "Goa")
-        date:        ISO date string (YYYY-MM-DD)
+        date:        Trip start, ISO date string (YYYY-MM-DD)
+        nights:      Trip length; days covered are date … date + nights
 
     Returns:
-        dict with temperature, condition, and recommendation.
+        Day 1 temperature, condition and recommendation at the top level,
+        plus "days": the same fields for every forecastable trip day.
         Empty dict on failure.
     """
+    key = f"{destination.strip().lower()}|{date}|{nights}"
+    return _flights.do(key, _weather_for, destination, date, nights)
+
+
+def _weather_for(destination: str, date: str, nights: int) -> dict:
     coords = _geocode(destination)
     if not coords:
         return {}
 
-    forecast = _fetch_forecast(coords["lat"], coords["lon"], date)
-    if not forecast:
+    dates = _trip_dates(date, nights)
+    if not dates:
+        return {}
+
+    forecasts = _fetch_forecast(coords["lat"], coords["lon"], dates)
+    days = [
+        {
+            "date":       day,
+            "temp_max_c": f.get("temperature_2m_max"),
+            "temp_min_c": f.get("temperature_2m_min"),
+            "rain_mm":    f.get("precipitation_sum"),
+            "condition":  _describe(f),
+            "tip":        _tip(f),
+        }
+        for day, f in zip(dates, forecasts) if f
+    ]
+    if not days:
         return {}
 
-    return {
-        "destination": destination,
-        "date":        date,
-        "temp_max_c":  forecast.get("temperature_2m_max"),
-        "temp_min_c":  forecast.get("temperature_2m_min"),
-        "rain_mm":     forecast.get("precipitation_sum"),
-        "condition":   _describe(forecast),
-        "tip":         _tip(forecast),
-    }
+    return {"destination": destination, **days[0], "days": days}
+
+
+def _trip_dates(start: str, nights: int) -> list:
+    """ISO dates from start through start + nights, cut at the forecast horizon."""
+    try:
+        first = date_cls.fromisoformat(start)
+    except (TypeError, ValueError):
+        return []
+    horizon = date_cls.today() + timedelta(days=FORECAST_HORIZON_DAYS - 1)
+    return [
+        (first + timedelta(days=i)).isoformat()
+        for i in range(max(nights, 0) + 1)
+        if first + timedelta(days=i) <= horizon
+    ]
 
 
 def _geocode(destination: str) -> Optional[dict]:
-    """Resolve destination name to lat/lon via Open-Meteo geocoding."""
+    """
+    Resolve destination name to lat/lon.
+
+    Order: bundled gazetteer → geocode cache → Open-Meteo geocoding API.
+    """
+    if GAZETTEER_ENABLED:
+        coords = gazetteer.lookup(destination)
+        if coords:
+            return coords
+
+    cache_key = build_cache_key("geo", gazetteer.normalize_place(destination))
+    cached    = get_cached(cache_key)
+    if cached:
+        return cached if cached.get("lat") is not None else None
+
     try:
-        resp = requests.get(
-            "https://geocoding-api.open-meteo.com/v1/search",
-            params={"name": destination, "count": 1, "language": "en"},
-            timeout=TIMEOUT,
-        )
+        with tracing.stage("geocode"):
+            resp = http_client.get(
+                f"{OPEN_METEO_GEOCODING_URL}/v1/search",
+                params={"name": destination, "count": 1, "language": "en"},
+                timeout=TIMEOUT,
+            )
         resp.raise_for_status()
         results = resp.json().get("results", [])
         if not results:
             logger.warning(f"No geocoding results for: {destination}")
+            set_cached(cache_key, {"lat": None, "lon": None}, ttl=GEOCODE_NOT_FOUND_TTL)
             return None
-        return {"lat": results[0]["latitude"], "lon": results[0]["longitude"]}
+        coords = {"lat": results[0]["latitude"], "lon": results[0]["longitude"]}
+        set_cached(cache_key, coords, ttl=GEOCODE_TTL)
+        return coords
     except Exception as e:
         logger.warning(f"Geocoding failed for {destination}: {e}")
+        SOURCE_FAILURES.inc(source="geocoding", reason="error")
         return None
 
 
-def _fetch_forecast(lat: float, lon: float, date: str) -> Optional[dict]:
-    """Fetch daily forecast data for a specific date."""
-    try:
-        resp = requests.get(
-            "https://api.open-meteo.com/v1/forecast",
-            params={
-                "latitude":       lat,
-                "longitude":      lon,
-                "daily":          "temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode",
-                "start_date":     date,
-                "end_date":       date,
-                "timezone":       "auto",
-            },
-            timeout=TIMEOUT,
-        )
-        resp.raise_for_status()
-        daily = resp.json().get("daily", {})
+def _fetch_forecast(lat: float, lon: float, dates: list) -> list:
+    """
+    Daily forecast data for each of `dates`, in order (None where unavailable).
 
-        # Extract the first (and only) day
-        return {k: v[0] if isinstance(v, list) and v else None for k, v in daily.items()}
-    except Exception as e:
-        logger.warning(f"Forecast fetch failed ({lat},{lon},{date}): {e}")
-        return None
+    Days already cached for this grid cell are reused; the rest are fetched
+    in a single request spanning the first to last missing day.
+    """
+    cell_lat = round(round(lat / GRID_DEGREES) * GRID_DEGREES, 4)
+    cell_lon = round(round(lon / GRID_DEGREES) * GRID_DEGREES, 4)
+    keys     = {d: build_cache_key("wx", str(cell_lat), str(cell_lon), d) for d in dates}
+    found    = {d: get_cached(keys[d]) for d in dates}
+    missing  = [d for d in dates if not found[d]]
+
+    if missing:
+        try:
+            with tracing.stage("forecast"):
+                resp = http_client.get(
+                    f"{OPEN_METEO_FORECAST_URL}/v1/forecast",
+                    params={
+                        "latitude":       cell_lat,
+                        "longitude":      cell_lon,
+                        "daily":          "temperature_2m_max,temperature_2m_min,precipitation_sum,weathercode",
+                        "start_date":     missing[0],
+                        "end_date":       missing[-1],
+                        "timezone":       "auto",
+                    },
+                    timeout=TIMEOUT,
+                )
+            resp.raise_for_status()
+            daily = resp.json().get("daily", {})
+
+            # One dict per returned day: {"temperature_2m_max": …, …}
+            for i, day in enumerate(daily.get("time", [])):
+                forecast = {k: v[i] if isinstance(v, list) and i < len(v) else None
+                            for k, v in daily.items() if k != "time"}
+                if day in keys:
+                    set_cached(keys[day], forecast, ttl=FORECAST_TTL)
+                found[day] = forecast
+        except Exception as e:
+            logger.warning(f"Forecast fetch failed ({lat},{lon},{missing[0]}…{missing[-1]}): {e}")
+            SOURCE_FAILURES.inc(source="forecast", reason="error")
+
+    return [found.get(d) for d in dates]
 
 
 def _describe(forecast: dict) -> str:
@@ -0,0 +1,157 @@
+"""
+wire_format.py — Compact itinerary format for Gemini output, expanded server-side.
+
+Output tokens dominate generation time, and the full schema repeats long keys
+("description", "category", "alternatives", "cost_inr") for every activity
+and each of its three alternatives. With ITINERARY_WIRE_FORMAT=compact Gemini
+is asked for positional arrays instead:
+
+  day:         {"t": theme, "a": [activity, ...]}
+  activity:    [time, title, description, category code, cost_inr, [alternative, ...]]
+               (alternatives omitted when the server fills them, see alternatives.py)
+  alternative: [title, description, category code, cost_inr]
+
+with one-letter category codes, no "period" (derived from the time) and no
+day numbers (derived from position). expand_itinerary() turns that back into
+exactly the shape the frontend consumes; full-format input passes through.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_CODES = {
+    "s": "sightseeing",
+    "f": "food",
+    "a": "adventure",
+    "c": "culture",
+    "r": "relaxation",
+}
+
+BUDGET_KEYS    = ("accommodation_inr", "food_inr", "transport_inr", "activities_inr", "total_inr")
+SEASON_KEYS    = ("badge_text", "badge_color", "description", "tips")
+TRANSPORT_KEYS = ("recommended_mode", "approx_reason", "nearest_airport", "major_railway_station", "road_connectivity")
+
+_COMPACT_ALTERNATIVES = ',[["title","description","f",0],["title","description","s",0],["title","description","r",0]]'
+
+
+def compact_schema(alternatives: bool = True) -> str:
+    """Output instructions for the compact format, with or without alternatives."""
+    alts = _COMPACT_ALTERNATIVES if alternatives else ""
+    activity = (
+        "Each activity is [time HH:MM, title, description, category, cost in INR, alternatives]; "
+        "give exactly 3 alternatives, each [title, description, category, cost in INR]."
+        if alternatives else
+        "Each activity is [time HH:MM, title, description, category, cost in INR]."
+    )
+    return f"""
+Return ONLY valid, minified JSON in this compact form. No markdown. No code fences. No commentary:
+{{"d":"destination name as given in TRIP DETAILS",
+"days":[{{"t":"theme","a":[["09:00","title","description","c",0{alts}]]}}],
+"b":[accommodation_inr,food_inr,transport_inr,activities_inr,total_inr],
+"s":["❄️ Winter — Peak Snow Season","#06b6d4 | #ef4444 | #f59e0b | #f97316","Short explanation of why this season is good/bad for this specific destination.",["tip1","tip2","tip3"]],
+"tr":["Flight | Train | Bus | Car","Why this mode suits the distance from the origin to the destination","Name of nearest airport and distance","Name of major railway station and distance","Notes on highway access or bus routes"],
+"tips":["tip1","tip2","tip3"]}}
+Each day is {{"t": theme, "a": activities}}, one per trip day, in order.
+{activity}
+Category codes: s=sightseeing, f=food, a=adventure, c=culture, r=relaxation.
+"""
+
+
+def expand_itinerary(raw: dict) -> dict:
+    """
+    Expand a compact itinerary into the full response shape.
+
+    Keys other than the compact ones (e.g. "partial") are kept as they are.
+    """
+    if not isinstance(raw, dict) or not _is_compact(raw):
+        return raw
+
+    result = {k: v for k, v in raw.items() if k not in ("d", "days", "b", "s", "tr")}
+    result["destination"] = raw.get("d") or raw.get("destination", "")
+    result["days"] = [expand_day(day, i + 1) for i, day in enumerate(raw.get("days") or [])]
+
+    if isinstance(raw.get("b"), list):
+        result["budget_summary"] = {k: _int(v) for k, v in zip(BUDGET_KEYS, raw["b"])}
+    if isinstance(raw.get("s"), list):
+        result["seasonal_insight"] = dict(zip(SEASON_KEYS, raw["s"]))
+    if isinstance(raw.get("tr"), list):
+        result["transport_intelligence"] = dict(zip(TRANSPORT_KEYS, raw["tr"]))
+    result.setdefault("tips", [])
+    return result
+
+
+def expand_day(day: dict, number: int) -> dict:
+    """Expand one compact day ({"t", "a"}) into {"day", "theme", "activities"}."""
+    if not isinstance(day, dict) or "activities" in day:
+        return day
+    return {
+        "day":        number,
+        "theme":      day.get("t", ""),
+        "activities": [expand_activity(a) for a in day.get("a") or [] if isinstance(a, (list, dict))],
+    }
+
+
+def expand_activity(activity) -> dict:
+    """Expand [time, title, description, code, cost, alternatives] into an activity dict."""
+    if isinstance(activity, dict):
+        return activity
+    time, title, description, code, cost, alternatives = (list(activity) + [None] * 6)[:6]
+    time = time or "09:00"
+    return {
+        "time":         time,
+        "period":       period_for(time),
+        "title":        title or "",
+        "description":  description or "",
+        "category":     _category(code),
+        "cost_inr":     _int(cost),
+        "alternatives": [_expand_alternative(alt) for alt in alternatives or [] if isinstance(alt, (list, dict))],
+    }
+
+
+def period_for(time: str) -> str:
+    """Timeline period for an HH:MM start time."""
+    try:
+        hour = int(str(time).split(":", 1)[0])
+    except ValueError:
+        return "morning"
+    if hour < 11:
+        return "morning"
+    if hour < 14:
+        return "midday"
+    if hour < 18:
+        return "afternoon"
+    return "evening"
+
+
+def _expand_alternative(alternative) -> dict:
+    if isinstance(alternative, dict):
+        return alternative
+    title, description, code, cost = (list(alternative) + [None] * 4)[:4]
+    return {
+        "title":       title or "",
+        "description": description or "",
+        "category":    _category(code),
+        "cost_inr":    _int(cost),
+    }
+
+
+def _is_compact(raw: dict) -> bool:
+    if "d" in raw or "b" in raw:
+        return True
+    days = raw.get("days") or []
+    return bool(days) and isinstance(days[0], dict) and "a" in days[0]
+
+
+def _category(code) -> str:
+    code = str(code or "").strip().lower()
+    if code in CATEGORY_CODES.values():
+        return code
+    return CATEGORY_CODES.get(code[:1], "sightseeing")
+
+
+def _int(value) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,26 @@
+"""
+conftest.py — Shared fixtures for the backend test suite.
+
+Run from backend/:  python -m pytest
+Every test gets an empty cache: a fresh SQLite file (cache and plan tables)
+and memory tier.
+"""
+
+import pytest
+
+from utils import cache
+from utils.cache_backends import SQLiteBackend
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    """Point utils.cache at an empty store for the duration of one test."""
+    backend = SQLiteBackend(str(tmp_path / "cache.db"), cache.CACHE_MAX_BYTES)
+    plans   = SQLiteBackend(str(tmp_path / "cache.db"), None, table="plans")
+    monkeypatch.setattr(cache, "_backend", backend)
+    monkeypatch.setattr(cache, "_plan_store", plans)
+    monkeypatch.setattr(cache, "_memory", cache._MemoryTier(cache.CACHE_MEMORY_MAX_ENTRIES,
+                                                            cache.CACHE_MEMORY_MAX_BYTES))
+    yield backend
+    backend.close()
+    plans.close()
@@ -0,0 +1,138 @@
+"""Tests for main.py — application wiring and endpoints, with upstream calls stubbed out."""
+
+import copy
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from utils import cache, http_client
+
+
+def test_lifespan_opens_and_closes_the_http_pool(fresh_cache):
+    fresh_cache.set("stale", {"a": 1}, time.time() - 1)
+    assert not main.app.router.on_startup and not main.app.router.on_shutdown
+    with TestClient(main.app) as client:
+        assert http_client._client is not None
+        assert fresh_cache._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+        assert client.get("/").json()["status"] == "ok"
+    assert http_client._client is None
+
+
+REQUEST = {"from": "Delhi", "to": "Jaipur", "start_date": "2026-12-10", "nights": 2, "budget": "moderate"}
+
+
+def test_a_failing_request_still_finishes_its_trace(monkeypatch, caplog):
+    def broken(request_data):
+        raise RuntimeError("cache exploded")
+
+    monkeypatch.setattr(main, "get_cached_plan", broken)
+    with TestClient(main.app, raise_server_exceptions=False) as client, caplog.at_level("INFO", "navisense.trace"):
+        response = client.post("/generate-plan", json=REQUEST, headers={"X-Request-ID": "req-500"})
+    assert response.status_code == 500
+    assert response.headers["X-Request-ID"] == "req-500"
+    assert "total;dur=" in response.headers["Server-Timing"]
+    logged = [r.getMessage() for r in caplog.records if r.name == "navisense.trace"]
+    assert len(logged) == 1
+    assert '"request_id":"req-500"' in logged[0] and '"status":500' in logged[0]
+    assert '"error":"RuntimeError"' in logged[0]
+
+
+def test_a_failing_stream_still_finishes_its_trace(monkeypatch, caplog):
+    def broken(request_data):
+        raise RuntimeError("cache exploded")
+
+    monkeypatch.setattr(main, "get_cached_plan", broken)
+    with TestClient(main.app, raise_server_exceptions=False) as client, caplog.at_level("INFO", "navisense.trace"):
+        client.post("/generate-plan/stream", json=REQUEST, headers={"X-Request-ID": "req-sse"})
+    logged = [r.getMessage() for r in caplog.records if r.name == "navisense.trace"]
+    assert len(logged) == 1 and '"status":500' in logged[0] and '"request_id":"req-sse"' in logged[0]
+
+
+PLAN = {
+    "destination": "Jaipur",
+    "days": [{"day": 1, "theme": "Forts", "activities": [
+        {"time": "09:00", "title": "Amber Fort", "category": "culture", "cost_inr": 500,
+         "alternatives": [{"title": "Nahargarh", "category": "culture", "cost_inr": 200}]},
+        {"time": "19:00", "title": "Chokhi Dhani", "category": "food", "cost_inr": 900, "alternatives": []},
+    ]}],
+    "budget_summary": {"accommodation_inr": 4000, "food_inr": 2000, "transport_inr": 500,
+                       "activities_inr": 1400, "total_inr": 7900},
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    generated = []
+
+    async def run_plan_pipeline(request_data):
+        generated.append(request_data)
+        return copy.deepcopy(PLAN), {"condition": "Clear sky"}
+
+    monkeypatch.setattr(main, "run_plan_pipeline", run_plan_pipeline)
+    with TestClient(main.app) as client:
+        client.generated = generated
+        yield client
+
+
+def _plan_rows() -> int:
+    return cache.get_plan_store()._conn().execute("SELECT COUNT(*) FROM plans WHERE key LIKE 'plan%'").fetchone()[0]
+
+
+def test_cache_hits_share_the_plan_saved_on_the_miss(client):
+    miss = client.post("/generate-plan", json=REQUEST).json()
+    hits = [client.post("/generate-plan", json=REQUEST).json() for _ in range(3)]
+    assert len(client.generated) == 1
+    assert not miss["cached"] and all(hit["cached"] for hit in hits)
+    assert {hit["plan_id"] for hit in hits} == {miss["plan_id"]}
+    assert all(hit["version"] == 1 for hit in hits)
+    assert _plan_rows() == 1
+
+
+def test_editing_a_shared_plan_forks_it_and_checks_versions(client):
+    plan_id = client.post("/generate-plan", json=REQUEST).json()["plan_id"]
+    delete  = {"operations": [{"op": "delete", "day": 1, "activity": 1}], "version": 1}
+
+    edited = client.patch(f"/plans/{plan_id}", json=delete).json()
+    assert edited["plan_id"] != plan_id and edited["version"] == 1
+    assert [a["title"] for a in edited["days"][0]["activities"]] == ["Amber Fort"]
+    assert edited["budget_summary"]["activities_inr"] == 500
+
+    again = client.patch(f"/plans/{edited['plan_id']}", json={**delete, "operations": [
+        {"op": "swap", "day": 1, "activity": 0, "alternative": 0}]})
+    assert again.status_code == 200 and again.json()["version"] == 2
+    stale = client.patch(f"/plans/{edited['plan_id']}", json=delete)
+    assert stale.status_code == 409 and stale.json()["version"] == 2
+
+    assert client.post("/generate-plan", json=REQUEST).json()["plan_id"] == plan_id
+    assert len(client.get(f"/plans/{plan_id}").json()["days"][0]["activities"]) == 2
+
+
+def test_regenerate_by_plan_id(client, monkeypatch):
+    async def fetch_inputs(destination, start_date, nights):
+        return {}, {"condition": "Rain"}
+
+    replacement = {"time": "19:00", "title": "Masala Chowk", "category": "food", "cost_inr": 400}
+    monkeypatch.setattr(main, "fetch_inputs", fetch_inputs)
+    monkeypatch.setattr(main, "regenerate_slot", lambda *args: dict(replacement))
+
+    plan_id = client.post("/generate-plan", json=REQUEST).json()["plan_id"]
+    body    = client.post("/generate-plan/regenerate",
+                          json={**REQUEST, "plan_id": plan_id, "day": 1, "activity_index": 1}).json()
+    assert body["days"][0]["activities"][1]["title"] == "Masala Chowk"
+    stored = client.get(f"/plans/{body['plan_id']}").json()
+    assert stored["days"][0]["activities"][1]["title"] == "Masala Chowk"
+    assert stored["weather"] == {"condition": "Rain"}
+    assert client.get(f"/plans/{plan_id}").json()["days"][0]["activities"][1]["title"] == "Chokhi Dhani"
+
+    missing = client.post("/generate-plan/regenerate", json={**REQUEST, "plan_id": "nope", "day": 1})
+    assert missing.status_code == 404
+
+
+def test_plans_survive_cache_eviction(client, fresh_cache, monkeypatch):
+    plan_id = client.post("/generate-plan", json=REQUEST).json()["plan_id"]
+    monkeypatch.setattr(fresh_cache, "max_bytes", 1)
+    fresh_cache._enforce_max_size()
+    assert fresh_cache._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+    assert client.get(f"/plans/{plan_id}").json()["days"] == PLAN["days"]
@@ -0,0 +1,88 @@
+"""Tests for utils/cache.py — the memory tier in front of the persistent store."""
+
+import time
+
+import pytest
+
+from utils import cache
+
+
+def _age(key: str, seconds: float) -> None:
+    """Pretend the memory copy of key was loaded `seconds` ago."""
+    cache._memory.get(key).loaded_at -= seconds
+
+
+def _settle(timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while cache._refreshing:
+        assert time.monotonic() < deadline, "refresh never finished"
+        time.sleep(0.005)
+
+
+def test_fresh_entries_are_served_from_memory(fresh_cache):
+    cache.set_cached("k", {"v": 1})
+    fresh_cache.set("k", {"v": 2}, time.time() + 60)          # another worker's write
+    assert cache.get_cached("k") == {"v": 1}
+
+
+def test_stale_entries_are_served_while_a_refresh_reloads_them(fresh_cache):
+    cache.set_cached("k", {"v": 1})
+    fresh_cache.set("k", {"v": 2}, time.time() + 60)
+    _age("k", cache.CACHE_MEMORY_TTL + 1)
+    before = dict(cache._stats["memory"])
+    assert cache.get_cached("k") == {"v": 1}
+    assert cache._stats["memory"]["stale_hits"] == before["stale_hits"] + 1
+    _settle()
+    assert cache.get_cached("k") == {"v": 2}
+
+
+def test_refresh_drops_an_entry_deleted_from_the_store(fresh_cache):
+    cache.set_cached("k", {"v": 1})
+    fresh_cache.delete("k")
+    _age("k", cache.CACHE_MEMORY_TTL + 1)
+    assert cache.get_cached("k") == {"v": 1}
+    _settle()
+    assert cache.get_cached("k") is None
+
+
+def test_entries_past_the_swr_window_are_reread_at_once(fresh_cache):
+    cache.set_cached("k", {"v": 1})
+    fresh_cache.set("k", {"v": 2}, time.time() + 60)
+    _age("k", cache.CACHE_MEMORY_TTL + cache.CACHE_MEMORY_SWR + 1)
+    assert cache.get_cached("k") == {"v": 2}
+
+
+def test_expired_entries_are_never_served(fresh_cache):
+    cache.set_cached("k", {"v": 1}, ttl=60)
+    cache._memory.get("k").expires_at = time.time() - 1
+    fresh_cache.delete("k")
+    assert cache.get_cached("k") is None
+    assert cache._memory.get("k") is None
+
+
+def test_lru_eviction_by_entry_count(monkeypatch):
+    monkeypatch.setattr(cache, "_memory", cache._MemoryTier(max_entries=2, max_bytes=10_000))
+    for key in ("a", "b"):
+        cache.set_cached(key, {"key": key})
+    cache.get_cached("a")                                       # "b" is now least recently used
+    cache.set_cached("c", {"key": "c"})
+    assert cache._memory.get("b") is None
+    assert cache._memory.get("a") is not None and cache._memory.get("c") is not None
+    assert cache.get_cached("b") == {"key": "b"}                # still in the store
+
+
+@pytest.mark.parametrize("size, kept", [(40, ["b", "c"]), (200, [])])
+def test_lru_eviction_by_bytes(monkeypatch, size, kept):
+    memory = cache._MemoryTier(max_entries=10, max_bytes=100)
+    monkeypatch.setattr(cache, "_memory", memory)
+    for key in ("a", "b", "c"):
+        memory.put(key, cache._MemoryEntry({"key": key}, size, time.time() + 60))
+    assert [k for k in "abc" if memory.get(k) is not None] == kept
+    assert memory.usage()["bytes"] == size * len(kept)
+
+
+def test_delete_removes_both_tiers(fresh_cache):
+    cache.set_cached("k", {"v": 1})
+    cache.delete_cached("k")
+    assert cache._memory.get("k") is None and fresh_cache.get("k") is None
+    assert cache.get_cached("k") is None
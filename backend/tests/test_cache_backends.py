@@ -0,0 +1,100 @@
+"""Tests for utils/cache_backends.py — both persistent stores behind the cache."""
+
+import os
+import time
+
+import pytest
+
+from utils.cache_backends import CacheBackend, FileBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteBackend(str(tmp_path / "cache.db"), max_bytes=10_000_000)
+    else:
+        store = FileBackend(str(tmp_path / "files"), ttl=3600)
+    yield store
+    store.close()
+
+
+def test_an_incomplete_backend_cannot_be_created():
+    class NoDelete(CacheBackend):
+        def get(self, key): return None
+        def set(self, key, data, expires_at): return 0
+        def compare_and_set(self, key, data, expires_at, field, expected): return False
+        def purge_expired(self): return 0
+
+    with pytest.raises(TypeError, match="delete"):
+        NoDelete()
+
+
+def test_round_trip_and_upsert(backend):
+    expires_at = time.time() + 60
+    size = backend.set("k", {"city": "Jaipur", "days": [1, 2]}, expires_at)
+    data, stored_size, stored_expiry = backend.get("k")
+    assert data == {"city": "Jaipur", "days": [1, 2]}
+    assert stored_size == size > 0
+    assert stored_expiry == pytest.approx(expires_at)
+    backend.set("k", {"city": "Kochi"}, expires_at)
+    assert backend.get("k")[0] == {"city": "Kochi"}
+
+
+def test_missing_and_deleted_keys(backend):
+    assert backend.get("nope") is None
+    backend.set("k", {"a": 1}, time.time() + 60)
+    backend.delete("k")
+    backend.delete("k")
+    assert backend.get("k") is None
+
+
+def test_expired_entries_are_hidden_and_purged(backend):
+    backend.set("old", {"a": 1}, time.time() - 1)
+    backend.set("new", {"a": 2}, time.time() + 60)
+    assert backend.get("old") is None
+    backend.set("old2", {"a": 3}, time.time() - 1)
+    assert backend.purge_expired() >= 1
+    assert backend.get("new")[0] == {"a": 2}
+
+
+def test_sqlite_evicts_the_soonest_to_expire_past_max_size(tmp_path, monkeypatch):
+    store = SQLiteBackend(str(tmp_path / "small.db"), max_bytes=4000)
+    monkeypatch.setattr(SQLiteBackend, "PURGE_EVERY", 1)
+    now   = time.time()
+    for i in range(10):
+        store.set(f"k{i}", {"blob": os.urandom(600).hex()}, now + 100 + i)    # ~1 KB compressed
+    kept = [i for i in range(10) if store.get(f"k{i}") is not None]
+    assert 0 < len(kept) < 10
+    assert kept == list(range(10 - len(kept), 10))
+    store.close()
+
+
+def test_compare_and_set_writes_only_over_the_expected_value(backend):
+    expires_at = time.time() + 60
+    assert backend.compare_and_set("k", {"version": 1}, expires_at, "version", None)
+    assert not backend.compare_and_set("k", {"version": 1}, expires_at, "version", None)
+    assert backend.compare_and_set("k", {"version": 2}, expires_at, "version", 1)
+    assert not backend.compare_and_set("k", {"version": 3}, expires_at, "version", 1)
+    assert backend.get("k")[0] == {"version": 2}
+
+
+def test_compare_and_set_treats_an_expired_key_as_missing(backend):
+    backend.set("k", {"version": 4}, time.time() - 1)
+    assert not backend.compare_and_set("k", {"version": 5}, time.time() + 60, "version", 4)
+    assert backend.compare_and_set("k", {"version": 1}, time.time() + 60, "version", None)
+
+
+def test_sqlite_tables_in_one_file_are_evicted_separately(tmp_path, monkeypatch):
+    cache = SQLiteBackend(str(tmp_path / "shared.db"), max_bytes=4000)
+    plans = SQLiteBackend(str(tmp_path / "shared.db"), max_bytes=None, table="plans")
+    monkeypatch.setattr(SQLiteBackend, "PURGE_EVERY", 1)
+    now   = time.time()
+    plans.set("plan", {"blob": os.urandom(600).hex()}, now + 10)              # expires before any cache entry
+    for i in range(10):
+        cache.set(f"k{i}", {"blob": os.urandom(600).hex()}, now + 100 + i)
+        plans.set(f"p{i}", {"blob": os.urandom(600).hex()}, now + 100 + i)
+    assert plans.get("plan") is not None
+    assert all(plans.get(f"p{i}") is not None for i in range(10))
+    assert cache.get("k0") is None and cache.get("plan") is None
+    cache.close()
+    plans.close()
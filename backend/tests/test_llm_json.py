@@ -0,0 +1,131 @@
+"""Tests for utils/llm_json.py — streaming and truncation salvage."""
+
+import json
+
+import pytest
+
+from utils.llm_json import IncrementalJSONParser, parse_llm_json
+
+PLAN = {
+    "destination": "Jaipur",
+    "days": [
+        {"day": 1, "theme": "Forts", "activities": [{"title": "Amber Fort", "cost_inr": 200}]},
+        {"day": 2, "theme": "Bazaars", "activities": [{"title": "Johari Bazaar", "cost_inr": 0}]},
+        {"day": 3, "theme": "Palaces", "activities": [{"title": "City Palace", "cost_inr": 300}]},
+    ],
+    "tips": ["Carry water", "Bargain politely"],
+}
+
+
+def _feed(text: str, size: int) -> tuple:
+    parser = IncrementalJSONParser("days")
+    emitted = []
+    for i in range(0, len(text), size):
+        emitted.extend(parser.feed(text[i:i + size]))
+    return parser, emitted
+
+
+def test_emits_each_day_as_it_completes():
+    text = json.dumps(PLAN)
+    for size in (1, 7, 64, len(text)):
+        parser, emitted = _feed(text, size)
+        assert emitted == PLAN["days"]
+        assert parser.close() == PLAN
+        assert not parser.truncated and not parser.repaired
+
+
+def test_day_is_emitted_before_the_rest_arrives():
+    text   = json.dumps(PLAN)
+    cut    = text.index('{"day": 2')
+    parser = IncrementalJSONParser("days")
+    assert parser.feed(text[:cut]) == PLAN["days"][:1]
+
+
+def test_ignores_fences_prose_and_trailing_commentary():
+    text = "Sure! Here is your plan:\n```json\n" + json.dumps(PLAN) + "\n```\nEnjoy {your} trip!"
+    result, parser = parse_llm_json(text)
+    assert result == PLAN
+    assert not parser.truncated
+
+
+def test_braces_and_quotes_inside_strings():
+    plan = {"days": [{"day": 1, "theme": 'Say "hi" to {friends} [and] \\ more', "activities": []}]}
+    result, _ = parse_llm_json(json.dumps(plan))
+    assert result == plan
+
+
+def test_trailing_commas_are_tolerated():
+    text = '{"days": [{"day": 1, "activities": [],},], "tips": ["a", "b",],}'
+    result, parser = parse_llm_json(text)
+    assert result == {"days": [{"day": 1, "activities": []}], "tips": ["a", "b"]}
+    assert parser.repaired
+    assert parser.items == [{"day": 1, "activities": []}]
+
+
+def test_truncated_inside_a_day_keeps_only_whole_days():
+    text   = json.dumps(PLAN)
+    cut    = text.index("City Palace")
+    result, parser = parse_llm_json(text[:cut])
+    assert parser.truncated and parser.repaired
+    assert result["destination"] == "Jaipur"
+    assert result["days"] == PLAN["days"][:2]
+
+
+def test_truncated_after_the_days_keeps_the_object():
+    text   = json.dumps(PLAN)
+    cut    = text.index("Bargain")
+    result, parser = parse_llm_json(text[:cut])
+    assert parser.truncated
+    assert result["days"] == PLAN["days"]
+    assert result["tips"] == ["Carry water"]
+
+
+def test_truncated_before_any_day_completes_keeps_its_whole_fields():
+    result, parser = parse_llm_json('{"destination": "Jaipur", "days": [{"day": 1, "theme": "For')
+    assert parser.truncated
+    assert result == {"destination": "Jaipur", "days": [{"day": 1}]}
+    assert parser.items == []
+
+
+def test_no_json_at_all():
+    result, parser = parse_llm_json("I'm sorry, I can't help with that.")
+    assert result is None
+    assert parser.items == []
+
+
+def test_collects_another_key():
+    result, parser = parse_llm_json('{"title": "Fort", "alternatives": [{"title": "A"}, {"title": "B"}]}',
+                                    "alternatives")
+    assert parser.items == [{"title": "A"}, {"title": "B"}]
+    assert result["title"] == "Fort"
+
+
+def test_nested_arrays_with_the_collected_name_are_not_collected():
+    text = '{"meta": {"days": [{"x": 1}]}, "days": [{"day": 1}]}'
+    parser, emitted = _feed(text, 5)
+    assert emitted == [{"day": 1}]
+
+
+def test_well_formed_response_skips_the_character_loop(monkeypatch):
+    monkeypatch.setattr(IncrementalJSONParser, "feed", lambda *_: pytest.fail("fell back"))
+    result, parser = parse_llm_json("```json\n" + json.dumps(PLAN) + "\n```")
+    assert result == PLAN
+    assert parser.items == PLAN["days"]
+    assert not parser.truncated and not parser.repaired
+
+
+def test_commentary_with_braces_falls_back_to_the_incremental_parser():
+    parser = IncrementalJSONParser("days")
+    assert not parser.load(json.dumps(PLAN) + "\nEnjoy {your} trip!")
+    result, parser = parse_llm_json(json.dumps(PLAN) + "\nEnjoy {your} trip!")
+    assert result == PLAN
+    assert not parser.repaired
+
+
+def test_well_formed_response_counts_as_ok():
+    from services.gemini_service import _parse
+    from utils.metrics import LLM_PARSES
+
+    before = LLM_PARSES._values.get(("ok",), 0)
+    assert _parse(json.dumps(PLAN))["days"]
+    assert LLM_PARSES._values[("ok",)] == before + 1
@@ -0,0 +1,107 @@
+"""Tests for services/llm_provider.py — deadline splitting, hedging and model fallback."""
+
+import threading
+import time
+
+import pytest
+
+from services import llm_provider
+from services.llm_provider import LLMProvider, LLMUnavailable
+
+
+class ScriptedProvider(LLMProvider):
+    """Answers each call after the delay (or with the exception) scripted for its model."""
+
+    name = "scripted"
+
+    def __init__(self, script: dict):
+        self.script = {model: list(steps) for model, steps in script.items()}
+        self.calls  = []
+        self._lock  = threading.Lock()
+
+    def generate(self, prompt, model=None, timeout=None):
+        with self._lock:
+            self.calls.append((model, timeout))
+            steps = self.script[model]
+            delay, outcome = steps.pop(0) if len(steps) > 1 else steps[0]
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return f"{outcome} ({model})"
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    monkeypatch.setattr(llm_provider, "GEMINI_MODEL", "primary")
+    monkeypatch.setattr(llm_provider, "LLM_FALLBACK_MODELS", ["fallback"])
+    monkeypatch.setattr(llm_provider, "LLM_TIMEOUT", 10)
+    monkeypatch.setattr(llm_provider, "LLM_HEDGE_AFTER", 0)
+
+    def use(script: dict) -> ScriptedProvider:
+        provider = ScriptedProvider(script)
+        monkeypatch.setattr(llm_provider, "_provider", provider)
+        return provider
+
+    return use
+
+
+def test_model_timeout_splits_what_is_left(monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_TIMEOUT", 10)
+    assert llm_provider._model_timeout(None, 2) == 10
+    assert llm_provider._model_timeout(time.monotonic() + 6, 2) == pytest.approx(3, abs=0.05)
+    assert llm_provider._model_timeout(time.monotonic() + 60, 2) == 10
+    assert llm_provider._model_timeout(time.monotonic() - 1, 1) < 0
+
+
+def test_falls_back_to_the_next_model_on_error(chain):
+    provider = chain({"primary": [(0, RuntimeError("503"))], "fallback": [(0, "plan")]})
+    assert llm_provider.generate_text("prompt", budget=4) == ("plan (fallback)", "fallback")
+    assert [model for model, _ in provider.calls] == ["primary", "fallback"]
+
+
+def test_an_early_failure_leaves_its_time_to_the_next_model(chain):
+    provider = chain({"primary": [(0, RuntimeError("503"))], "fallback": [(0, "plan")]})
+    llm_provider.generate_text("prompt", budget=4)
+    (_, first), (_, second) = provider.calls
+    assert first == pytest.approx(2, abs=0.05)
+    assert second == pytest.approx(4, abs=0.05)
+
+
+def test_a_slow_model_is_cut_off_at_its_share(chain):
+    provider = chain({"primary": [(1.0, "late")], "fallback": [(0, "plan")]})
+    started  = time.monotonic()
+    assert llm_provider.generate_text("prompt", budget=0.6) == ("plan (fallback)", "fallback")
+    assert time.monotonic() - started < 0.6
+    assert provider.calls[1][1] == pytest.approx(0.3, abs=0.05)
+
+
+def test_every_model_failing_raises(chain):
+    chain({"primary": [(0, RuntimeError("503"))], "fallback": [(0, ValueError("bad key"))]})
+    with pytest.raises(LLMUnavailable, match="primary: 503; fallback: bad key"):
+        llm_provider.generate_text("prompt", budget=2)
+
+
+def test_hedge_fires_after_the_delay_and_the_first_answer_wins(chain, monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_HEDGE_AFTER", 0.1)
+    provider = chain({"primary": [(1.0, "stalled"), (0, "hedged")]})
+    started  = time.monotonic()
+    assert llm_provider._hedged(provider, "prompt", "primary", 2) == "hedged (primary)"
+    assert time.monotonic() - started < 0.5
+    assert len(provider.calls) == 2
+    assert provider.calls[1][1] == pytest.approx(1.9, abs=0.05)
+
+
+def test_no_hedge_when_the_first_call_answers_in_time(chain, monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_HEDGE_AFTER", 0.2)
+    provider = chain({"primary": [(0.05, "plan")]})
+    assert llm_provider._hedged(provider, "prompt", "primary", 2) == "plan (primary)"
+    time.sleep(0.25)
+    assert len(provider.calls) == 1
+
+
+def test_hedged_call_times_out_when_neither_answers(chain, monkeypatch):
+    monkeypatch.setattr(llm_provider, "LLM_HEDGE_AFTER", 0.05)
+    provider = chain({"primary": [(0.5, "late")]})
+    with pytest.raises(TimeoutError):
+        llm_provider._hedged(provider, "prompt", "primary", 0.2)
+    assert len(provider.calls) == 2
@@ -0,0 +1,97 @@
+"""Tests for utils/mw_sections.py — on the benchmark fixtures and on both heading layouts."""
+
+import pytest
+from lxml import etree
+
+from benchmarks.cases import fixture
+from utils.mw_sections import extract_sections, text_of
+
+
+def _by_title(page) -> dict:
+    return {s.title: s for s in page.sections}
+
+
+@pytest.mark.parametrize("name", ["jaipur", "kochi"])
+def test_wikipedia_fixture(name):
+    page     = extract_sections(fixture(f"wikipedia_{name}.html"))
+    sections = _by_title(page)
+    assert len(page.lead) == 2
+    assert [s.title for s in page.sections if s.level == 2][:3] == ["etymology", "history", "geography"]
+    assert sections["places of interest"].level == 3
+    assert sections["places of interest"].parent == "tourism"
+    assert sections["cuisine"].parent == "culture"
+    assert len(sections["cuisine"].items) == 8
+    assert sections["rulers"].list_items == sections["rulers"].items
+    assert all("edit" not in s.title for s in page.sections)
+    assert page.first_paragraph(40) == page.lead[0]
+
+
+@pytest.mark.parametrize("name, see, names", [("jaipur", 12, 14), ("kochi", 10, 12)])
+def test_wikivoyage_fixture(name, see, names):
+    page     = extract_sections(fixture(f"wikivoyage_{name}.html"))
+    sections = _by_title(page)
+    assert len(sections["see"].items) == see
+    assert len(sections["see"].names) == names                  # listing names and <dt>s
+    assert sections["budget"].parent == "eat"
+    assert sections["mid-range"].parent == "eat"
+    assert sections["by train"].parent == "get in"
+    assert len(sections["drink"].names) == 6 and all(sections["drink"].names)
+
+
+def test_nothing_outside_the_article_body_is_parsed():
+    html = ('<html><body><div id="siteNotice"><h2>Donate</h2><p>Banner</p></div>'
+            '<div id="mw-content-text"><div class="mw-parser-output"><p>Lead.</p>'
+            '<h2>See</h2><ul><li>Fort</li></ul></div></div>'
+            '<div class="printfooter"><h2>Footer</h2><ul><li>Retrieved</li></ul></div></body></html>')
+    page = extract_sections(html)
+    assert page.lead == ["Lead."]
+    assert [(s.title, s.items) for s in page.sections] == [("see", ["Fort"])]
+
+
+def test_legacy_and_current_heading_layouts():
+    html = ('<div class="mw-parser-output">'
+            '<h2><span class="mw-headline" id="See">See</span>'
+            '<span class="mw-editsection">[<a>edit</a>]</span></h2><p>Sights.</p>'
+            '<div class="mw-heading mw-heading3"><h3 id="Forts">Forts &amp; <i>Palaces</i></h3>'
+            '<span class="mw-editsection">[<a>edit</a>]</span></div>'
+            '<dl><dt>Amber Fort</dt><dd>On a hill.</dd></dl>'
+            '<div class="mw-heading mw-heading2"><h2 id="Eat">Eat</h2></div>'
+            '<table><tr><td><ul><li>Ghevar</li></ul></td></tr></table></div>')
+    sections = extract_sections(html).sections
+    assert [(s.title, s.level, s.parent) for s in sections] == [
+        ("see", 2, None), ("forts & palaces", 3, "see"), ("eat", 2, None),
+    ]
+    assert sections[0].paragraphs == ["Sights."]
+    assert sections[1].names == ["Amber Fort"]
+    assert sections[2].items == ["Ghevar"]
+    assert sections[2].list_items == []                         # nested in a table, not a top-level list
+
+
+def test_parsoid_section_wrappers_and_listings():
+    html = ('<div class="mw-parser-output"><section><p>Lead.</p></section>'
+            '<section><h2>See</h2><ul><li><span class="vcard"><span class="fn org listing-name">'
+            '<bdi>Hawa Mahal</bdi></span> Palace of winds.</span></li></ul>'
+            '<section><h3>Museums</h3><p>Albert Hall.</p></section></section></div>')
+    page = extract_sections(html)
+    see, museums = page.sections
+    assert page.lead == ["Lead."]
+    assert see.names == ["Hawa Mahal"]
+    assert see.items == ["Hawa Mahal Palace of winds."]
+    assert (museums.parent, museums.paragraphs) == ("see", ["Albert Hall."])
+
+
+def test_h4_stays_inside_its_section():
+    html = '<div class="mw-parser-output"><h2>Do</h2><h4>Tours</h4><ul><li>Walk</li></ul></div>'
+    assert [(s.title, s.items) for s in extract_sections(html).sections] == [("do", ["Walk"])]
+
+
+@pytest.mark.parametrize("html", ["", "   ", "<!-- only a comment -->"])
+def test_empty_input(html):
+    page = extract_sections(html)
+    assert page.lead == [] and page.sections == []
+
+
+def test_text_of_joins_stripped_text_nodes():
+    page = extract_sections('<div class="mw-parser-output"><p> Amber <b>Fort</b>\n, Jaipur </p></div>')
+    assert page.lead == ["Amber Fort , Jaipur"]
+    assert text_of(etree.fromstring("<div><i> a </i>\n b </div>")) == "a b"
@@ -0,0 +1,125 @@
+"""Tests for services/plan_cache.py — fingerprints and near-match reuse."""
+
+import pytest
+
+from services import plan_cache
+from services.llm_provider import model_chain
+from services.plan_cache import cache_plan, get_cached_plan, plan_cache_key, trim_plan
+from utils.cache import delete_cached, get_cached
+
+PRIMARY, FALLBACK = model_chain()[0], "unlisted-model"
+
+
+def _request(**overrides) -> dict:
+    request = {
+        "from_location": "Delhi", "to": "Jaipur", "start_date": "2026-12-10", "nights": 3,
+        "budget": "moderate", "purposes": ["culture", "food"], "pace": "moderate", "checkpoints": [],
+        "accommodation": None, "group_size": "couple", "special_needs": None,
+        "total_budget": None, "currency": "INR",
+    }
+    request.update(overrides)
+    return request
+
+
+def _plan(days: int, model: str = PRIMARY) -> dict:
+    return {
+        "model": model,
+        "days": [{"day": n, "activities": [{"title": f"Day {n}", "cost_inr": 100}]} for n in range(1, days + 1)],
+        "budget_summary": {"accommodation_inr": 3000 * (days - 1), "food_inr": 1000 * days,
+                           "transport_inr": 500 * days, "activities_inr": 100 * days,
+                           "total_inr": 4600 * days - 3000},
+    }
+
+
+def test_key_ignores_formatting_but_not_content():
+    key = plan_cache_key(_request())
+    assert plan_cache_key(_request(to="  jaipur ", purposes=["Food", "culture", "food"])) == key
+    assert plan_cache_key(_request(start_date="2026-12-08")) == key          # same ISO week
+    assert plan_cache_key(_request(start_date="2026-12-17")) != key
+    assert plan_cache_key(_request(nights=4)) != key
+    assert plan_cache_key(_request(pace="relaxed")) != key
+
+
+def test_region_qualified_place_keeps_its_own_key():
+    paris = plan_cache_key(_request(to="Paris"))
+    assert plan_cache_key(_request(to="Paris, France")) == paris
+    assert plan_cache_key(_request(to="Paris, Texas")) != paris
+
+
+def test_exact_hit():
+    cache_plan(_request(), _plan(4))
+    plan, reused = get_cached_plan(_request(to="JAIPUR"))
+    assert reused is None
+    assert len(plan["days"]) == 4
+    assert plan["destination"] == "JAIPUR"
+
+
+def test_longer_plan_in_the_same_season_is_trimmed():
+    cache_plan(_request(nights=5, start_date="2026-12-20"), _plan(6))
+    plan, reused = get_cached_plan(_request(nights=2, start_date="2027-01-15"))
+    assert reused == {"nights": 5, "start_date": "2026-12-20"}
+    assert [d["day"] for d in plan["days"]] == [1, 2, 3]
+
+
+def test_prefers_the_closest_longer_plan():
+    cache_plan(_request(nights=7, start_date="2027-01-05"), _plan(8))
+    cache_plan(_request(nights=5, start_date="2027-02-02"), _plan(6))
+    cache_plan(_request(nights=2, start_date="2026-12-01"), _plan(3))
+    plan, reused = get_cached_plan(_request(nights=3))
+    assert reused == {"nights": 5, "start_date": "2027-02-02"}
+    assert len(plan["days"]) == 4
+
+
+@pytest.mark.parametrize("cached, wanted", [
+    ({"nights": 2}, {"nights": 3}),                                   # too short
+    ({"nights": 5}, {"nights": 3, "start_date": "2026-07-10"}),       # other season
+    ({"nights": 5}, {"nights": 3, "budget": "luxury"}),               # other family
+])
+def test_no_near_match(cached, wanted):
+    cache_plan(_request(**cached), _plan(cached["nights"] + 1))
+    assert get_cached_plan(_request(**wanted)) == (None, None)
+
+
+def test_near_match_can_be_switched_off(monkeypatch):
+    cache_plan(_request(nights=5), _plan(6))
+    monkeypatch.setattr(plan_cache, "PLAN_NEAR_MATCH", False)
+    assert get_cached_plan(_request(nights=3)) == (None, None)
+
+
+def test_prefers_the_best_model_then_the_closest_length():
+    cache_plan(_request(nights=4, start_date="2026-12-01"), _plan(5, FALLBACK))
+    cache_plan(_request(nights=7, start_date="2027-01-05"), _plan(8))
+    cache_plan(_request(nights=5, start_date="2027-02-02"), _plan(6))
+    plan, reused = get_cached_plan(_request(nights=3))
+    assert reused["nights"] == 5
+    assert plan["model"] == PRIMARY
+
+
+def test_fallback_plan_does_not_replace_a_better_one():
+    cache_plan(_request(), _plan(4))
+    cache_plan(_request(), _plan(2, FALLBACK))
+    plan, _ = get_cached_plan(_request())
+    assert plan["model"] == PRIMARY
+    assert len(plan["days"]) == 4
+
+
+def test_expired_plans_drop_out_of_the_family_index():
+    cache_plan(_request(nights=5), _plan(6))
+    delete_cached(plan_cache_key(_request(nights=5)))
+    assert get_cached_plan(_request(nights=3)) == (None, None)
+    assert get_cached(plan_cache._index_key(plan_cache._family(_request()))) == []
+
+
+def test_trim_plan_scales_the_budget():
+    plan    = trim_plan(_plan(5), 3)
+    summary = plan["budget_summary"]
+    assert len(plan["days"]) == 3
+    assert summary["accommodation_inr"] == 6000            # 2 of 4 nights
+    assert summary["food_inr"] == 3000                     # 3 of 5 days
+    assert summary["activities_inr"] == 300                # two 100 INR activities dropped
+    assert summary["total_inr"] == 6000 + 3000 + 1500 + 300
+
+
+def test_trim_plan_keeps_shorter_plans():
+    plan = _plan(2)
+    assert trim_plan(plan, 3) is plan
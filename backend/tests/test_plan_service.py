@@ -0,0 +1,154 @@
+"""Tests for services/plan_service.py — deterministic edits, budgets and versioned storage."""
+
+import copy
+
+import pytest
+
+from services.plan_service import (
+    PlanConflict, apply_operations, get_plan, recompute_budget, save_plan, shared_plan, update_plan,
+)
+
+
+def _activity(title: str, cost: int, alternatives: list = None) -> dict:
+    return {"time": "09:00", "title": title, "description": f"{title}.", "category": "sightseeing",
+            "cost_inr": cost, "alternatives": alternatives or []}
+
+
+@pytest.fixture
+def itinerary() -> dict:
+    return {
+        "destination": "Jaipur",
+        "days": [
+            {"day": 1, "activities": [
+                _activity("Amber Fort", 500, [
+                    {"title": "Nahargarh", "description": "Fort.", "category": "culture", "cost_inr": 200},
+                    {"title": "Jaigarh", "description": "Fort.", "category": "culture", "cost_inr": 150},
+                ]),
+                _activity("Hawa Mahal", 100),
+            ]},
+            {"day": 2, "activities": [_activity("City Palace", 700), _activity("Bazaar walk", 0)]},
+        ],
+        "budget_summary": {"accommodation_inr": 6000, "food_inr": 3000, "transport_inr": 1000,
+                           "activities_inr": 2600, "total_inr": 12600},
+    }
+
+
+def _titles(plan: dict, day: int) -> list:
+    return [a["title"] for a in plan["days"][day - 1]["activities"]]
+
+
+def test_swap_promotes_the_alternative_and_demotes_the_activity(itinerary):
+    plan = apply_operations(itinerary, [{"op": "swap", "day": 1, "activity": 0, "alternative": 1}])
+    swapped = plan["days"][0]["activities"][0]
+    assert swapped["title"] == "Jaigarh"
+    assert swapped["time"] == "09:00"                            # slot fields are kept
+    assert [a["title"] for a in swapped["alternatives"]] == ["Nahargarh", "Amber Fort"]
+    assert swapped["alternatives"][-1]["cost_inr"] == 500
+
+
+def test_move_within_and_across_days(itinerary):
+    plan = apply_operations(itinerary, [
+        {"op": "move", "day": 1, "activity": 0, "to_index": 1},
+        {"op": "move", "day": 2, "activity": 1, "to_index": 0, "to_day": 1},
+    ])
+    assert _titles(plan, 1) == ["Bazaar walk", "Hawa Mahal", "Amber Fort"]
+    assert _titles(plan, 2) == ["City Palace"]
+
+
+def test_delete(itinerary):
+    plan = apply_operations(itinerary, [{"op": "delete", "day": 2, "activity": 0}])
+    assert _titles(plan, 2) == ["Bazaar walk"]
+
+
+def test_operations_do_not_touch_the_original(itinerary):
+    before = copy.deepcopy(itinerary)
+    apply_operations(itinerary, [{"op": "delete", "day": 1, "activity": 0},
+                                 {"op": "move", "day": 2, "activity": 0, "to_index": 0, "to_day": 1}])
+    assert itinerary == before
+
+
+@pytest.mark.parametrize("op, message", [
+    ({"op": "delete", "day": 3, "activity": 0}, "no day 3"),
+    ({"op": "delete", "day": 1, "activity": 5}, "no activity 5"),
+    ({"op": "swap", "day": 1, "activity": 1, "alternative": 0}, "no alternative 0"),
+    ({"op": "swap", "day": 1, "activity": 0}, "no alternative None"),
+    ({"op": "move", "day": 1, "activity": 0, "to_index": 9}, "invalid to_index 9"),
+    ({"op": "move", "day": 1, "activity": 0, "to_index": 0, "to_day": 4}, "no day 4"),
+])
+def test_invalid_operations_raise(itinerary, op, message):
+    with pytest.raises(ValueError, match=message):
+        apply_operations(itinerary, [{"op": "delete", "day": 2, "activity": 1}, op])
+
+
+def test_budget_follows_the_activity_costs(itinerary):
+    plan    = apply_operations(itinerary, [{"op": "swap", "day": 1, "activity": 0, "alternative": 0},
+                                           {"op": "delete", "day": 2, "activity": 0}])
+    summary = plan["budget_summary"]
+    assert summary["activities_inr"] == 2600 - 300 - 700
+    assert summary["total_inr"] == 6000 + 3000 + 1000 + 1600
+    assert itinerary["budget_summary"]["activities_inr"] == 2600
+
+
+def test_recompute_budget_never_goes_negative(itinerary):
+    plan = copy.deepcopy(itinerary)
+    plan["budget_summary"]["activities_inr"] = 100
+    plan["days"] = []
+    summary = recompute_budget(plan, itinerary)
+    assert summary["activities_inr"] == 0
+    assert summary["total_inr"] == 10000
+
+
+def test_recompute_budget_without_a_summary(itinerary):
+    del itinerary["budget_summary"]
+    assert recompute_budget(itinerary, itinerary) == {}
+
+
+def test_saved_plan_round_trips_at_version_1(itinerary):
+    plan_id = save_plan(itinerary, {"to": "Jaipur"}, {"condition": "Sunny"})
+    record  = get_plan(plan_id)
+    assert record["version"] == 1
+    assert record["itinerary"] == itinerary
+    assert record["weather"] == {"condition": "Sunny"}
+    assert get_plan("missing") is None
+
+
+def test_update_bumps_the_version(itinerary):
+    record  = get_plan(save_plan(itinerary, {"to": "Jaipur"}))
+    edited  = apply_operations(itinerary, [{"op": "delete", "day": 1, "activity": 1}])
+    updated = update_plan(record, edited)
+    assert updated["version"] == 2
+    assert get_plan(record["plan_id"])["itinerary"] == edited
+
+
+def test_update_from_a_stale_read_conflicts(itinerary):
+    plan_id = save_plan(itinerary, {"to": "Jaipur"})
+    first, second = get_plan(plan_id), get_plan(plan_id)
+    update_plan(first, apply_operations(itinerary, [{"op": "delete", "day": 1, "activity": 1}]))
+    with pytest.raises(PlanConflict):
+        update_plan(second, apply_operations(itinerary, [{"op": "delete", "day": 2, "activity": 1}]))
+    assert _titles(get_plan(plan_id)["itinerary"], 2) == ["City Palace", "Bazaar walk"]
+
+
+def test_requests_for_one_cache_key_share_a_plan(itinerary):
+    first  = shared_plan("plan_jaipur", itinerary, {"to": "Jaipur"})
+    second = shared_plan("plan_jaipur", copy.deepcopy(itinerary), {"to": "Jaipur"})
+    assert second["plan_id"] == first["plan_id"]
+    assert shared_plan("plan_kochi", itinerary, {"to": "Kochi"})["plan_id"] != first["plan_id"]
+
+
+def test_a_regenerated_itinerary_gets_a_new_shared_plan(itinerary):
+    first   = shared_plan("plan_jaipur", itinerary, {"to": "Jaipur"})
+    edited  = apply_operations(itinerary, [{"op": "delete", "day": 1, "activity": 1}])
+    second  = shared_plan("plan_jaipur", edited, {"to": "Jaipur"})
+    assert second["plan_id"] != first["plan_id"]
+    assert shared_plan("plan_jaipur", edited, {"to": "Jaipur"})["plan_id"] == second["plan_id"]
+
+
+def test_editing_a_shared_plan_forks_it(itinerary):
+    shared  = shared_plan("plan_jaipur", itinerary, {"to": "Jaipur"}, {"condition": "Sunny"})
+    edited  = apply_operations(itinerary, [{"op": "delete", "day": 1, "activity": 1}])
+    forked  = update_plan(shared, edited)
+    assert forked["plan_id"] != shared["plan_id"] and forked["version"] == 1
+    assert get_plan(forked["plan_id"])["weather"] == {"condition": "Sunny"}
+    assert get_plan(shared["plan_id"])["itinerary"] == itinerary
+    assert update_plan(get_plan(forked["plan_id"]), itinerary)["version"] == 2
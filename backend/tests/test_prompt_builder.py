@@ -0,0 +1,76 @@
+"""Tests for services/prompt_builder.py — prefix choice and token budgeting."""
+
+import json
+
+import pytest
+
+from services import gemini_service
+from services.logic_service import build_context
+from services.prompt_builder import ALTERNATIVES_INSTRUCTION, PREFIXES, build_itinerary_prompt
+
+REQUEST = {
+    "from_location": "Delhi", "to": "Jaipur", "start_date": "2026-12-10", "nights": 2,
+    "budget": "moderate", "purposes": ["culture"], "pace": "moderate", "group_size": "couple",
+}
+DATA = {
+    "summary": "Jaipur is the capital of Rajasthan. It is known as the Pink City.",
+    "attractions": ["Amber Fort – hilltop fort", "City Palace – royal residence", "Hawa Mahal – palace of winds"],
+    "food": ["Dal baati churma at a local dhaba", "Lassi at Lassiwala"],
+}
+PLAN = {
+    "destination": "Jaipur",
+    "days": [{"day": 1, "theme": "Forts", "activities": [{
+        "time": "09:00", "title": "Amber Fort", "description": "Hilltop fort.", "category": "culture",
+        "cost_inr": 500, "alternatives": [{"title": "Nahargarh", "description": "Sunset views.",
+                                           "category": "sightseeing", "cost_inr": 200}],
+    }]}],
+}
+
+
+@pytest.fixture(autouse=True)
+def index_source(monkeypatch):
+    monkeypatch.setattr("services.prompt_builder.ALTERNATIVES_SOURCE", "index")
+    monkeypatch.setattr("services.gemini_service.ALTERNATIVES_SOURCE", "index")
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    sent = []
+
+    def generate_text(prompt, budget=None):
+        sent.append(prompt)
+        return json.dumps(PLAN), "stub"
+
+    monkeypatch.setattr(gemini_service, "generate_text", generate_text)
+    return sent
+
+
+def test_prefix_follows_the_alternatives_flag():
+    context = build_context(REQUEST)
+    without, _ = build_itinerary_prompt(context, DATA, REQUEST, wire_format="full")
+    with_alts, _ = build_itinerary_prompt(context, DATA, REQUEST, wire_format="full", alternatives=True)
+    assert without.startswith(PREFIXES[("full", False)])
+    assert with_alts.startswith(PREFIXES[("full", True)])
+    assert ALTERNATIVES_INSTRUCTION in with_alts and ALTERNATIVES_INSTRUCTION not in without
+
+
+def test_index_source_fills_alternatives_locally(prompts):
+    result = gemini_service.generate_itinerary(build_context(REQUEST), DATA, REQUEST)
+    assert ALTERNATIVES_INSTRUCTION not in prompts[0]
+    titles = [alt["title"] for alt in result["days"][0]["activities"][0]["alternatives"]]
+    assert titles and "Nahargarh" not in titles
+
+
+def test_empty_index_asks_the_model_for_alternatives(prompts):
+    result = gemini_service.generate_itinerary(build_context(REQUEST), {"summary": ""}, REQUEST)
+    assert ALTERNATIVES_INSTRUCTION in prompts[0]
+    assert result["days"][0]["activities"][0]["alternatives"] == PLAN["days"][0]["activities"][0]["alternatives"]
+
+
+def test_empty_index_streams_the_model_alternatives(prompts, monkeypatch):
+    monkeypatch.setattr(gemini_service, "stream_text", lambda prompt, budget=None: (
+        prompts.append(prompt) or iter([(json.dumps(PLAN), "stub")])))
+    events = list(gemini_service.stream_itinerary(build_context(REQUEST), {}, REQUEST))
+    assert ALTERNATIVES_INSTRUCTION in prompts[0]
+    day = dict(events)["day"]
+    assert day["activities"][0]["alternatives"][0]["title"] == "Nahargarh"
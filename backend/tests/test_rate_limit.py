@@ -0,0 +1,69 @@
+"""Tests for utils/rate_limit.py — concurrency slots and the token bucket."""
+
+import threading
+import time
+
+import pytest
+
+from utils.rate_limit import CallLimiter, RateLimited, TokenBucket
+
+
+def test_bucket_allows_a_burst_then_refills():
+    bucket = TokenBucket(rate=20, capacity=3)
+    assert all(bucket.acquire(0) for _ in range(3))
+    assert not bucket.acquire(0)
+    started = time.monotonic()
+    assert bucket.acquire(1)
+    assert time.monotonic() - started == pytest.approx(0.05, abs=0.03)
+
+
+def test_concurrency_limit_rejects_after_the_timeout():
+    limiter = CallLimiter("test", max_concurrent=1, per_minute=6000)
+    with limiter.slot(timeout=1):
+        started = time.monotonic()
+        with pytest.raises(RateLimited, match="concurrency"):
+            with limiter.slot(timeout=0.1):
+                pass
+        assert time.monotonic() - started >= 0.1
+    stats = limiter.stats()
+    assert (stats["calls"], stats["rejected"], stats["in_flight"]) == (1, 1, 0)
+
+
+def test_a_queued_call_gets_the_slot_when_it_frees():
+    limiter, order = CallLimiter("test", max_concurrent=1, per_minute=6000), []
+    entered = threading.Event()
+
+    def first():
+        with limiter.slot(timeout=1):
+            entered.set()
+            time.sleep(0.1)
+            order.append("first")
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    entered.wait(1)
+    with limiter.slot(timeout=1):
+        order.append("second")
+    thread.join()
+    assert order == ["first", "second"]
+    assert limiter.stats()["avg_queued_ms"] > 0
+
+
+def test_rate_limit_rejects_and_frees_the_concurrency_slot():
+    limiter = CallLimiter("test", max_concurrent=2, per_minute=1, burst=1)
+    with limiter.slot(timeout=0.1):
+        pass
+    with pytest.raises(RateLimited, match="rate"):
+        with limiter.slot(timeout=0.05):
+            pass
+    assert limiter._sem.acquire(blocking=False) and limiter._sem.acquire(blocking=False)
+
+
+def test_the_slot_is_released_when_the_call_raises():
+    limiter = CallLimiter("test", max_concurrent=1, per_minute=6000)
+    with pytest.raises(ValueError):
+        with limiter.slot(timeout=0.1):
+            raise ValueError("upstream error")
+    with limiter.slot(timeout=0.1):
+        pass
+    assert limiter.stats()["in_flight"] == 0
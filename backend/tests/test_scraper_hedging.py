@@ -0,0 +1,86 @@
+"""Tests for scraper._fetch_all — the scrape deadline and hedged retries."""
+
+import threading
+import time
+
+import pytest
+
+from services import scraper
+
+
+@pytest.fixture(autouse=True)
+def no_history(monkeypatch):
+    """Start every test without recorded source latencies."""
+    monkeypatch.setattr(scraper, "_latencies", {})
+    monkeypatch.setattr(scraper, "SCRAPE_HEDGE", True)
+
+
+def _first_call_hangs(result: dict, hang: float = 1.0):
+    """A scraper whose first call stalls for `hang` seconds and later calls answer at once."""
+    calls = []
+    lock  = threading.Lock()
+
+    def scrape(destination):
+        with lock:
+            calls.append(time.monotonic())
+            first = len(calls) == 1
+        if first:
+            time.sleep(hang)
+        return {**result, "call": 1 if first else len(calls)}
+
+    return scrape, calls
+
+
+def test_a_slow_source_is_hedged_and_the_first_answer_wins():
+    slow, calls = _first_call_hangs({"summary": "Jaipur"})
+    started = time.monotonic()
+    results = scraper._fetch_all("Jaipur", {"wikipedia": (slow, 0.2)}, deadline=2)
+    assert results == {"wikipedia": {"summary": "Jaipur", "call": 2}}
+    assert len(calls) == 2
+    assert calls[1] - started == pytest.approx(0.1, abs=0.08)     # HEDGE_DEFAULT_FRACTION of 0.2 s
+    assert time.monotonic() - started < 0.5
+
+
+def test_hedge_delay_follows_recorded_latencies(monkeypatch):
+    monkeypatch.setattr(scraper, "SCRAPE_HEDGE_PERCENTILE", 0.9)
+    assert scraper._hedge_delay("wikipedia", 3) == 3 * scraper.HEDGE_DEFAULT_FRACTION
+    scraper._latencies["wikipedia"] = [i / 100 for i in range(scraper.HEDGE_MIN_SAMPLES)]
+    assert scraper._hedge_delay("wikipedia", 3) == pytest.approx(0.18)
+
+
+def test_no_hedge_when_disabled(monkeypatch):
+    monkeypatch.setattr(scraper, "SCRAPE_HEDGE", False)
+    slow, calls = _first_call_hangs({"summary": "Jaipur"}, hang=0.3)
+    assert scraper._fetch_all("Jaipur", {"wikipedia": (slow, 0.2)}, deadline=2) == {
+        "wikipedia": {"summary": "Jaipur", "call": 1}}
+    assert len(calls) == 1
+
+
+def test_sources_past_the_deadline_are_dropped():
+    def hang(destination):
+        time.sleep(1)
+        return {"late": True}
+
+    started = time.monotonic()
+    results = scraper._fetch_all("Jaipur", {
+        "wikipedia":        (lambda d: {"summary": d}, 3),
+        "incredible_india": (hang, 3),
+    }, deadline=0.2)
+    assert results == {"wikipedia": {"summary": "Jaipur"}}
+    assert time.monotonic() - started < 0.4
+
+
+def test_a_failed_source_is_left_out_once_its_hedge_fails_too():
+    calls = []
+
+    def broken(destination):
+        calls.append(1)
+        time.sleep(0.15)
+        raise ValueError("HTTP 503")
+
+    results = scraper._fetch_all("Jaipur", {
+        "wikipedia":  (lambda d: {"summary": d}, 3),
+        "wikivoyage": (broken, 0.2),
+    }, deadline=1)
+    assert results == {"wikipedia": {"summary": "Jaipur"}}
+    assert len(calls) == 2
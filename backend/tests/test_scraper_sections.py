@@ -0,0 +1,97 @@
+"""Tests for scraper.fetch_sections / fetch_article against the local upstream stubs."""
+
+import time
+
+import pytest
+
+from benchmarks.cases import fixture
+from loadtest.stubs import StubCluster
+from services import scraper
+
+SOURCES = {
+    "wikipedia":  ("WIKIPEDIA_BASE_URL", scraper._wiki_wanted, scraper._wiki_result, scraper.parse_wikipedia),
+    "wikivoyage": ("WIKIVOYAGE_BASE_URL", scraper._voyage_wanted, scraper._voyage_result, scraper.parse_wikivoyage),
+}
+
+
+@pytest.fixture(scope="module")
+def stubs():
+    cluster = StubCluster({name: {"latency_ms": 0} for name in SOURCES}).start()
+    yield cluster
+    cluster.stop()
+
+
+def _sections(stubs, source: str, title: str) -> dict:
+    setting, wanted, build, _ = SOURCES[source]
+    return scraper.fetch_sections(stubs.base_urls()[setting], title, 5, wanted, build, source)
+
+
+def _calls(stubs, source: str) -> dict:
+    return stubs.upstreams[source].stats()
+
+
+@pytest.mark.parametrize("source", SOURCES)
+@pytest.mark.parametrize("destination", ["Jaipur", "Kochi"])
+def test_api_result_matches_the_full_page_parse(stubs, source, destination):
+    parse = SOURCES[source][3]
+    assert _sections(stubs, source, destination) == parse(fixture(f"{source}_{destination.lower()}.html"))
+
+
+def test_only_the_lead_and_wanted_sections_are_fetched(stubs):
+    before = _calls(stubs, "wikipedia")["api"]
+    _sections(stubs, "wikipedia", "Jaipur")
+    # section index, lead, then "tourism" and "culture" (their h3s come with them)
+    assert _calls(stubs, "wikipedia")["api"] - before == 4
+
+
+def test_redirected_title_is_followed(stubs):
+    assert _sections(stubs, "wikivoyage", "jaipur") == _sections(stubs, "wikivoyage", "Jaipur")
+
+
+def test_second_read_comes_from_the_cache(stubs):
+    first  = _sections(stubs, "wikivoyage", "Kochi")
+    before = _calls(stubs, "wikivoyage")
+    assert _sections(stubs, "wikivoyage", "Kochi") == first
+    assert _calls(stubs, "wikivoyage") == before
+
+
+def test_fetch_article_falls_back_to_the_full_page(stubs, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ValueError("parse API error: missingtitle")
+
+    monkeypatch.setattr(scraper, "WIKI_FETCH_MODE", "api")
+    monkeypatch.setattr(scraper, "_parse_api", broken)
+    before = _calls(stubs, "wikipedia")
+    setting, wanted, build, parse = SOURCES["wikipedia"]
+    result = scraper.fetch_article(stubs.base_urls()[setting], "Jaipur", 5, wanted, build, parse, "wikipedia")
+    after  = _calls(stubs, "wikipedia")
+    assert result == parse(fixture("wikipedia_jaipur.html"))
+    assert (after["requests"] - before["requests"], after["api"] - before["api"]) == (1, 0)
+
+
+def test_html_mode_reads_the_page(stubs, monkeypatch):
+    monkeypatch.setattr(scraper, "WIKI_FETCH_MODE", "html")
+    setting, wanted, build, parse = SOURCES["wikivoyage"]
+    before = _calls(stubs, "wikivoyage")["api"]
+    result = scraper.fetch_article(stubs.base_urls()[setting], "Kochi", 5, wanted, build, parse, "wikivoyage")
+    assert result == parse(fixture("wikivoyage_kochi.html"))
+    assert _calls(stubs, "wikivoyage")["api"] == before
+
+
+def test_index_and_sections_share_one_budget(stubs, monkeypatch):
+    monkeypatch.setattr(stubs.upstreams["wikipedia"], "latency_ms", 300)
+    setting, wanted, build, _ = SOURCES["wikipedia"]
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        scraper.fetch_sections(stubs.base_urls()[setting], "Kochi", 0.45, wanted, build, "wikipedia")
+    assert time.monotonic() - started < 0.6
+
+
+def test_full_page_fallback_gets_only_what_is_left(stubs, monkeypatch):
+    monkeypatch.setattr(scraper, "WIKI_FETCH_MODE", "api")
+    monkeypatch.setattr(stubs.upstreams["wikipedia"], "latency_ms", 300)
+    setting, wanted, build, parse = SOURCES["wikipedia"]
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        scraper.fetch_article(stubs.base_urls()[setting], "Kochi", 0.45, wanted, build, parse, "wikipedia")
+    assert time.monotonic() - started < 0.6
@@ -0,0 +1,110 @@
+"""Tests for utils/singleflight.py — coalescing identical in-flight calls."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _waiters(group: SingleFlight, key: str, count: int) -> None:
+    """Block until `count` callers are waiting on the key's in-flight call."""
+    deadline = time.monotonic() + 2
+    while key not in group._calls or group._calls[key].waiters < count:
+        assert time.monotonic() < deadline, "callers never joined"
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    group, calls, release = SingleFlight("test"), [], threading.Event()
+
+    def work():
+        calls.append(1)
+        release.wait(2)
+        return {"plan": 1}
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(group.do, "k", work) for _ in range(4)]
+        _waiters(group, "k", 3)
+        release.set()
+        results = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert group._calls == {}
+
+
+def test_an_error_reaches_every_waiter_and_is_not_remembered():
+    group, release = SingleFlight("test"), threading.Event()
+
+    def fail():
+        release.wait(2)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(group.do, "k", fail) for _ in range(3)]
+        _waiters(group, "k", 2)
+        release.set()
+        errors = [f.exception() for f in futures]
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert group.do("k", lambda: "fresh") == "fresh"
+
+
+def test_different_keys_run_separately():
+    group = SingleFlight("test")
+    assert [group.do(k, lambda k=k: k.upper()) for k in ("a", "b")] == ["A", "B"]
+
+
+def test_async_callers_share_one_task():
+    group, calls = AsyncSingleFlight("test"), []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return {"value": value}
+
+    async def main():
+        results = await asyncio.gather(*(group.do("k", work, n) for n in range(5)))
+        assert group.in_flight() == 0
+        return results
+
+    results = asyncio.run(main())
+    assert calls == [0]
+    assert all(r is results[0] for r in results)
+
+
+def test_async_waiter_cancellation_does_not_cancel_the_work():
+    group, finished = AsyncSingleFlight("test"), []
+
+    async def work():
+        await asyncio.sleep(0.02)
+        finished.append(True)
+        return "done"
+
+    async def main():
+        first  = asyncio.ensure_future(group.do("k", work))
+        second = asyncio.ensure_future(group.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+    assert finished == [True]
+
+
+def test_async_errors_propagate_and_clear_the_key():
+    group = AsyncSingleFlight("test")
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(group.do("k", fail), group.do("k", fail), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert group.in_flight() == 0
+
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Tests for services/weather_service.py — per-day forecast reuse on the grid."""
+
+from datetime import date, timedelta
+
+import pytest
+
+from services import weather_service
+
+
+class _Response:
+    def __init__(self, payload: dict):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def forecasts(monkeypatch):
+    """Stub the forecast API; returns the list of request params it served."""
+    requests = []
+
+    def get(url, params=None, **kwargs):
+        requests.append(params)
+        first = date.fromisoformat(params["start_date"])
+        days  = (date.fromisoformat(params["end_date"]) - first).days + 1
+        times = [(first + timedelta(days=i)).isoformat() for i in range(days)]
+        return _Response({"daily": {
+            "time":               times,
+            "temperature_2m_max": [30 + i for i in range(days)],
+            "temperature_2m_min": [20] * days,
+            "precipitation_sum":  [0] * days,
+            "weathercode":        [0] * days,
+        }})
+
+    monkeypatch.setattr(weather_service.http_client, "get", get)
+    return requests
+
+
+def _dates(offset: int, count: int) -> list:
+    return [(date.today() + timedelta(days=offset + i)).isoformat() for i in range(count)]
+
+
+def test_nearby_destinations_share_a_grid_cell(forecasts):
+    first  = weather_service._fetch_forecast(26.9124, 75.7873, _dates(1, 3))      # Jaipur
+    second = weather_service._fetch_forecast(26.95, 75.82, _dates(1, 3))          # a few km away
+    assert second == first
+    assert len(forecasts) == 1
+    assert (forecasts[0]["latitude"], forecasts[0]["longitude"]) == (27.0, 75.75)
+
+
+def test_overlapping_trips_fetch_only_the_missing_days(forecasts):
+    weather_service._fetch_forecast(26.9124, 75.7873, _dates(1, 3))
+    result = weather_service._fetch_forecast(26.9124, 75.7873, _dates(2, 4))
+    assert all(result)
+    assert len(forecasts) == 2
+    assert (forecasts[1]["start_date"], forecasts[1]["end_date"]) == (_dates(4, 1)[0], _dates(5, 1)[0])
+
+
+def test_another_cell_is_fetched_separately(forecasts):
+    weather_service._fetch_forecast(26.9124, 75.7873, _dates(1, 2))
+    weather_service._fetch_forecast(9.9312, 76.2673, _dates(1, 2))               # Kochi
+    assert len(forecasts) == 2
+
+
+def test_a_failed_fetch_leaves_the_missing_days_empty(forecasts, monkeypatch):
+    weather_service._fetch_forecast(26.9124, 75.7873, _dates(1, 1))
+
+    def down(*args, **kwargs):
+        raise ConnectionError("forecast API down")
+
+    monkeypatch.setattr(weather_service.http_client, "get", down)
+    result = weather_service._fetch_forecast(26.9124, 75.7873, _dates(1, 2))
+    assert result[0]["temperature_2m_max"] == 30 and result[1] is None
+
+
+def test_trip_dates_stop_at_the_forecast_horizon():
+    start = date.today() + timedelta(days=weather_service.FORECAST_HORIZON_DAYS - 2)
+    assert weather_service._trip_dates(start.isoformat(), 5) == [
+        start.isoformat(), (start + timedelta(days=1)).isoformat()]
+    assert weather_service._trip_dates("not a date", 2) == []
@@ -0,0 +1,92 @@
+"""Tests for services/wire_format.py — expanding the compact Gemini output."""
+
+from services.wire_format import expand_activity, expand_day, expand_itinerary, period_for
+
+COMPACT = {
+    "d": "Jaipur",
+    "days": [
+        {"t": "Forts", "a": [
+            ["09:00", "Amber Fort", "Hilltop fort.", "s", 500, [
+                ["Nahargarh", "Sunset views.", "c", "200"],
+                ["Jaigarh", "Cannon museum.", "x", None],
+            ]],
+            ["19:30", "Chokhi Dhani", "Village dinner.", "f", 1200.0],
+        ]},
+        {"t": "Bazaars", "a": []},
+    ],
+    "b": [6000, "3000", 1000, 1700, 11700],
+    "s": ["❄️ Winter", "#06b6d4", "Cool and dry.", ["Layer up"]],
+    "tr": ["Train", "Short hop", "JAI, 13 km", "Jaipur Junction", "NH48"],
+    "partial": True,
+}
+
+
+def test_expand_itinerary():
+    plan = expand_itinerary(COMPACT)
+    assert plan["destination"] == "Jaipur"
+    assert plan["partial"] is True
+    assert plan["tips"] == []
+    assert plan["budget_summary"] == {"accommodation_inr": 6000, "food_inr": 3000, "transport_inr": 1000,
+                                      "activities_inr": 1700, "total_inr": 11700}
+    assert plan["seasonal_insight"]["description"] == "Cool and dry."
+    assert plan["seasonal_insight"]["tips"] == ["Layer up"]
+    assert plan["transport_intelligence"]["recommended_mode"] == "Train"
+    assert plan["transport_intelligence"]["road_connectivity"] == "NH48"
+    assert [d["day"] for d in plan["days"]] == [1, 2]
+    assert plan["days"][1] == {"day": 2, "theme": "Bazaars", "activities": []}
+
+
+def test_expand_activity_and_alternatives():
+    fort, dinner = expand_itinerary(COMPACT)["days"][0]["activities"]
+    assert fort == {
+        "time": "09:00", "period": "morning", "title": "Amber Fort", "description": "Hilltop fort.",
+        "category": "sightseeing", "cost_inr": 500,
+        "alternatives": [
+            {"title": "Nahargarh", "description": "Sunset views.", "category": "culture", "cost_inr": 200},
+            {"title": "Jaigarh", "description": "Cannon museum.", "category": "sightseeing", "cost_inr": 0},
+        ],
+    }
+    assert dinner["period"] == "evening"
+    assert dinner["category"] == "food"
+    assert dinner["cost_inr"] == 1200
+    assert dinner["alternatives"] == []
+
+
+def test_short_activity_gets_defaults():
+    assert expand_activity(["", "Walk"]) == {
+        "time": "09:00", "period": "morning", "title": "Walk", "description": "",
+        "category": "sightseeing", "cost_inr": 0, "alternatives": [],
+    }
+
+
+def test_full_category_names_are_accepted():
+    assert expand_activity(["10:00", "Spa", "", "relaxation", 0])["category"] == "relaxation"
+    assert expand_activity(["10:00", "Trek", "", "Adventure", 0])["category"] == "adventure"
+
+
+def test_full_format_passes_through():
+    full = {"destination": "Kochi", "days": [{"day": 1, "theme": "Fort Kochi", "activities": []}]}
+    assert expand_itinerary(full) is full
+    assert expand_day(full["days"][0], 1) is full["days"][0]
+    activity = {"title": "Ferry"}
+    assert expand_activity(activity) is activity
+
+
+def test_expand_day_numbers_by_position():
+    day = expand_day({"t": "Backwaters", "a": [["08:00", "Houseboat", "", "r", 0], "junk", None]}, 3)
+    assert day["day"] == 3
+    assert day["theme"] == "Backwaters"
+    assert [a["title"] for a in day["activities"]] == ["Houseboat"]
+
+
+def test_detects_compact_days_without_top_level_keys():
+    plan = expand_itinerary({"days": [{"t": "Day out", "a": []}]})
+    assert plan["days"] == [{"day": 1, "theme": "Day out", "activities": []}]
+    assert plan["destination"] == ""
+
+
+def test_period_for():
+    assert [period_for(t) for t in ("06:00", "10:59", "11:00", "13:45", "14:00", "17:59", "18:00")] == [
+        "morning", "morning", "midday", "midday", "afternoon", "afternoon", "evening",
+    ]
+    assert period_for("noon") == "morning"
@@ -1,25 +1,153 @@
 """
-cache.py — JSON file-based caching with TTL.
+cache.py — Two-tier cache with TTL: in-process LRU in front of a persistent store.
+
+Memory tier: size-bounded (entries and bytes) LRU holding decoded dicts, so
+hot keys are served without a disk read or a JSON decode. An entry is fresh
+for CACHE_MEMORY_TTL after it was loaded; for CACHE_MEMORY_SWR seconds after
+that it is still served while a background refresh re-reads the store.
+
+Store tier: a pluggable CacheBackend (see cache_backends.py) chosen by
+CACHE_BACKEND — a single SQLite file by default, or one JSON file per key.
+Saved plans live in a second store of the same kind (get_plan_store), kept
+out of reach of the cache's size eviction.
+
+Values returned by get_cached() are shared with the memory tier — treat them
+as read-only.
 """
 
-import json
 import os
 import time
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+from config import (
+    CACHE_BACKEND, CACHE_DB_PATH, CACHE_MAX_BYTES,
+    CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_BYTES, CACHE_MEMORY_TTL, CACHE_MEMORY_SWR,
+)
+from utils.cache_backends import CacheBackend, SQLiteBackend, FileBackend
+from utils import tracing
+from utils.metrics import REGISTRY, CACHE_SECONDS, Family
+
 logger = logging.getLogger(__name__)
 
-# Store cached files in backend/data/
+# Store cached data in backend/data/
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
-TTL      = 60 * 60 * 24 * 7   # 7 days
+TTL      = 60 * 60 * 24 * 7   # 7 days (default; set_cached can override per key)
+
+
+# ──────────────────────────────────────────────
+# Memory tier
+# ──────────────────────────────────────────────
+
+class _MemoryEntry:
+    __slots__ = ("data", "size", "expires_at", "loaded_at")
+
+    def __init__(self, data: dict, size: int, expires_at: float):
+        self.data       = data
+        self.size       = size
+        self.expires_at = expires_at
+        self.loaded_at  = time.time()
+
+
+class _MemoryTier:
+    """Thread-safe LRU bounded by entry count and approximate bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+        self._entries    = OrderedDict()
+        self._bytes      = 0
+        self._lock       = threading.Lock()
+
+    def get(self, key: str) -> Optional[_MemoryEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: _MemoryEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                _stats["memory"]["evictions"] += 1
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
 
+    def usage(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
 
-def _path(key: str) -> str:
-    """Return the file path for a given cache key."""
-    safe = "".join(c if c.isalnum() or c in "_-" else "_" for c in key)
-    return os.path.join(DATA_DIR, f"{safe}.json")
 
+_memory      = _MemoryTier(CACHE_MEMORY_MAX_ENTRIES, CACHE_MEMORY_MAX_BYTES)
+_refresher   = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+_refreshing  = set()
+_refresh_lock = threading.Lock()
+
+_stats = {
+    "memory": {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0},
+    "store":  {"hits": 0, "misses": 0, "errors": 0, "writes": 0},
+}
+
+_get_seconds = CACHE_SECONDS.labels(op="get")
+_set_seconds = CACHE_SECONDS.labels(op="set")
+
+_backend = None
+_plan_store = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> CacheBackend:
+    """Return the configured persistent backend, opening it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if CACHE_BACKEND == "file":
+                    _backend = FileBackend(DATA_DIR, TTL)
+                else:
+                    _backend = SQLiteBackend(CACHE_DB_PATH or os.path.join(DATA_DIR, "cache.db"), CACHE_MAX_BYTES)
+                logger.info(f"Cache store: {_backend.name}")
+    return _backend
+
+
+def get_plan_store() -> CacheBackend:
+    """
+    Return the persistent store for saved plans, opening it on first use.
+
+    Same kind as the cache store, but its own table in the SQLite file (or a
+    plans/ directory), never size-evicted: plans outlive cache entries.
+    """
+    global _plan_store
+    if _plan_store is None:
+        with _backend_lock:
+            if _plan_store is None:
+                if CACHE_BACKEND == "file":
+                    _plan_store = FileBackend(os.path.join(DATA_DIR, "plans"), TTL)
+                else:
+                    _plan_store = SQLiteBackend(CACHE_DB_PATH or os.path.join(DATA_DIR, "cache.db"), None,
+                                                table="plans")
+    return _plan_store
+
+
+# ──────────────────────────────────────────────
+# Public API
+# ──────────────────────────────────────────────
 
 def get_cached(key: str) -> Optional[dict]:
     """
@@ -27,33 +155,149 @@ def get_cached(key: str) -> Optional[dict]:
 
     Returns the data dict if found and within TTL, otherwise None.
     """
-    os.makedirs(DATA_DIR, exist_ok=True)
-    path = _path(key)
+    started = time.perf_counter()
+    data    = _get(key)
+    elapsed = time.perf_counter() - started
+    _get_seconds.observe(elapsed)
+    tracing.add("cache", elapsed)
+    return data
+
 
-    if not os.path.exists(path):
+def _get(key: str) -> Optional[dict]:
+    now   = time.time()
+    entry = _memory.get(key)
+
+    if entry is not None:
+        age = now - entry.loaded_at
+        if entry.expires_at <= now:
+            _memory.pop(key)
+        elif age <= CACHE_MEMORY_TTL:
+            _stats["memory"]["hits"] += 1
+            return entry.data
+        elif age <= CACHE_MEMORY_TTL + CACHE_MEMORY_SWR:
+            _stats["memory"]["stale_hits"] += 1
+            _schedule_refresh(key)
+            return entry.data
+        else:
+            _memory.pop(key)
+
+    _stats["memory"]["misses"] += 1
+    loaded = _read_store(key)
+    if loaded is None:
         return None
 
+    data, size, expires_at = loaded
+    _memory.put(key, _MemoryEntry(data, size, expires_at))
+    return data
+
+
+def set_cached(key: str, data: dict, ttl: int = None) -> None:
+    """Save data to both tiers under the given key, expiring after ttl seconds (default TTL)."""
+    started    = time.perf_counter()
+    expires_at = time.time() + (ttl or TTL)
+    try:
+        size = get_backend().set(key, data, expires_at)
+        _stats["store"]["writes"] += 1
+    except Exception as e:
+        _stats["store"]["errors"] += 1
+        logger.warning(f"Cache write error ({key}): {e}")
+        return
+    _memory.put(key, _MemoryEntry(data, size, expires_at))
+    elapsed = time.perf_counter() - started
+    _set_seconds.observe(elapsed)
+    tracing.add("cache", elapsed)
+
+
+def delete_cached(key: str) -> None:
+    """Remove a key from both tiers."""
+    _memory.pop(key)
+    try:
+        get_backend().delete(key)
+    except Exception as e:
+        logger.warning(f"Cache delete error ({key}): {e}")
+
+
+def purge_expired() -> int:
+    """Batch-remove expired entries and plans from the stores. Returns how many were dropped."""
+    try:
+        return get_backend().purge_expired() + get_plan_store().purge_expired()
+    except Exception as e:
+        logger.warning(f"Cache purge error: {e}")
+        return 0
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters per tier, plus memory tier usage."""
+    memory = {**_stats["memory"], **_memory.usage(),
+              "max_entries": _memory.max_entries, "max_bytes": _memory.max_bytes}
+    return {"memory": memory, "store": {**_stats["store"], "backend": get_backend().name}}
+
+
+def _metric_families() -> list:
+    """Tier counters and memory usage for /metrics (see utils/metrics)."""
+    usage = _memory.usage()
+    return [
+        Family("navisense_cache_requests_total", "counter", "Cache lookups per tier by result.", [
+            ({"tier": "memory", "result": "hit"},       _stats["memory"]["hits"]),
+            ({"tier": "memory", "result": "stale_hit"}, _stats["memory"]["stale_hits"]),
+            ({"tier": "memory", "result": "miss"},      _stats["memory"]["misses"]),
+            ({"tier": "store",  "result": "hit"},       _stats["store"]["hits"]),
+            ({"tier": "store",  "result": "miss"},      _stats["store"]["misses"]),
+        ]),
+        Family("navisense_cache_store_writes_total", "counter", "Writes to the persistent cache store.",
+               [({}, _stats["store"]["writes"])]),
+        Family("navisense_cache_store_errors_total", "counter", "Failed persistent cache store reads and writes.",
+               [({}, _stats["store"]["errors"])]),
+        Family("navisense_cache_memory_evictions_total", "counter", "Entries evicted from the memory tier.",
+               [({}, _stats["memory"]["evictions"])]),
+        Family("navisense_cache_memory_entries", "gauge", "Entries held in the memory tier.",
+               [({}, usage["entries"])]),
+        Family("navisense_cache_memory_bytes", "gauge", "Approximate serialized bytes held in the memory tier.",
+               [({}, usage["bytes"])]),
+    ]
+
+
+REGISTRY.add_collector(_metric_families)
+
+
+# ──────────────────────────────────────────────
+# Store tier
+# ──────────────────────────────────────────────
+
+def _read_store(key: str) -> Optional[tuple]:
+    """
+    Read a key from the persistent store.
+
+    Returns (data, size_in_bytes, expires_at), or None if missing/expired.
+    """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            entry = json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
+        loaded = get_backend().get(key)
+    except Exception as e:
+        _stats["store"]["errors"] += 1
         logger.warning(f"Cache read error ({key}): {e}")
         return None
 
-    if time.time() - entry.get("saved_at", 0) > TTL:
-        os.remove(path)
-        return None
+    _stats["store"]["hits" if loaded is not None else "misses"] += 1
+    return loaded
 
-    return entry.get("data")
 
+def _schedule_refresh(key: str) -> None:
+    """Re-read a stale memory entry from the store in the background."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    _refresher.submit(_refresh, key)
 
-def set_cached(key: str, data: dict) -> None:
-    """Save data to cache under the given key."""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    entry = {"saved_at": time.time(), "data": data}
 
+def _refresh(key: str) -> None:
     try:
-        with open(_path(key), "w", encoding="utf-8") as f:
-            json.dump(entry, f, indent=2, ensure_ascii=False)
-    except OSError as e:
-        logger.warning(f"Cache write error ({key}): {e}")
+        loaded = _read_store(key)
+        if loaded is None:
+            _memory.pop(key)
+        else:
+            data, size, expires_at = loaded
+            _memory.put(key, _MemoryEntry(data, size, expires_at))
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
@@ -0,0 +1,281 @@
+"""
+cache_backends.py — Persistent stores behind the cache's memory tier.
+
+Every backend implements the CacheBackend interface; utils/cache.py picks one
+from CACHE_BACKEND and never touches storage directly.
+
+  - SQLiteBackend (default): one WAL-mode database file shared safely by all
+    uvicorn worker processes, atomic upserts, indexed expiry with batch purge
+    and a max-size eviction policy.
+  - FileBackend: the original one-JSON-file-per-key layout, now with atomic
+    writes (temp file + rename).
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Interface for a persistent key → JSON-serializable dict store."""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[tuple]:
+        """Return (data, size_in_bytes, expires_at) or None if missing/expired."""
+
+    @abstractmethod
+    def set(self, key: str, data: dict, expires_at: float) -> int:
+        """Upsert a key atomically. Returns the serialized size in bytes."""
+
+    @abstractmethod
+    def compare_and_set(self, key: str, data: dict, expires_at: float, field: str, expected) -> bool:
+        """
+        Write data only if the stored value's field still equals expected
+        (None: the key is missing or has no such field). Returns whether it wrote.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a key; missing keys are ignored."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Drop every expired entry. Returns how many were removed."""
+
+    def close(self) -> None:
+        pass
+
+
+def _encode(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+# ──────────────────────────────────────────────
+# SQLite (WAL) — single-file store
+# ──────────────────────────────────────────────
+
+class SQLiteBackend(CacheBackend):
+    """
+    Single-file store. Values are compact JSON, zlib-compressed.
+
+    Each thread gets its own connection; WAL mode lets readers in every
+    worker process proceed while one writer commits. Expired rows are
+    purged in batches every PURGE_EVERY writes, and when the table grows
+    past max_bytes the entries closest to expiry are evicted first (never,
+    if max_bytes is None). Several stores can share one file, each in its
+    own table.
+    """
+
+    name        = "sqlite"
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str, max_bytes: Optional[int], table: str = "cache"):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self.table     = table
+        self._local    = threading.local()
+        self._writes   = 0
+        self._lock     = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key        TEXT PRIMARY KEY,
+                value      BLOB NOT NULL,
+                size       INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires_at ON {self.table}(expires_at)")
+
+    def get(self, key: str) -> Optional[tuple]:
+        row = self._conn().execute(
+            f"SELECT value, size, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        value, size, expires_at = row
+        return json.loads(zlib.decompress(value)), size, expires_at
+
+    def set(self, key: str, data: dict, expires_at: float) -> int:
+        text = _encode(data).encode("utf-8")
+        self._conn().execute(
+            f"""
+            INSERT INTO {self.table} (key, value, size, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value, size = excluded.size, expires_at = excluded.expires_at
+            """,
+            (key, zlib.compress(text, 3), len(text), expires_at),
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.PURGE_EVERY == 0
+        if due:
+            self.purge_expired()
+            self._enforce_max_size()
+        return len(text)
+
+    def compare_and_set(self, key: str, data: dict, expires_at: float, field: str, expected) -> bool:
+        text = _encode(data).encode("utf-8")
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")          # holds the write lock across every worker
+        try:
+            row = conn.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?", (key, time.time()),
+            ).fetchone()
+            current = json.loads(zlib.decompress(row[0])).get(field) if row else None
+            if current != expected:
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                f"""
+                INSERT INTO {self.table} (key, value, size, expires_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value, size = excluded.size, expires_at = excluded.expires_at
+                """,
+                (key, zlib.compress(text, 3), len(text), expires_at),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def delete(self, key: str) -> None:
+        self._conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        if cur.rowcount:
+            logger.info(f"Store purge ({self.table}): removed {cur.rowcount} expired entries")
+        return cur.rowcount
+
+    def _enforce_max_size(self) -> None:
+        """Evict soonest-to-expire entries until stored bytes are under 90% of max."""
+        if self.max_bytes is None:
+            return
+        conn  = self._conn()
+        total = conn.execute(f"SELECT COALESCE(SUM(LENGTH(value)), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target  = int(self.max_bytes * 0.9)
+        removed = 0
+        for key, stored in conn.execute(
+            f"SELECT key, LENGTH(value) FROM {self.table} ORDER BY expires_at"
+        ).fetchall():
+            if total <= target:
+                break
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            total   -= stored
+            removed += 1
+        logger.info(f"Cache over {self.max_bytes} bytes: evicted {removed} entries")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ──────────────────────────────────────────────
+# JSON files — one file per key
+# ──────────────────────────────────────────────
+
+class FileBackend(CacheBackend):
+    """One JSON file per key, written atomically via temp file + rename."""
+
+    name = "file"
+
+    def __init__(self, directory: str, ttl: int):
+        self.directory = directory
+        self.ttl       = ttl            # for files written before expires_at was stored
+        self._lock     = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "_-" else "_" for c in key)
+        return os.path.join(self.directory, f"{safe}.json")
+
+    def get(self, key: str) -> Optional[tuple]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        entry      = json.loads(raw)
+        expires_at = entry.get("expires_at") or entry.get("saved_at", 0) + self.ttl
+        if time.time() > expires_at:
+            self.delete(key)
+            return None
+        return entry.get("data"), len(raw), expires_at
+
+    def set(self, key: str, data: dict, expires_at: float) -> int:
+        raw = _encode({"saved_at": time.time(), "expires_at": expires_at, "data": data})
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(raw)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return len(raw)
+
+    def compare_and_set(self, key: str, data: dict, expires_at: float, field: str, expected) -> bool:
+        """Atomic within one process only — run a single worker with the file backend."""
+        with self._lock:
+            current = self.get(key)
+            if (current[0].get(field) if current else None) != expected:
+                return False
+            self.set(key, data, expires_at)
+            return True
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def purge_expired(self) -> int:
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if time.time() > (entry.get("expires_at") or entry.get("saved_at", 0) + self.ttl):
+                    os.remove(os.path.join(self.directory, name))
+                    removed += 1
+            except (json.JSONDecodeError, OSError):
+                continue
+        return removed
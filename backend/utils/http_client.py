@@ -0,0 +1,175 @@
+"""
+http_client.py — One pooled HTTP client shared by every outbound call.
+
+Scrapers and the weather service call get() instead of requests.get(), so
+connections to each upstream host are kept alive and reused across requests
+instead of paying a fresh TCP+TLS handshake every time.
+
+Backends:
+  - requests.Session with a per-host urllib3 pool (default)
+  - httpx.Client with HTTP/2 (HTTP_HTTP2=true, needs `pip install httpx[http2]`)
+
+main.py opens the client on startup and closes it on shutdown; get() also
+opens it lazily so scripts can use the services without the app.
+"""
+
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import HTTP_POOL_HOSTS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK, HTTP_HTTP2
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+_client  = None
+_backend = None                     # "requests" | "httpx"
+_lock    = threading.Lock()
+_stats   = {}                       # host → counters, see _host_stats()
+
+
+def startup() -> None:
+    """Create the shared client. Safe to call more than once."""
+    global _client, _backend
+    with _lock:
+        if _client is not None:
+            return
+        if HTTP_HTTP2 and _http2_available():
+            _client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=HTTP_POOL_HOSTS * HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=HTTP_POOL_HOSTS * HTTP_POOL_MAXSIZE,
+                ),
+                follow_redirects=True,
+            )
+            _backend = "httpx"
+        else:
+            if HTTP_HTTP2:
+                logger.warning("HTTP_HTTP2 is set but httpx[http2] is not installed — using HTTP/1.1 pools")
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_HOSTS,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+                pool_block=HTTP_POOL_BLOCK,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _client  = session
+            _backend = "requests"
+        logger.info(f"HTTP client ready ({_backend}, {HTTP_POOL_MAXSIZE} connections/host)")
+
+
+def shutdown() -> None:
+    """Close the shared client and drop every pooled connection."""
+    global _client, _backend
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client  = None
+        _backend = None
+
+
+def get(url: str, *, params: dict = None, headers: dict = None, timeout: float = None):
+    """
+    GET a URL through the shared pool.
+
+    Returns a response object with the requests-style interface used by the
+    services: status_code, headers, text, content, json(), raise_for_status().
+    """
+    if _client is None:
+        startup()
+
+    host  = urlsplit(url).netloc
+    stats = _host_stats(host)
+    with _lock:
+        stats["requests"] += 1
+        if stats["in_flight"] >= HTTP_POOL_MAXSIZE:
+            stats["waits"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+
+    try:
+        if _backend == "httpx":
+            return _client.get(
+                url, params=params, headers=headers, timeout=timeout,
+                extensions={"trace": lambda event, info: _on_trace(stats, event)},
+            )
+        return _client.get(url, params=params, headers=headers, timeout=timeout)
+    finally:
+        with _lock:
+            stats["in_flight"] -= 1
+
+
+def pool_stats() -> dict:
+    """
+    Per-host pool counters for sizing the client under load.
+
+    reuse_rate is the share of requests served on an already-open connection;
+    waits counts requests that arrived while the host's pool was exhausted.
+    """
+    hosts = {}
+    with _lock:
+        snapshot = {host: dict(s) for host, s in _stats.items()}
+
+    for host, s in snapshot.items():
+        if _backend == "requests":
+            s["connections_opened"] = _urllib3_connections(host)
+        opened = s["connections_opened"]
+        s["reuse_rate"] = round(1 - opened / s["requests"], 3) if s["requests"] else 0.0
+        hosts[host] = s
+
+    return {
+        "backend":      _backend,
+        "pool_maxsize": HTTP_POOL_MAXSIZE,
+        "pool_block":   HTTP_POOL_BLOCK,
+        "hosts":        hosts,
+    }
+
+
+def _host_stats(host: str) -> dict:
+    with _lock:
+        return _stats.setdefault(host, {
+            "requests":           0,
+            "connections_opened": 0,
+            "in_flight":          0,
+            "peak_in_flight":     0,
+            "waits":              0,
+        })
+
+
+def _on_trace(stats: dict, event: str) -> None:
+    """httpcore trace hook — counts new connections on the httpx backend."""
+    if event == "connection.connect_tcp.complete":
+        with _lock:
+            stats["connections_opened"] += 1
+
+
+def _urllib3_connections(host: str) -> int:
+    """Connections opened so far by the urllib3 pools for a host (any scheme)."""
+    if _client is None:
+        return 0
+    hostname, _, port = host.partition(":")
+    pools  = _client.get_adapter("https://").poolmanager.pools
+    opened = 0
+    for key in pools.keys():
+        if key.key_host == hostname and (not port or key.key_port == int(port)):
+            opened += pools[key].num_connections
+    return opened
+
+
+def _http2_available() -> bool:
+    if httpx is None:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
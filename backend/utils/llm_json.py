@@ -0,0 +1,232 @@
+"""
+llm_json.py — Incremental, fault-tolerant JSON parsing for LLM output.
+
+LLM responses are "almost JSON": wrapped in code fences or prose, followed by
+commentary, sprinkled with trailing commas, or cut off mid-object when the
+output limit is hit. IncrementalJSONParser consumes the text in chunks as it
+streams in and, in a single pass:
+
+  - skips anything before the first "{" and ignores anything after the
+    matching "}" (fences, preambles, trailing commentary)
+  - emits each complete element of one top-level array (e.g. "days") the
+    moment its closing bracket arrives
+  - remembers the last point where the document could be cleanly cut, so a
+    truncated response can be closed off and still parsed
+  - tolerates trailing commas
+
+parse_llm_json() handles a response that has already arrived in full. Most
+of those are well-formed, so it tries a plain json.loads on the outermost
+braces first and only walks the text character by character when that fails.
+
+Example:
+    parser = IncrementalJSONParser("days")
+    for chunk in stream:
+        for day in parser.feed(chunk):
+            ...
+    itinerary = parser.close()
+"""
+
+import json
+import re
+from typing import Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+class IncrementalJSONParser:
+    """Single-pass, chunk-fed parser for one outermost JSON object."""
+
+    def __init__(self, collect: str = "days"):
+        self.collect    = collect       # top-level key whose array elements are emitted
+        self.items      = []            # every element emitted so far
+        self.truncated  = False         # set by close() if the root never closed
+        self.repaired   = False         # set by close() if the text needed fixing
+
+        self._buf        = ""
+        self._pos        = 0
+        self._root_start = None
+        self._root_end   = None
+        self._stack      = []
+        self._in_string  = False
+        self._escape     = False
+        self._str_start  = 0
+        self._last_str   = None         # last complete string directly inside the root
+        self._collecting = False
+        self._item_start = None
+        self._clean_at   = None         # (index, stack snapshot) of the last clean cut
+        self._item_clean = None         # same, just after the last complete element
+        self._result     = None         # whole object, when load() parsed it in one go
+
+    # ── Streaming ─────────────────────────────────
+
+    def feed(self, text: str) -> list:
+        """Consume a chunk. Returns the collected-array elements it completed."""
+        self._buf += text
+        if self._root_end is not None:
+            return []
+
+        buf, stack = self._buf, self._stack
+        done = []
+        i = self._pos
+        n = len(buf)
+
+        if self._root_start is None:
+            i = buf.find("{", i)
+            if i < 0:
+                self._pos = n
+                return []
+            self._root_start = i
+
+        while i < n:
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(stack) == 1:
+                        self._last_str = buf[self._str_start + 1:i]
+            elif ch == '"':
+                self._in_string = True
+                self._str_start = i
+            elif ch in "{[":
+                if (ch == "[" and len(stack) == 1 and self._last_str == self.collect):
+                    self._collecting = True
+                elif self._collecting and len(stack) == 2 and ch == "{":
+                    self._item_start = i
+                stack.append(ch)
+                self._clean_at = (i + 1, list(stack))
+            elif ch in "}]":
+                if not stack:
+                    i += 1
+                    continue
+                stack.pop()
+                if self._collecting and len(stack) == 2 and self._item_start is not None:
+                    item = _loads_lenient(buf[self._item_start:i + 1])
+                    if item is not None:
+                        self.items.append(item)
+                        done.append(item)
+                        self._item_clean = (i + 1, list(stack))
+                    self._item_start = None
+                elif self._collecting and len(stack) == 1:
+                    self._collecting = False
+                if not stack:
+                    self._root_end = i + 1
+                    i += 1
+                    break
+                self._clean_at = (i + 1, list(stack))
+            elif ch == ",":
+                self._clean_at = (i, list(stack))
+            i += 1
+
+        self._pos = i
+        return done
+
+    def load(self, text: str) -> bool:
+        """
+        Parse a complete response with a single json.loads, skipping the
+        character loop. Returns False, leaving the parser untouched, unless
+        the text between the first "{" and the last "}" is valid JSON.
+        """
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end < start:
+            return False
+        try:
+            result = json.loads(text[start:end + 1])
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(result, dict):
+            return False
+
+        items = result.get(self.collect)
+        self.items       = [i for i in items if isinstance(i, dict)] if isinstance(items, list) else []
+        self._buf        = text
+        self._root_start = start
+        self._root_end   = end + 1
+        self._result     = result
+        return True
+
+    # ── Finishing ─────────────────────────────────
+
+    def close(self) -> Optional[dict]:
+        """
+        Finish parsing and return the outermost object, repaired if needed.
+
+        Falls back to {collect: [complete elements]} when the object itself
+        cannot be recovered, and returns None when nothing was salvageable.
+        """
+        if self._result is not None:
+            return self._result
+        if self._root_start is None:
+            return None
+
+        if self._root_end is not None:
+            text = self._buf[self._root_start:self._root_end]
+        elif self._clean_at is not None:
+            self.truncated = True
+            # Cut off inside the collected array: keep only whole elements
+            if self._collecting and self._item_clean is not None:
+                cut, stack = self._item_clean
+            else:
+                cut, stack = self._clean_at
+            text = self._buf[self._root_start:cut] + "".join(_CLOSERS[c] for c in reversed(stack))
+        else:
+            text = None
+
+        if text is not None:
+            try:
+                result = json.loads(text)
+                self.repaired = self.truncated
+                return result if isinstance(result, dict) else None
+            except json.JSONDecodeError:
+                result = _loads_lenient(text)
+                if isinstance(result, dict):
+                    self.repaired = True
+                    return result
+
+        if self.items:
+            self.truncated = self.repaired = True
+            return {self.collect: list(self.items)}
+        return None
+
+
+def parse_llm_json(raw: str, collect: str = "days") -> tuple:
+    """
+    Parse a complete LLM response in one call.
+
+    Well-formed responses go through json.loads directly; the incremental
+    parser only runs when that fails, to repair or salvage the text.
+
+    Returns:
+        (result dict or None, parser) — the parser exposes truncated/repaired.
+    """
+    parser = IncrementalJSONParser(collect)
+    if not parser.load(raw):
+        parser.feed(raw)
+    return parser.close(), parser
+
+
+def _loads_lenient(text: str):
+    """json.loads, retrying once with trailing commas removed."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_strip_trailing_commas(text))
+    except json.JSONDecodeError:
+        return None
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before } or ], leaving string contents alone."""
+    out, last = [], 0
+    for match in re.finditer(r'"(?:[^"\\]|\\.)*"', text):
+        out.append(_TRAILING_COMMA.sub(r"\1", text[last:match.start()]))
+        out.append(match.group(0))
+        last = match.end()
+    out.append(_TRAILING_COMMA.sub(r"\1", text[last:]))
+    return "".join(out)
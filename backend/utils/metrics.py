@@ -0,0 +1,315 @@
+"""
+metrics.py — In-process metrics rendered in the Prometheus text format.
+
+A small registry of labelled counters, gauges and histograms (no client
+library needed), served by GET /metrics. Values owned elsewhere — the cache
+tier counters, the LLM call limiter — are read at scrape time by collector
+callbacks instead of being counted twice.
+
+Metrics are per process: with several uvicorn workers, each scrape sees
+whichever worker answered, so run one worker per scrape target or
+aggregate in Prometheus.
+
+Example:
+    with STAGE_SECONDS.time(stage="prompt_build"):
+        prompt = build(...)
+    SOURCE_FAILURES.inc(source="wikipedia", reason="error")
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Upstream calls span milliseconds (cache, parsing) to tens of
+# seconds (Gemini), so the default buckets cover both ends.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+FAST_BUCKETS    = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple = (), registry: "Registry" = None):
+        self.name       = name
+        self.help       = help
+        self.labelnames = tuple(labels)
+        self._values    = {}
+        self._lock      = threading.Lock()
+        if not self.labelnames and self.kind != "histogram":
+            self._values[()] = 0
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list:
+        """[(suffix, label pairs, value)] for rendering."""
+        with self._lock:
+            return [("", tuple(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. requests in flight)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS,
+                 registry: "Registry" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        self._observe(self._state(self._key(labels)), value)
+
+    def labels(self, **labels) -> "_BoundHistogram":
+        """Pre-resolved label set, for hot paths that observe millions of times."""
+        return _BoundHistogram(self, self._state(self._key(labels)))
+
+    def _state(self, key: tuple) -> list:
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            return state
+
+    def _observe(self, state: list, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the block's wall-clock duration in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> list:
+        out = []
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        for key, counts, total, count in items:
+            pairs = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                out.append(("_bucket", pairs + (("le", _format_value(bound)),), cumulative))
+            out.append(("_sum", pairs, total))
+            out.append(("_count", pairs, count))
+        return out
+
+
+class _BoundHistogram:
+    __slots__ = ("_parent", "_state")
+
+    def __init__(self, parent: Histogram, state: list):
+        self._parent = parent
+        self._state  = state
+
+    def observe(self, value: float) -> None:
+        self._parent._observe(self._state, value)
+
+
+class Family:
+    """A metric snapshot produced by a collector at scrape time."""
+
+    def __init__(self, name: str, kind: str, help: str, values: list):
+        self.name   = name
+        self.kind   = kind
+        self.help   = help
+        self._items = values        # [(labels dict, value)]
+
+    def samples(self) -> list:
+        return [("", tuple(labels.items()), value) for labels, value in self._items]
+
+
+class Registry:
+    """Holds every metric and collector; render() produces the /metrics body."""
+
+    def __init__(self):
+        self._metrics    = {}
+        self._collectors = []
+        self._lock       = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def add_collector(self, func) -> None:
+        """func() returns a list of Family snapshots, called on every render."""
+        with self._lock:
+            self._collectors.append(func)
+
+    def render(self) -> str:
+        with self._lock:
+            families   = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for func in collectors:
+            families.extend(func())
+
+        lines = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, pairs, value in family.samples():
+                labels = ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs)
+                lines.append(f"{family.name}{suffix}{{{labels}}} {_format_value(value)}" if labels
+                             else f"{family.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(text: str) -> str:
+    return str(text).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY = Registry()
+
+
+# ──────────────────────────────────────────────
+# Application metrics
+# ──────────────────────────────────────────────
+
+HTTP_IN_FLIGHT = Gauge(
+    "navisense_http_requests_in_flight", "HTTP requests currently being served (streams until their last event).",
+)
+HTTP_SECONDS = Histogram(
+    "navisense_http_request_duration_seconds", "HTTP request duration, including the whole body of streamed responses.",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = Histogram(
+    "navisense_stage_duration_seconds",
+    "Pipeline stage duration: scrape, weather, gemini, gemini_slot as run under the plan deadline, "
+    "and geocode, forecast, prompt_build, llm_call, parse within them.",
+    ("stage",),
+)
+CACHE_SECONDS = Histogram(
+    "navisense_cache_operation_seconds", "get_cached / set_cached duration across both cache tiers.",
+    ("op",), buckets=FAST_BUCKETS,
+)
+SCRAPE_SECONDS = Histogram(
+    "navisense_scrape_duration_seconds", "Fetch-and-parse time per scrape source (page cache hits included).",
+    ("source", "outcome"),
+)
+SOURCE_FAILURES = Counter(
+    "navisense_source_failures_total",
+    "Upstream data sources that failed or missed their deadline (scrapers, geocoding, forecast).",
+    ("source", "reason"),
+)
+PLAN_CACHE = Counter(
+    "navisense_plan_cache_total", "Plan cache lookups by outcome: hit, near_hit or miss.",
+    ("result",),
+)
+LLM_CALLS = Counter(
+    "navisense_llm_calls_total", "LLM calls per model by outcome: ok, error, timeout or rate_limited.",
+    ("model", "outcome"),
+)
+LLM_PARSES = Counter(
+    "navisense_llm_parse_total", "Parsed LLM itineraries by outcome: ok, repaired, truncated or invalid.",
+    ("outcome",),
+)
+FALLBACK_ITINERARIES = Counter(
+    "navisense_fallback_itineraries_total", "Placeholder itineraries served because generation failed.",
+    ("reason",),
+)
+
+
+# ──────────────────────────────────────────────
+# ASGI middleware
+# ──────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """
+    Track in-flight HTTP requests and their duration per route.
+
+    Pure ASGI rather than @app.middleware("http") so a streamed response is
+    counted until its last body chunk, not just until its headers go out.
+    Routes are labelled by their path template ("/plans/{plan_id}"), never
+    the raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status  = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_SECONDS.observe(time.perf_counter() - started,
+                                 method=scope["method"], route=route, status=status["code"])
@@ -0,0 +1,198 @@
+"""
+mw_sections.py — Single-pass section extractor for MediaWiki article HTML.
+
+Wikipedia and Wikivoyage pages are read the same way: only the article body
+(#mw-content-text) is parsed, with lxml, and its top-level blocks are walked
+once, in document order. Each h2/h3 heading opens a new section; every
+paragraph, list item and listing name (a dt, or the name of a Wikivoyage
+listing template) that follows lands in that section until the next h2/h3;
+an h3 section also remembers the h2 it sits under. The scraper then picks
+its categories from the result instead of re-scanning the page once per
+category.
+
+Handles both heading layouts MediaWiki serves:
+  - legacy:  <h2><span class="mw-headline">See</span>EDIT</h2>
+  - current: <div class="mw-heading mw-heading2"><h2>See</h2>EDIT</div>
+with EDIT = <span class="mw-editsection">…</span>, and Parsoid's <section>
+wrappers. Edit-section links are never part of a title.
+
+Example:
+    page = extract_sections(html)
+    page.lead                         # paragraphs before the first heading
+    for section in page.sections:
+        section.title, section.items, section.names
+"""
+
+import re
+from typing import Optional
+
+from lxml import etree
+
+HEADING_TAGS = {"h2", "h3"}                 # section boundaries; h4 and below stay inside
+LIST_TAGS    = {"ul", "ol"}
+
+_CONTENT_ID  = re.compile(r"""id\s*=\s*["']mw-content-text["']""")
+# Markers of the page chrome after the article body — nothing past them is parsed
+_CONTENT_END = ('<div class="printfooter"', 'id="catlinks"', "<footer")
+_PARSER      = etree.HTMLParser(remove_comments=True, remove_pis=True)
+# Where the article starts, best first: parser output, content div, whole body
+_ROOTS       = (
+    etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' mw-parser-output ')]"),
+    etree.XPath("//*[@id='mw-content-text']"),
+    etree.XPath("//body"),
+)
+
+
+class Section:
+    """One h2/h3 section: its paragraphs, list items and listing names."""
+
+    __slots__ = ("title", "level", "parent", "paragraphs", "items", "list_items", "names")
+
+    def __init__(self, title: str, level: int, parent: Optional[str] = None):
+        self.title      = title             # lower-cased heading text
+        self.level      = level
+        self.parent     = parent            # title of the enclosing h2, for h3 sections
+        self.paragraphs = []
+        self.items      = []                # every <li> in the section
+        self.list_items = []                # only <li> of top-level <ul>/<ol> blocks
+        self.names      = []                # <dt> and listing-template names
+
+
+class Page:
+    """Result of extract_sections(): the lead paragraphs and every section."""
+
+    __slots__ = ("lead", "sections")
+
+    def __init__(self):
+        self.lead     = []
+        self.sections = []
+
+    def extend(self, other: "Page") -> None:
+        """Append another fragment of the same article (e.g. one parse API section)."""
+        self.lead.extend(other.lead)
+        self.sections.extend(other.sections)
+
+    def first_paragraph(self, min_length: int) -> str:
+        """First paragraph anywhere in the article at least min_length long."""
+        for text in self.lead:
+            if len(text) > min_length:
+                return text
+        for section in self.sections:
+            for text in section.paragraphs:
+                if len(text) > min_length:
+                    return text
+        return ""
+
+
+def extract_sections(html: str) -> Page:
+    """Parse a MediaWiki page (or a bare parser-output fragment) into sections."""
+    page = Page()
+    root = _content_root(html)
+    if root is not None:
+        _walk(root, page, None)
+    return page
+
+
+def text_of(el) -> str:
+    """Element text with whitespace-separated, stripped text nodes (bs4 get_text(" ", strip=True))."""
+    return " ".join(t for t in (s.strip() for s in el.itertext()) if t)
+
+
+def _content_root(html: str):
+    """The mw-parser-output element, parsing nothing outside #mw-content-text."""
+    match = _CONTENT_ID.search(html)
+    if match:
+        start = html.rfind("<", 0, match.start())
+        end   = min((i for i in (html.find(m, match.end()) for m in _CONTENT_END) if i != -1),
+                    default=len(html))
+        html  = html[start:end]
+    if not html.strip():
+        return None
+    try:
+        doc = etree.fromstring(html, _PARSER)
+    except etree.LxmlError:
+        return None
+    if doc is None:
+        return None
+    for find in _ROOTS:
+        found = find(doc)
+        if found:
+            return found[0]
+    return None
+
+
+def _walk(parent, page: Page, section: Optional[Section]) -> Optional[Section]:
+    """Visit parent's children once, appending to page; returns the open section."""
+    for el in parent:
+        tag = el.tag
+        if not isinstance(tag, str):                # comments, processing instructions
+            continue
+        if tag == "section":                        # Parsoid wraps each section
+            section = _walk(el, page, section)
+            continue
+
+        heading = _heading(el)
+        if heading is not None:
+            level   = int(heading.tag[1])
+            parent  = None
+            if level > 2 and section is not None:
+                parent = section.title if section.level == 2 else section.parent
+            section = Section(_heading_title(heading), level, parent)
+            page.sections.append(section)
+            continue
+
+        if tag == "p":
+            text = text_of(el)
+            if text:
+                (section.paragraphs if section else page.lead).append(text)
+            continue
+        if section is None or tag in ("style", "script", "link", "meta"):
+            continue
+
+        top_level_list = tag in LIST_TAGS
+        for child in el.iter("li", "dt"):
+            text = text_of(child)
+            if child.tag == "dt":
+                section.names.append(text)
+            else:
+                section.items.append(text)
+                if top_level_list:
+                    section.list_items.append(text)
+                name = _listing_name(child)
+                if name:
+                    section.names.append(name)
+    return section
+
+
+def _listing_name(li) -> str:
+    """Name of a Wikivoyage listing template (<li><span class="vcard">…), else ""."""
+    if not len(li) or "vcard" not in (li[0].get("class") or ""):
+        return ""
+    for el in li[0].iter("span", "bdi"):
+        if "listing-name" in (el.get("class") or ""):
+            return text_of(el)
+    return ""
+
+
+def _heading(el):
+    """The h2/h3 element el is or wraps (div.mw-heading), else None."""
+    if el.tag in HEADING_TAGS:
+        return el
+    if el.tag == "div" and "mw-heading" in (el.get("class") or ""):
+        for child in el:
+            if child.tag in HEADING_TAGS:
+                return child
+    return None
+
+
+def _heading_title(heading) -> str:
+    """Lower-cased heading text without the [edit] link."""
+    for child in heading:
+        if child.tag == "span" and "mw-headline" in (child.get("class") or ""):
+            return text_of(child).lower()
+    parts = [heading.text or ""]
+    for child in heading:
+        if isinstance(child.tag, str) and "mw-editsection" not in (child.get("class") or ""):
+            parts.append(text_of(child))
+        parts.append(child.tail or "")
+    return " ".join(" ".join(parts).split()).lower()
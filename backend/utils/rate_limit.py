@@ -0,0 +1,109 @@
+"""
+rate_limit.py — Concurrency and request-rate limits for quota-bound upstreams.
+
+CallLimiter combines a semaphore (at most N calls in flight) with a token
+bucket (at most R calls per minute, with bursts up to the bucket size), so a
+traffic spike queues briefly instead of tripping the provider's quota and
+turning into a wave of 429s. A caller that cannot get a slot within its
+timeout gets RateLimited instead of waiting forever.
+
+Example:
+    limiter = CallLimiter("gemini", max_concurrent=8, per_minute=60)
+    with limiter.slot(timeout=5):
+        call_the_api()
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """No call slot became available within the caller's timeout."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate     = rate
+        self.capacity = capacity
+        self._tokens  = capacity
+        self._updated = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, waiting up to `timeout` seconds. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens  = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+
+class CallLimiter:
+    """Semaphore + token bucket guarding one upstream."""
+
+    def __init__(self, name: str, max_concurrent: int, per_minute: float, burst: float = None):
+        self.name    = name
+        self._sem    = threading.BoundedSemaphore(max_concurrent)
+        self._bucket = TokenBucket(per_minute / 60.0, burst or max(1.0, min(max_concurrent, per_minute)))
+        self._lock   = threading.Lock()
+        self.max_concurrent = max_concurrent
+        self.per_minute     = per_minute
+        self._stats  = {"calls": 0, "in_flight": 0, "queued_ms": 0.0, "rejected": 0}
+
+    @contextmanager
+    def slot(self, timeout: float):
+        """
+        Hold one call slot for the duration of the block.
+
+        Raises:
+            RateLimited: if no slot (concurrency or rate) frees up within timeout.
+        """
+        started = time.monotonic()
+        if not self._sem.acquire(timeout=timeout):
+            self._reject("concurrency")
+        try:
+            if not self._bucket.acquire(max(0.0, timeout - (time.monotonic() - started))):
+                self._reject("rate")
+        except RateLimited:
+            self._sem.release()
+            raise
+
+        with self._lock:
+            self._stats["calls"]     += 1
+            self._stats["in_flight"] += 1
+            self._stats["queued_ms"] += (time.monotonic() - started) * 1000
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stats["in_flight"] -= 1
+            self._sem.release()
+
+    def _reject(self, reason: str):
+        with self._lock:
+            self._stats["rejected"] += 1
+        logger.warning(f"{self.name}: no call slot available ({reason} limit)")
+        raise RateLimited(f"{self.name}: {reason} limit reached")
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        s["avg_queued_ms"]  = round(s.pop("queued_ms") / s["calls"], 1) if s["calls"] else 0.0
+        s["max_concurrent"] = self.max_concurrent
+        s["per_minute"]     = self.per_minute
+        return s
@@ -0,0 +1,92 @@
+"""
+singleflight.py — Coalesce concurrent identical calls into one.
+
+While a call for a key is in progress, further calls with the same key wait
+for it and receive the same result (or exception) instead of repeating the
+work. Nothing is remembered once the call finishes — caching is the cache
+layer's job; this only covers the window before set_cached() has run.
+
+Callers share one result object, so they must treat it as read-only.
+"""
+
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done    = threading.Event()
+        self.result  = None
+        self.error   = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Single-flight group for blocking functions called from worker threads."""
+
+    def __init__(self, name: str):
+        self.name   = name
+        self._calls = {}
+        self._lock  = threading.Lock()
+
+    def do(self, key: str, func, *args, **kwargs):
+        """Run func(*args, **kwargs) once per key across concurrent callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call   = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            logger.info(f"{self.name}: joined in-flight call for {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Single-flight group for coroutines on one event loop."""
+
+    def __init__(self, name: str):
+        self.name   = name
+        self._tasks = {}
+
+    async def do(self, key: str, coro_func, *args, **kwargs):
+        """
+        Await coro_func(*args, **kwargs) once per key across concurrent callers.
+
+        The work runs as its own task, so a caller that disconnects does not
+        cancel it for the others still waiting.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_func(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            logger.info(f"{self.name}: joined in-flight call for {key}")
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being worked on."""
+        return len(self._tasks)
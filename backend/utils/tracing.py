@@ -0,0 +1,149 @@
+"""
+tracing.py — Per-request timing trace: Server-Timing, debug payload, JSON log.
+
+A Trace is started by the endpoint and held in a context variable, so every
+stage that runs for the request — on the event loop, on the pipeline pool
+(run_in_worker copies the context) or on the scraper pool — can add to it
+without it being passed around. Stages of the same name are summed.
+
+When the request ends the trace becomes:
+  - a Server-Timing header ("scrape;dur=812.4, gemini;dur=5120.0, …")
+  - the "timing" field of the response, with ?debug=timing
+  - one JSON log line on the "navisense.trace" logger, for a TRACE_SAMPLE_RATE
+    share of requests plus every request slower than TRACE_SLOW_SECONDS or
+    failing with a 5xx
+
+A request that raises is finished by the app's error handler, so its trace
+is logged (and its Server-Timing sent) like any other.
+
+Work shared through single-flight is traced only on the request that
+started it; a request that joined it records no stages of its own.
+"""
+
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+from config import TRACE_SAMPLE_RATE, TRACE_SLOW_SECONDS
+from utils.metrics import STAGE_SECONDS
+
+logger   = logging.getLogger("navisense.trace")
+_current = contextvars.ContextVar("navisense_trace", default=None)
+
+
+class Trace:
+    """Stage durations and attributes collected for one request."""
+
+    def __init__(self, endpoint: str, request_id: str = None):
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.endpoint   = endpoint
+        self.started    = time.perf_counter()
+        self.stages     = {}            # name → [total seconds, count]
+        self.sources    = {}            # scrape source → {"status", "ms", "bytes", …}
+        self.attrs      = {}
+        self.finished   = False
+        self._lock      = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            total = self.stages.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def set(self, **attrs) -> None:
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def source(self, name: str, **fields) -> None:
+        with self._lock:
+            self.sources.setdefault(name, {}).update(fields)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, stage durations in milliseconds."""
+        with self._lock:
+            parts = [f"{name};dur={total * 1000:.1f}" for name, (total, _) in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> dict:
+        """The whole trace as a JSON-ready dict (the ?debug=timing payload)."""
+        with self._lock:
+            return {
+                "request_id": self.request_id,
+                "endpoint":   self.endpoint,
+                "total_ms":   round(self.elapsed() * 1000, 1),
+                "stages_ms":  {name: round(total * 1000, 1) for name, (total, _) in self.stages.items()},
+                "calls":      {name: count for name, (_, count) in self.stages.items() if count > 1},
+                "sources":    {name: dict(fields) for name, fields in self.sources.items()},
+                **self.attrs,
+            }
+
+
+def start(endpoint: str, request_id: str = None) -> Trace:
+    """Begin tracing the current request (an incoming X-Request-ID is kept)."""
+    trace = Trace(endpoint, request_id)
+    _current.set(trace)
+    return trace
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+def finish(trace: Trace, status: int = 200) -> None:
+    """Log the trace as one JSON line if it is sampled, slow or failed. Only the first call counts."""
+    with trace._lock:
+        if trace.finished:
+            return
+        trace.finished = True
+    elapsed = trace.elapsed()
+    slow    = TRACE_SLOW_SECONDS > 0 and elapsed >= TRACE_SLOW_SECONDS
+    if not slow and status < 500 and random.random() >= TRACE_SAMPLE_RATE:
+        return
+    logger.info(json.dumps({**trace.summary(), "status": status, "slow": slow},
+                           ensure_ascii=False, separators=(",", ":")))
+
+
+def add(stage: str, seconds: float) -> None:
+    """Add to a stage of the current request's trace, if there is one."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+def annotate(**attrs) -> None:
+    """Set attributes on the current request's trace, if there is one."""
+    trace = _current.get()
+    if trace is not None:
+        trace.set(**attrs)
+
+
+def annotate_source(name: str, **fields) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.source(name, **fields)
+
+
+def observe(stage_name: str, seconds: float) -> None:
+    """Record a stage duration in STAGE_SECONDS and the current trace."""
+    STAGE_SECONDS.observe(seconds, stage=stage_name)
+    add(stage_name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one stage (see observe)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
@@ -465,6 +465,12 @@ function renderTimeslotTags(tags) {
 /** Stored itinerary data (raw API days array) — used for modify flow. */
 let itineraryState = [];
 
+/** Server-side plan ID of the rendered itinerary (null if the backend didn't store it). */
+let currentPlanId = null;
+
+/** Stored version of that plan; edits are sent against it so concurrent changes get a 409. */
+let currentPlanVersion = null;
+
 function renderTimeline(days) {
   itineraryState = days;   // persist for modify flow
   const container = document.getElementById('timelineContent');
@@ -518,7 +524,7 @@ window.toggleDay = function (header) {
 };
 
 /* ─────────────────────────────────────────
-   MODIFY FLOW — swap activities locally
+   MODIFY FLOW — swap locally, persist to the stored plan
 ───────────────────────────────────────── */
 
 let _modifyCtx = null;  // { dayIdx, actIdx }
@@ -578,6 +584,7 @@ window.selectAlternative = function (altIdx) {
   };
 
   closeModifyModal();
+  persistPlanEdit([{ op: 'swap', day: dayIdx + 1, activity: actIdx, alternative: altIdx }]);
 
   // Re-render only the affected slot
   const slotEl = document.getElementById(`slot-${dayIdx}-${actIdx}`);
@@ -592,6 +599,33 @@ window.selectAlternative = function (altIdx) {
   }
 };
 
+/** Apply edit operations to the server-side copy of the plan (no AI call). */
+async function persistPlanEdit(operations) {
+  if (!currentPlanId) return;
+  try {
+    const res = await fetch(`${API_BASE}/plans/${currentPlanId}`, {
+      method: 'PATCH',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ operations, version: currentPlanVersion }),
+    });
+    if (res.status === 409) {
+      showToast('⚠️ This plan was changed elsewhere — reload to see the latest version.');
+      return;
+    }
+    if (!res.ok) throw new Error(`Server error: ${res.status}`);
+    const plan = await res.json();
+    // Editing a shared (cache-served) plan saves a copy under a new plan_id
+    currentPlanId = plan.plan_id || currentPlanId;
+    currentPlanVersion = plan.version || null;
+    if (plan.budget_summary && plan.budget_summary.total_inr) {
+      renderRealBudget(plan.budget_summary, plan.request);
+    }
+  } catch (err) {
+    showToast('⚠️ Change not saved — it will be lost on reload.');
+    console.error('[Navisense]', err);
+  }
+}
+
 /** Close the alternatives modal. */
 window.closeModifyModal = function () {
   document.getElementById('modifyModal').style.display = 'none';
@@ -846,15 +880,25 @@ function buildRequestBody() {
   };
 }
 
-/** Call the backend /generate-plan endpoint. Returns parsed JSON or null. */
+/**
+ * Call the backend /generate-plan endpoint. Returns parsed JSON or null.
+ * With localStorage 'navisense:debugTiming' set to '1', asks for the
+ * server-side stage timings and logs them as a table.
+ */
 async function fetchItinerary(body) {
-  const res = await fetch(`${API_BASE}/generate-plan`, {
+  const debugTiming = localStorage.getItem('navisense:debugTiming') === '1';
+  const res = await fetch(`${API_BASE}/generate-plan${debugTiming ? '?debug=timing' : ''}`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(body),
   });
   if (!res.ok) throw new Error(`Server error: ${res.status}`);
-  return res.json();
+  const data = await res.json();
+  if (debugTiming && data.timing) {
+    console.info('[Navisense] timing', data.timing.request_id, `${data.timing.total_ms} ms`);
+    console.table(data.timing.stages_ms);
+  }
+  return data;
 }
 
 /** Show an error toast and log to console. */
@@ -884,6 +928,8 @@ function sleep(ms) { return new Promise(res => setTimeout(res, ms)); }
 
 /* ── Render Result (real API response) ── */
 function renderResult(apiData, requestBody) {
+  currentPlanId = apiData.plan_id || null;
+  currentPlanVersion = apiData.version || null;
   const destination = apiData.destination || requestBody.to;
   const nights = requestBody.nights || state.nights || 5;
 
@@ -1100,15 +1146,32 @@ window.printItinerary = function () { window.print(); };
 window.shareItinerary = function () {
   const to = document.getElementById('toCity').value || 'your destination';
   const msg = `🌍 Check out my AI-crafted ${to} itinerary on Navisense!`;
+  const url = new URL(window.location.href);
+  if (currentPlanId) url.searchParams.set('plan', currentPlanId);
+  const link = url.toString();
   if (navigator.share) {
-    navigator.share({ title: 'Navisense Itinerary', text: msg, url: window.location.href }).catch(() => { });
+    navigator.share({ title: 'Navisense Itinerary', text: msg, url: link }).catch(() => { });
   } else {
-    navigator.clipboard.writeText(window.location.href + ' — ' + msg)
+    navigator.clipboard.writeText(link + ' — ' + msg)
       .then(() => showToast('Link copied to clipboard!'))
-      .catch(() => showToast('Share link: ' + window.location.href));
+      .catch(() => showToast('Share link: ' + link));
   }
 };
 
+/** Open a shared/reloaded plan (?plan=<id>) straight from server storage. */
+async function loadSharedPlan() {
+  const planId = new URLSearchParams(window.location.search).get('plan');
+  if (!planId) return;
+  try {
+    const res = await fetch(`${API_BASE}/plans/${encodeURIComponent(planId)}`);
+    if (!res.ok) throw new Error(`Server error: ${res.status}`);
+    const plan = await res.json();
+    renderResult(plan, plan.request || {});
+  } catch (err) {
+    showError('This shared plan could not be loaded — it may have expired.');
+  }
+}
+
 /* ── Toast notification ── */
 function showToast(msg) {
   let toast = document.getElementById('nsToast');
@@ -1145,6 +1208,9 @@ document.getElementById('step-1').classList.add('active');
 // Ensure itinerary is hidden
 document.getElementById('itineraryResult').classList.remove('visible');
 
+// Open a shared plan if the URL carries one
+loadSharedPlan();
+
 /* ── Cursor trail (subtle enhancement) ── */
 const trail = [];
 const TRAIL_COUNT = 8;